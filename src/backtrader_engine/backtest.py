@@ -13,24 +13,44 @@ sys.path.append(project_root)
 # 现在应该可以正确导入
 from src.strategy.MaStrategy import  AdaptiveMAEnvelopeStrategy
 from src.strategy.SignalDataFeeder import SignalDataFeeder
+from src.strategy.ArrayDataFeeder import ArrayDataFeeder
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.run_catalog import default_catalog
+from src.data_engine.trading_calendar import TradingCalendar
+from src.instrumentation.stage_monitor import stage
 
-def run_backtest():
+def run_backtest(array_feed=True, calendar=None):
+    """
+    Args:
+        array_feed (bool): 使用ArrayDataFeeder（整列加载+预计算交叉线），False时沿用SignalDataFeeder
+        calendar (TradingCalendar): 用于检查缺失交易日的日历；默认只读取本地缓存的交易所日历，
+            未缓存时跳过检查（不联网，也不用工作日近似，避免把节假日误报为缺失）
+    """
     cerebro = bt.Cerebro()
     
     # 加载原始数据
-    data_path = 'E:/gzhtemp/etf_trade_v1/data/signal_Adaptive_MA_Envelope_20250311_133351.csv'
-    df = pd.read_csv(data_path)
-    
-    # 关键修复1：日期格式转换（假设原始日期是YYYYMMDD格式的整数）
-    df['date'] = pd.to_datetime(df['date'].astype(str), format='%Y-%m-%d')
-    df.set_index('date', inplace=True)
+    # 从产物目录取最新信号文件，目录为空时回退到历史文件
+    data_path = (default_catalog().latest('signal', symbol='159995')
+                 or 'E:/gzhtemp/etf_trade_v1/data/signal_Adaptive_MA_Envelope_20250311_133351.csv')
+    # 关键修复1：统一加载器按固定格式解析日期，仅读取回测所需列
+    df = load_csv(data_path, usecols=['close', 'MA_Upper', 'MA_Lower', 'Signal'])
     
     # 关键修复2：数据标准化处理
     numeric_cols = ['close', 'MA_Upper', 'MA_Lower']
     df[numeric_cols] = df[numeric_cols].apply(lambda x: x.abs().ffill())
     df.replace([np.inf, -np.inf], np.nan, inplace=True)
-    # df.fillna(method='bfill', inplace=True)
-    df = df.bfill().ffill()
+    # 只向前填充，开头无历史值的行直接丢弃；bfill会把未来价格写入过去
+    df = df.ffill().dropna()
+
+    # 按交易日历检查停牌/缺失日
+    calendar = calendar if calendar is not None else TradingCalendar.cached()
+    if calendar is None:
+        print("\n未找到本地交易日历缓存，跳过缺失交易日检查（可传入calendar参数）")
+    else:
+        gaps = calendar.gaps(df.index)
+        if not gaps.empty:
+            print(f"\n警告：{len(gaps)} 段缺失交易日，共 {gaps['days'].sum()} 天（回测不会补齐这些K线）")
+            print(gaps.head(10).to_string(index=False))
     
     # 数据验证
     print("\n=== 数据摘要 ===")
@@ -38,7 +58,8 @@ def run_backtest():
     print(f"数据列:\n{df[numeric_cols].describe()}")
     
     # 创建数据源（严格匹配列名）
-    data = SignalDataFeeder(
+    feeder_cls = ArrayDataFeeder if array_feed else SignalDataFeeder
+    data = feeder_cls(
         dataname=df,
         ma_upper='MA_Upper',  # 必须与DataFrame列名完全一致
         ma_lower='MA_Lower',
@@ -74,7 +95,9 @@ def run_backtest():
     
     # 执行回测
     print(f"\n初始资金: {initial_cash:,.2f}")
-    results = cerebro.run()
+    with stage('backtrader_engine.run') as st:
+        results = cerebro.run()
+        st.add_rows(len(df))
     
     # 结果分析
     strat = results[0]
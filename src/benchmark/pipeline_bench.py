@@ -0,0 +1,237 @@
+# ==== pipeline_bench.py ====
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import backtrader as bt
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.benchmark.synthetic import iter_market_data, to_akshare_frame
+from src.data_engine.data_fetcher import DataFetcher
+from src.data_engine.data_validator import DataValidator
+from src.factor_engine.adaptive_ma_envelope import AdaptiveMAEnvelope
+from src.factor_engine.ma_sma import MA_SMA
+from src.signal_engine.SignalGenerator import SignalGenerator
+from src.data_analysis.StrategyAnalyzer import StrategyAnalyzer
+from src.data_analysis.ChannelVisualizer import ChannelVisualizer
+from src.strategy.MaStrategy import AdaptiveMAEnvelopeStrategy
+from src.strategy.ArrayDataFeeder import ArrayDataFeeder
+
+ALL_STAGES = ['clean', 'validate', 'envelope', 'ma_sma', 'signal', 'analyze', 'backtest', 'chart']
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class StageTimer:
+    """单阶段计时与峰值内存记录"""
+
+    def __init__(self, measure_memory: bool = True):
+        self.measure_memory = measure_memory
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def run(self, name: str, func: Callable[[], Any], rows: int) -> Any:
+        # 计时与内存分两次测量，避免tracemalloc开销污染耗时
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        elapsed = time.perf_counter() - start
+
+        stats = self.results.setdefault(name, {'seconds': 0.0, 'peak_mb': 0.0, 'rows': 0, 'calls': 0})
+        stats['seconds'] += elapsed
+        stats['rows'] += rows
+        stats['calls'] += 1
+
+        if self.measure_memory:
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stats['peak_mb'] = max(stats['peak_mb'], peak / 1024 ** 2)
+        return result
+
+
+def _run_backtest(signal_df) -> float:
+    """与run_backtest相同的策略配置，关闭日志输出"""
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(ArrayDataFeeder(dataname=signal_df))
+    cerebro.addstrategy(AdaptiveMAEnvelopeStrategy, risk_per_trade=0.002,
+                        max_price_change=0.05, min_position=100,
+                        slippage=0.01, printlog=False)
+    cerebro.broker.setcash(10_000_000.0)
+    cerebro.broker.setcommission(commission=0.00015)
+    cerebro.run()
+    return cerebro.broker.getvalue()
+
+
+def run_benchmark(n_symbols: int = 10,
+                  years: float = 5,
+                  freq: str = 'daily',
+                  stages: Optional[List[str]] = None,
+                  measure_memory: bool = True,
+                  seed: int = 0) -> Dict[str, Any]:
+    """在合成数据上逐标的执行全流程并记录各阶段耗时/峰值内存
+
+    Args:
+        n_symbols (int): 标的数量
+        years (float): 每个标的的年数
+        freq (str): 'daily' 或 'minute'
+        stages (list): 需要测量的阶段，默认全部
+        measure_memory (bool): 是否额外执行一次内存测量
+        seed (int): 随机种子
+    Returns:
+        dict: 运行配置、环境信息及各阶段指标
+    """
+    stages = stages or ALL_STAGES
+    unknown = set(stages) - set(ALL_STAGES)
+    if unknown:
+        raise ValueError(f"未知阶段: {sorted(unknown)}")
+
+    timer = StageTimer(measure_memory)
+    validator = DataValidator()
+    envelope = AdaptiveMAEnvelope(base_window=40, vol_window=20, scale_factor=3.8,
+                                  clip_range=(0.025, 0.12))
+    ma_sma = MA_SMA(window=20, band_pct=0.02)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        for symbol, bars in iter_market_data(n_symbols, years, freq, seed):
+            rows = len(bars)
+            price_df = bars
+            if 'clean' in stages:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fetcher = DataFetcher(symbol, start_date='19000101', end_date='22001231')
+                raw = to_akshare_frame(bars)
+                price_df = timer.run('clean', lambda: fetcher._clean_data(raw), rows)
+            if 'validate' in stages:
+                timer.run('validate', lambda: validator.validate_integrity(price_df), rows)
+            if 'ma_sma' in stages:
+                timer.run('ma_sma', lambda: ma_sma.compute(price_df), rows)
+
+            factor_df = envelope.compute(price_df[['close']])
+            if 'envelope' in stages:
+                factor_df = timer.run('envelope', lambda: envelope.compute(price_df[['close']]), rows)
+
+            generator = SignalGenerator(input_path='', upper_band_col='MA_Upper', lower_band_col='MA_Lower')
+            generator.df = factor_df
+            signal_df = generator.process().df
+            if 'signal' in stages:
+                def _signal():
+                    gen = SignalGenerator(input_path='', upper_band_col='MA_Upper', lower_band_col='MA_Lower')
+                    gen.df = factor_df
+                    return gen.process().df
+                timer.run('signal', _signal, rows)
+
+            signal_path = tmp_dir / f'signal_{symbol}.csv'
+            if {'analyze', 'chart'} & set(stages):
+                signal_df.to_csv(signal_path)
+            if 'analyze' in stages:
+                timer.run('analyze', lambda: StrategyAnalyzer(str(signal_path)).load_data().calculate_metrics(), rows)
+            if 'backtest' in stages:
+                timer.run('backtest', lambda: _run_backtest(signal_df), rows)
+            if 'chart' in stages:
+                chart_path = tmp_dir / f'channel_{symbol}.png'
+                timer.run('chart', lambda: ChannelVisualizer(signal_path, symbol=symbol, max_points=2000)
+                          .visualize(save_path=chart_path, show=False, dpi=100), rows)
+
+    for stats in timer.results.values():
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_rev': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'n_symbols': n_symbols, 'years': years, 'freq': freq, 'seed': seed},
+        'stages': timer.results,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_result(result: Dict[str, Any], results_path: Path) -> None:
+    """追加写入结果历史（JSON Lines）"""
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def load_history(results_path: Path) -> List[Dict[str, Any]]:
+    if not results_path.exists():
+        return []
+    with open(results_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_with_baseline(result: Dict[str, Any],
+                          history: List[Dict[str, Any]],
+                          threshold: float = 0.2) -> List[str]:
+    """与相同配置的上一次结果对比，返回耗时或内存超出阈值的阶段说明"""
+    baseline = next((h for h in reversed(history) if h['config'] == result['config']), None)
+    if baseline is None:
+        return []
+    regressions = []
+    for stage, stats in result['stages'].items():
+        base = baseline['stages'].get(stage)
+        if not base:
+            continue
+        for key in ('seconds', 'peak_mb'):
+            if base[key] > 0 and stats[key] > base[key] * (1 + threshold):
+                regressions.append(
+                    f"{stage}.{key}: {base[key]:.4f} -> {stats[key]:.4f} "
+                    f"(+{stats[key] / base[key] - 1:.0%}, 基线 {baseline.get('git_rev')})"
+                )
+    return regressions
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    cfg = result['config']
+    print(f"\n=== 流水线基准 [{result.get('git_rev')}] "
+          f"{cfg['n_symbols']}标的 × {cfg['years']}年 ({cfg['freq']}) ===")
+    print(f"{'阶段':<10s}{'耗时(s)':>12s}{'峰值内存(MB)':>16s}{'行/秒':>16s}")
+    for stage, stats in result['stages'].items():
+        print(f"{stage:<10s}{stats['seconds']:>12.4f}{stats['peak_mb']:>16.2f}{stats['rows_per_sec']:>16,.0f}")
+
+
+# ==== 命令行入口 ====
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETF策略流水线基准测试（合成数据，无需网络）")
+    parser.add_argument('--symbols', type=int, default=10, help='标的数量(1-10000)')
+    parser.add_argument('--years', type=float, default=5, help='年数(1-20)')
+    parser.add_argument('--freq', choices=['daily', 'minute'], default='daily')
+    parser.add_argument('--stages', nargs='+', default=ALL_STAGES, choices=ALL_STAGES)
+    parser.add_argument('--no-memory', action='store_true', help='跳过峰值内存测量')
+    parser.add_argument('--threshold', type=float, default=0.2, help='回归判定阈值')
+    parser.add_argument('--results', default=str(PROJECT_ROOT / 'benchmark_results' / 'pipeline.jsonl'))
+    args = parser.parse_args()
+
+    result = run_benchmark(args.symbols, args.years, args.freq, args.stages, not args.no_memory)
+    print_result(result)
+
+    results_path = Path(args.results)
+    regressions = compare_with_baseline(result, load_history(results_path), args.threshold)
+    save_result(result, results_path)
+    if regressions:
+        print("\n[Warning] 检测到性能回归：")
+        for line in regressions:
+            print(f"  - {line}")
+    print(f"\n结果已追加至: {results_path}")
@@ -0,0 +1,113 @@
+# ==== synthetic.py ====
+import numpy as np
+import pandas as pd
+from typing import Iterator, List, Tuple
+
+TRADING_DAYS_PER_YEAR = 252
+MINUTES_PER_DAY = 240
+
+# A股连续竞价时段（含午休）
+SESSIONS = (('09:31', '11:30'), ('13:01', '15:00'))
+
+
+def trading_days(years: float, start: str = '2005-01-04') -> pd.DatetimeIndex:
+    """按工作日近似生成交易日序列"""
+    return pd.bdate_range(start, periods=int(round(years * TRADING_DAYS_PER_YEAR)), name='date')
+
+
+def minute_index(days: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """生成分钟级时间戳：每日上午/下午各120根，跳过午休"""
+    offsets = np.concatenate([
+        pd.timedelta_range(start=f'{s}:00', end=f'{e}:00', freq='1min').to_numpy()
+        for s, e in SESSIONS
+    ])
+    stamps = days.to_numpy()[:, None] + offsets[None, :]
+    return pd.DatetimeIndex(stamps.ravel(), name='date')
+
+
+def gbm_ohlcv(n_bars: int,
+              mu: float = 0.05,
+              sigma: float = 0.25,
+              bars_per_year: int = TRADING_DAYS_PER_YEAR,
+              start_price: float = 3.0,
+              seed: int = 0) -> dict:
+    """几何布朗运动价格路径及配套OHLCV
+
+    Args:
+        n_bars (int): K线数量
+        mu (float): 年化漂移
+        sigma (float): 年化波动率
+        bars_per_year (int): 每年K线数，用于换算单步参数
+        start_price (float): 初始价格
+        seed (int): 随机种子
+    Returns:
+        dict: open/high/low/close/volume 数组
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / bars_per_year
+    log_ret = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n_bars)
+    close = start_price * np.exp(np.cumsum(log_ret))
+    prev_close = np.concatenate([[start_price], close[:-1]])
+
+    # 开盘价在前收附近跳动，高低价覆盖开收并附加区间噪声
+    open_ = prev_close * np.exp(sigma * np.sqrt(dt) * 0.3 * rng.standard_normal(n_bars))
+    spread = np.abs(sigma * np.sqrt(dt) * 0.5 * rng.standard_normal((2, n_bars)))
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+    volume = rng.integers(1_000, 100_000, n_bars).astype(float) * 100
+
+    return {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def make_symbols(n_symbols: int) -> List[str]:
+    """生成6位合成证券代码"""
+    return [f'{900000 + i:06d}' for i in range(n_symbols)]
+
+
+def iter_market_data(n_symbols: int,
+                     years: float,
+                     freq: str = 'daily',
+                     seed: int = 0) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """逐标的生成合成行情，内存占用与单标的数据量成正比
+
+    Args:
+        n_symbols (int): 标的数量
+        years (float): 年数
+        freq (str): 'daily' 或 'minute'
+        seed (int): 基础随机种子，各标的在此基础上偏移
+    Yields:
+        (symbol, DataFrame): 以date为索引的OHLCV数据
+    """
+    days = trading_days(years)
+    if freq == 'daily':
+        index, bars_per_year = days, TRADING_DAYS_PER_YEAR
+    elif freq == 'minute':
+        index, bars_per_year = minute_index(days), TRADING_DAYS_PER_YEAR * MINUTES_PER_DAY
+    else:
+        raise ValueError(f"不支持的频率: {freq}")
+
+    for i, symbol in enumerate(make_symbols(n_symbols)):
+        rng = np.random.default_rng(seed + i)
+        bars = gbm_ohlcv(
+            len(index),
+            mu=rng.uniform(-0.05, 0.15),
+            sigma=rng.uniform(0.15, 0.45),
+            bars_per_year=bars_per_year,
+            start_price=rng.uniform(0.5, 5.0),
+            seed=seed + i,
+        )
+        df = pd.DataFrame(bars, index=index)
+        df['symbol'] = symbol
+        yield symbol, df
+
+
+def to_akshare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """转换为akshare fund_etf_hist_em 的原始列格式（成交量单位为手）"""
+    return pd.DataFrame({
+        '日期': df.index.astype(str),
+        '开盘': df['open'].to_numpy(),
+        '收盘': df['close'].to_numpy(),
+        '最高': df['high'].to_numpy(),
+        '最低': df['low'].to_numpy(),
+        '成交量': (df['volume'] / 100).to_numpy(),
+    })
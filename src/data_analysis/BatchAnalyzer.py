@@ -0,0 +1,136 @@
+import sys
+import os
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Any, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_analysis.StrategyAnalyzer import StrategyAnalyzer
+from src.data_analysis.summary_utils import envelope_params, flatten_metrics, infer_symbol
+from src.data_engine.run_catalog import RunCatalog, default_catalog
+
+
+def _analyze_one(signal_path: str,
+                 analyzer_kwargs: Dict[str, Any],
+                 write_report: bool,
+                 output_dir: str,
+                 catalog: Optional[RunCatalog] = None) -> Dict[str, Any]:
+    """子进程任务：分析单个信号文件并返回一行汇总（标的 × 参数组合各占一行）"""
+    path = Path(signal_path)
+    row: Dict[str, Any] = {'symbol': path.stem, 'source': path.stem, 'error': None}
+    try:
+        row['symbol'] = infer_symbol(path, catalog=catalog)
+        row.update(envelope_params(path, catalog))
+        analyzer = (
+            StrategyAnalyzer(signal_path=signal_path, output_dir=output_dir, **analyzer_kwargs)
+            .load_data()
+            .calculate_metrics()
+        )
+        assert analyzer.df is not None
+        row['start_date'] = analyzer.df.index.min()
+        row['end_date'] = analyzer.df.index.max()
+        row['total_days'] = len(analyzer.df)
+        metrics = {k: v for k, v in analyzer.metrics.items() if k != 'total_days'}
+        row.update(flatten_metrics(metrics))
+        if write_report:
+            date_tag = pd.Timestamp.now().strftime('%Y%m%d')
+            analyzer.generate_report(filename=f"report_{path.stem}_{date_tag}.txt")
+    except Exception as e:
+        row['error'] = str(e)
+    return row
+
+
+class BatchStrategyAnalyzer:
+    """批量策略分析器：并行分析多个信号文件并汇总为一张表"""
+
+    def __init__(self,
+                 signal_paths: Union[str, Path, Iterable[Union[str, Path]]],
+                 pattern: str = "signal_*.csv",
+                 output_dir: str = "analysis_reports",
+                 max_workers: Optional[int] = None,
+                 write_reports: bool = False,
+                 catalog: Optional[RunCatalog] = None,
+                 **analyzer_kwargs: Any):
+        """
+        Args:
+            signal_paths: 信号文件目录，或信号文件路径列表
+            pattern (str): 目录模式下的文件匹配规则，默认signal_*.csv
+            output_dir (str): 汇总表及单标的报告输出目录
+            max_workers (int): 进程池大小，默认CPU核数；1表示串行执行
+            write_reports (bool): 是否同时输出单标的文本报告
+            catalog (RunCatalog): 产物目录，用于查询标的与包络参数，默认项目目录
+            **analyzer_kwargs: 透传给StrategyAnalyzer的列名/绩效参数
+        """
+        self.signal_paths: List[Path] = self._collect_paths(signal_paths, pattern)
+        self.output_dir: Path = Path(output_dir)
+        self.max_workers = max_workers
+        self.write_reports = write_reports
+        self.analyzer_kwargs: Dict[str, Any] = analyzer_kwargs
+        self.catalog: RunCatalog = catalog or default_catalog()
+        self.summary: Optional[pd.DataFrame] = None
+
+    @staticmethod
+    def _collect_paths(signal_paths: Union[str, Path, Iterable[Union[str, Path]]],
+                       pattern: str) -> List[Path]:
+        if isinstance(signal_paths, (str, Path)):
+            root = Path(signal_paths)
+            if not root.is_dir():
+                raise FileNotFoundError(f"信号目录不存在: {root}")
+            paths = sorted(root.glob(pattern))
+        else:
+            paths = [Path(p) for p in signal_paths]
+        if not paths:
+            raise ValueError("未找到任何信号文件")
+        return paths
+
+    def run(self) -> pd.DataFrame:
+        """并行执行分析，返回每个信号文件一行的汇总表，登记过的文件附带 param_* 参数列"""
+        args = [
+            (str(path), self.analyzer_kwargs, self.write_reports, str(self.output_dir), self.catalog)
+            for path in self.signal_paths
+        ]
+        rows: List[Dict[str, Any]] = []
+        if self.max_workers == 1:
+            rows = [_analyze_one(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(_analyze_one, *a) for a in args]
+                for future in as_completed(futures):
+                    rows.append(future.result())
+
+        self.summary = (
+            pd.DataFrame(rows)
+            .sort_values(['symbol', 'source'])
+            .reset_index(drop=True)
+        )
+        failed = self.summary['error'].notna().sum()
+        print(f"批量分析完成: {len(self.summary)} 个文件, 失败 {failed} 个")
+        return self.summary
+
+    def save_summary(self, filename: Optional[str] = None) -> Path:
+        """保存汇总表：.parquet后缀使用列式存储，否则保存为CSV"""
+        if self.summary is None:
+            raise ValueError("没有可供保存的汇总结果，请先执行run()")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        final_filename = filename or f"summary_{pd.Timestamp.now().strftime('%Y%m%d')}.csv"
+        file_path = self.output_dir / final_filename
+        if file_path.suffix == '.parquet':
+            self.summary.to_parquet(file_path, index=False)
+        else:
+            self.summary.to_csv(file_path, index=False, encoding='utf-8')
+        print(f"汇总表已保存至: {file_path}")
+        return file_path
+
+
+# 使用示例
+if __name__ == "__main__":
+    batch = BatchStrategyAnalyzer(
+        signal_paths="E://gzhtemp//etf_trade_v1//data",
+        pattern="signal_*.csv",
+        write_reports=True
+    )
+    summary = batch.run()
+    batch.save_summary()
+    print(summary[['symbol', 'performance_sharpe', 'performance_max_drawdown']].to_string())
@@ -0,0 +1,284 @@
+import sys
+import os
+import itertools
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from numpy.lib.stride_tricks import sliding_window_view
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.trading_calendar import TradingCalendar
+from src.data_engine.shared_panel import PanelSpec, SharedPanel, shared_panels
+from src.data_engine.run_catalog import RunCatalog, default_catalog, hash_frame
+from src.pipeline.checkpoint import Checkpoint
+from src.data_analysis.summary_utils import infer_symbol
+from src.instrumentation.stage_monitor import stage
+
+
+def build_panels(frames: Dict[str, pd.DataFrame],
+                 columns: Sequence[str] = ('close', 'Signal', 'high', 'low')) -> Dict[str, pd.DataFrame]:
+    """将多个标的按交易日历对齐为 日期 × 标的 面板，缺失列跳过"""
+    calendar = TradingCalendar.from_indexes([df.index for df in frames.values()])
+    panels = {}
+    for col in columns:
+        if all(col in df.columns for df in frames.values()):
+            panels[col] = calendar.panel(frames, col)
+    return panels
+
+
+class BreakoutEventStudy:
+    """通道突破事件研究
+
+    对SignalGenerator标记的每次突破（Signal由非1变为1为向上突破，由非-1变为-1为向下突破），
+    统计不同持有期的前瞻收益与最大不利偏移(MAE)。所有事件在对齐面板上通过
+    sliding_window_view一次性取出前瞻路径，不对事件逐个循环。
+
+    收益与MAE均按突破方向计：向上突破做多、向下突破做空，以突破当日收盘价为基准。
+    """
+
+    def __init__(self, horizons: Sequence[int] = (1, 3, 5, 10, 20), new_only: bool = True):
+        """
+        Args:
+            horizons: 前瞻持有期（交易日）
+            new_only (bool): 只统计新发生的突破（前一根K线信号已知且不同）；前一根信号缺失
+                （面板首行、上市前、停牌/数据缺口后）无法判断是否为新突破，不计入。
+                False时每根处于突破状态的K线都计为事件
+        """
+        self.horizons = np.array(sorted(set(int(h) for h in horizons)))
+        if self.horizons.size == 0 or self.horizons[0] < 1:
+            raise ValueError("horizons 必须为正整数")
+        self.new_only = new_only
+        self.events: Optional[pd.DataFrame] = None
+
+    # ==== 数据入口 ====
+    @classmethod
+    def from_signal_files(cls, paths: Iterable[Union[str, Path]],
+                          catalog: Optional[RunCatalog] = None, **kwargs) -> "BreakoutEventStudy":
+        """从多个信号文件构建面板并完成统计；标的取symbol列，其次取产物目录登记信息"""
+        catalog = catalog or default_catalog()
+        frames = {}
+        for path in map(Path, paths):
+            df = load_csv(path, usecols=['close', 'Signal', 'high', 'low', 'symbol'])
+            frames[infer_symbol(path, frame=df, catalog=catalog)] = df
+        panels = build_panels(frames)
+        return cls(**kwargs).fit(panels['close'], panels['Signal'], panels.get('high'), panels.get('low'))
+
+    # ==== 计算 ====
+    def fit(self, close: pd.DataFrame,
+            signal: pd.DataFrame,
+            high: Optional[pd.DataFrame] = None,
+            low: Optional[pd.DataFrame] = None) -> "BreakoutEventStudy":
+        """在已对齐的面板上提取全部事件
+
+        Args:
+            close/signal/high/low: 相同索引与列（日期 × 标的）的面板；未提供high/low时MAE按收盘价计算
+        """
+        with stage('data_analysis.event_study', symbols=close.shape[1]) as st:
+            prices = close.to_numpy(dtype=float)
+            raw_signals = signal.to_numpy(dtype=float)
+            signals = np.nan_to_num(raw_signals).astype(np.int8)
+            n_bars, n_symbols = prices.shape
+            max_h = int(self.horizons[-1])
+
+            # 尾部补NaN，使每根K线都有完整的前瞻窗口
+            pad = np.full((max_h, n_symbols), np.nan)
+
+            def windows(arr: np.ndarray) -> np.ndarray:
+                return sliding_window_view(np.vstack([arr, pad]), max_h + 1, axis=0)  # (T, N, H+1)
+
+            close_win = windows(prices)
+            adverse_src = {
+                1: windows(low.to_numpy(dtype=float)) if low is not None else close_win,
+                -1: windows(high.to_numpy(dtype=float)) if high is not None else close_win,
+            }
+            # 前一根K线信号，NaN表示未知（不能当作0，否则缺口后的第一根K线会被误判为新突破）
+            prev = np.vstack([np.full((1, n_symbols), np.nan), raw_signals[:-1]])
+
+            blocks = []
+            for direction in (1, -1):
+                mask = (signals == direction) & np.isfinite(prices)
+                if self.new_only:
+                    mask &= np.isfinite(prev) & (prev != direction)
+                t_idx, n_idx = np.nonzero(mask)
+                if t_idx.size == 0:
+                    continue
+
+                entry = prices[t_idx, n_idx][:, None]
+                path = close_win[t_idx, n_idx, 1:]                 # (E, H) 前瞻收盘价
+                adverse = adverse_src[direction][t_idx, n_idx, 1:]  # (E, H) 前瞻最低/最高价
+                if direction == 1:
+                    excursion = np.fmin.accumulate(adverse, axis=1) / entry - 1
+                else:
+                    excursion = 1 - np.fmax.accumulate(adverse, axis=1) / entry
+
+                cols = self.horizons - 1
+                returns = direction * (path[:, cols] / entry - 1)
+                mae = np.minimum(excursion[:, cols], 0.0)
+                # 超出数据末尾的持有期记为NaN
+                beyond = (t_idx[:, None] + self.horizons[None, :]) >= n_bars
+                returns[beyond] = np.nan
+                mae[beyond | np.isnan(returns)] = np.nan
+
+                block = pd.DataFrame({
+                    'symbol': close.columns[n_idx],
+                    'date': close.index[t_idx],
+                    'direction': direction,
+                    'entry': entry[:, 0],
+                })
+                for i, h in enumerate(self.horizons):
+                    block[f'ret_{h}'] = returns[:, i]
+                    block[f'mae_{h}'] = mae[:, i]
+                blocks.append(block)
+
+            self.events = (
+                pd.concat(blocks, ignore_index=True).sort_values(['date', 'symbol'], ignore_index=True)
+                if blocks else pd.DataFrame(columns=['symbol', 'date', 'direction', 'entry'])
+            )
+            st.add_rows(len(self.events))
+        return self
+
+    # ==== 统计 ====
+    def summary(self, per_symbol: bool = False) -> pd.DataFrame:
+        """按方向(及标的)、持有期汇总前瞻收益与MAE分布
+
+        Returns:
+            DataFrame: 索引[(symbol,) direction, horizon]，列[events, mean, median, std, win_rate,
+                p05, p95, mae_mean, mae_p05]
+        """
+        if self.events is None:
+            raise ValueError("请先执行fit()")
+        keys = ['symbol', 'direction'] if per_symbol else ['direction']
+        if self.events.empty:
+            return pd.DataFrame()
+
+        grouped = self.events.groupby(keys, sort=True)
+        tables = []
+        for h in self.horizons:
+            ret, mae = f'ret_{h}', f'mae_{h}'
+            table = grouped.agg(
+                events=(ret, 'count'),
+                mean=(ret, 'mean'),
+                median=(ret, 'median'),
+                std=(ret, 'std'),
+                win_rate=(ret, lambda x: (x > 0).sum() / x.count() if x.count() else np.nan),
+                p05=(ret, lambda x: x.quantile(0.05)),
+                p95=(ret, lambda x: x.quantile(0.95)),
+                mae_mean=(mae, 'mean'),
+                mae_p05=(mae, lambda x: x.quantile(0.05)),
+            )
+            table['horizon'] = h
+            tables.append(table.reset_index())
+        return pd.concat(tables, ignore_index=True).set_index(keys + ['horizon']).sort_index()
+
+
+def _sweep_combo(close: pd.DataFrame,
+                 ma_base: np.ndarray,
+                 volatility: np.ndarray,
+                 scale: float,
+                 clip_range: Tuple[float, float],
+                 horizons: Sequence[int],
+                 new_only: bool) -> pd.DataFrame:
+    """单个参数组合：裁剪通道宽度、生成信号并汇总事件统计"""
+    clip_min, clip_max = clip_range
+    prices = close.to_numpy(dtype=float)
+    pct = np.clip(volatility * scale, clip_min, clip_max)
+    upper = ma_base * (1 + pct)
+    lower = ma_base * (1 - pct)
+    signal = np.select([prices > upper, prices < lower], [1, -1], default=0).astype(float)
+    signal[~(np.isfinite(prices) & np.isfinite(upper) & np.isfinite(lower))] = np.nan  # 缺口/预热期信号未知
+    study = BreakoutEventStudy(horizons, new_only).fit(
+        close, pd.DataFrame(signal, index=close.index, columns=close.columns)
+    )
+    table = study.summary().reset_index()
+    table.insert(0, 'clip_range', f'{clip_min:g}-{clip_max:g}')
+    table.insert(0, 'scale_factor', scale)
+    return table
+
+
+def _sweep_worker(spec: PanelSpec,
+                  scale: float,
+                  clip_range: Tuple[float, float],
+                  horizons: Sequence[int],
+                  new_only: bool) -> pd.DataFrame:
+    """子进程任务：挂载共享面板（每个进程只挂载一次）后计算一个参数组合"""
+    panel = SharedPanel.attach(spec)
+    return _sweep_combo(panel.frame('close'), panel.array('ma_base'), panel.array('volatility'),
+                        scale, clip_range, horizons, new_only)
+
+
+def sweep(close: pd.DataFrame,
+          scale_factors: Iterable[float],
+          clip_ranges: Iterable[Tuple[float, float]],
+          base_window: int = 20,
+          vol_window: int = 20,
+          horizons: Sequence[int] = (1, 3, 5, 10, 20),
+          new_only: bool = True,
+          max_workers: Optional[int] = 1,
+          checkpoint: Union[str, Path, Checkpoint, None] = None) -> pd.DataFrame:
+    """在收盘价面板上扫描 scale_factor × clip_range 组合，输出各组合的合并统计
+
+    均线与收益率波动率只需在整块面板上计算一次，各参数组合仅做裁剪与比较；
+    停牌造成的缺口按缺失处理，不计算跨缺口收益率。
+
+    Args:
+        max_workers (int): 进程数，1为串行，None为CPU核数；并行时面板只发布一次到共享内存，
+            各worker零拷贝挂载，不随任务重复pickle
+        checkpoint: 检查点目录或Checkpoint；每个组合完成即落盘，中断后重新调用只计算剩余组合
+    """
+    combos = [(scale, tuple(clip)) for scale, clip in itertools.product(scale_factors, clip_ranges)]
+    if not combos:
+        return pd.DataFrame()
+    if checkpoint is not None and not isinstance(checkpoint, Checkpoint):
+        checkpoint = Checkpoint(checkpoint, job_params={
+            'data': hash_frame(close), 'base_window': base_window, 'vol_window': vol_window,
+            'horizons': list(horizons), 'new_only': new_only,
+        })
+
+    ma_base = close.rolling(base_window).mean().to_numpy()
+    volatility = close.pct_change(fill_method=None).rolling(vol_window).std().to_numpy()
+
+    if max_workers == 1:
+        tasks = {combo: (close, ma_base, volatility, *combo, horizons, new_only) for combo in combos}
+        if checkpoint is None:
+            return pd.concat([_sweep_combo(*args) for args in tasks.values()], ignore_index=True)
+        done = checkpoint.run(_sweep_combo, tasks, max_workers=1)
+    else:
+        with shared_panels({'close': close, 'ma_base': ma_base, 'volatility': volatility}) as spec:
+            tasks = {combo: (spec, *combo, horizons, new_only) for combo in combos}
+            if checkpoint is None:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(_sweep_worker, *args) for args in tasks.values()]
+                    return pd.concat([future.result() for future in futures], ignore_index=True)
+            done = checkpoint.run(_sweep_worker, tasks, max_workers=max_workers)
+
+    results = [done[combo] for combo in combos if combo in done]
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+
+# 使用示例
+if __name__ == "__main__":
+    import time
+    from src.benchmark.synthetic import iter_market_data
+    from src.factor_engine.adaptive_ma_envelope_csv import AdaptiveMAEnvelope
+
+    envelope = AdaptiveMAEnvelope(base_window=40, vol_window=20, scale_factor=3.8, clip_range=(0.025, 0.12))
+    frames = {}
+    for symbol, df in iter_market_data(300, years=5):
+        out = envelope.compute(df)
+        out['Signal'] = np.select([out['close'] > out['MA_Upper'], out['close'] < out['MA_Lower']], [1, -1], 0)
+        frames[symbol] = out
+
+    panels = build_panels(frames)
+    start = time.perf_counter()
+    study = BreakoutEventStudy().fit(panels['close'], panels['Signal'], panels['high'], panels['low'])
+    print(f"{len(study.events)} 个事件，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(study.summary())
+
+    print("\n=== 参数扫描 ===")
+    grid = sweep(panels['close'], [2.0, 3.0, 3.8], [(0.01, 0.05), (0.025, 0.12)],
+                 base_window=40, vol_window=20, horizons=(5, 20), max_workers=None)
+    print(grid.query("direction == 1")[['scale_factor', 'clip_range', 'horizon', 'events', 'mean', 'win_rate', 'mae_mean']])
@@ -1,11 +1,57 @@
+import sys
+import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from matplotlib.figure import Figure
 from matplotlib.axes import Axes
 from matplotlib.gridspec import GridSpec
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from pathlib import Path
-from typing import Tuple, Optional, Union
+from typing import Dict, List, Tuple, Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.run_catalog import default_catalog
+from src.instrumentation.stage_monitor import stage, record_file_written
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets降采样，返回保留点的位置索引
+
+    Args:
+        y (ndarray): 等间距序列值
+        n_out (int): 目标点数（含首尾两点）
+    Returns:
+        ndarray: 升序的保留点索引
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一桶的均值点作为三角形第三个顶点
+        nxt_start, nxt_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
 
 class ChannelVisualizer:
     def __init__(self, 
@@ -13,13 +59,20 @@ class ChannelVisualizer:
                  symbol: str = "159995",
                  window: int = 20,
                  band_pct: float = 0.02,
-                 figure_size: tuple = (16, 10)):
+                 figure_size: tuple = (16, 10),
+                 max_points: Optional[int] = None):
+        """
+        Args:
+            max_points (int): 绘图点数上限，超出时按LTTB降采样，None表示不降采样
+        """
         self.file_path = Path(file_path)
         self.symbol = symbol
         self.window = window
         self.band_pct = band_pct
         self.figure_size = figure_size
+        self.max_points = max_points
         self.df = self._load_and_validate()
+        self.plot_df = self._downsample(self.df)
            
     # 修复中文显示问题
     plt.rcParams['font.sans-serif'] = ['SimHei']
@@ -30,15 +83,11 @@ class ChannelVisualizer:
         if not self.file_path.exists():
             raise FileNotFoundError(f"[Critical] 数据文件未找到：{self.file_path}")
 
-        df = pd.read_csv(
-            self.file_path,
-            parse_dates=['date'],
-            index_col='date'
-        ).sort_index()
-
         # 修正后的列名校验
         required_cols = ['close', 'MA_Base', 'MA_Upper', 
                         'MA_Lower', 'Signal']
+        df = load_csv(self.file_path, usecols=required_cols).sort_index()
+
         missing = [col for col in required_cols if col not in df.columns]
         
         if missing:
@@ -52,9 +101,19 @@ class ChannelVisualizer:
         df['Band_Pct'] = (df['MA_Upper'] - df['MA_Lower']) / (2 * df['MA_Base'])
         return df
 
-    def _create_figure(self) -> Tuple[Figure, GridSpec]:
-        """创建专业级图表布局"""
-        fig = plt.figure(figsize=self.figure_size)
+    def _downsample(self, df: pd.DataFrame) -> pd.DataFrame:
+        """按收盘价形态降采样，并保留全部信号切换点"""
+        if self.max_points is None or len(df) <= self.max_points:
+            return df
+        keep = lttb_indices(df['close'].to_numpy(dtype=float), self.max_points)
+        signal = df['Signal'].to_numpy()
+        changes = np.flatnonzero(signal[1:] != signal[:-1])
+        keep = np.union1d(keep, np.concatenate([changes, changes + 1]))
+        return df.iloc[keep]
+
+    def _create_figure(self, headless: bool = False) -> Tuple[Figure, GridSpec]:
+        """创建专业级图表布局；无界面模式不注册到pyplot，避免图形对象累积"""
+        fig = Figure(figsize=self.figure_size) if headless else plt.figure(figsize=self.figure_size)
         gs = fig.add_gridspec(3, 1, height_ratios=[3, 1, 1], hspace=0.05)
         return fig, gs
 
@@ -62,22 +121,22 @@ class ChannelVisualizer:
         """绘制价格通道主图"""
         avg_pct = self.df['Band_Pct'].mean() * 100
         
-        ax.plot(self.df['close'], label='收盘价', color='#4169E1', alpha=0.9)
-        ax.plot(self.df['MA_Base'], 
+        ax.plot(self.plot_df['close'], label='收盘价', color='#4169E1', alpha=0.9)
+        ax.plot(self.plot_df['MA_Base'], 
                label=f'{self.window}周期基准线', 
                color='#FF8C00', 
                linestyle='--')
-        ax.plot(self.df['MA_Upper'], 
+        ax.plot(self.plot_df['MA_Upper'], 
                label=f'上轨', 
                color='#32CD32', 
                linewidth=1.2)
-        ax.plot(self.df['MA_Lower'], 
+        ax.plot(self.plot_df['MA_Lower'], 
                label=f'下轨', 
                color='#FF4500', 
                linewidth=1.2)
-        ax.fill_between(self.df.index,
-                       self.df['MA_Upper'],
-                       self.df['MA_Lower'],
+        ax.fill_between(self.plot_df.index,
+                       self.plot_df['MA_Upper'],
+                       self.plot_df['MA_Lower'],
                        color='grey', 
                        alpha=0.1)
         ax.set_title(f'{self.symbol} 自适应通道信号分析 | 平均宽度：{avg_pct:.2f}%', 
@@ -86,7 +145,7 @@ class ChannelVisualizer:
 
     def _plot_band_width(self, ax: Axes) -> None:
         """绘制通道宽度子图"""
-        ax.plot(self.df['Band_Pct'], 
+        ax.plot(self.plot_df['Band_Pct'], 
                label='通道宽度', 
                color='#6A5ACD')
         mean_band_pct = float(self.df['Band_Pct'].mean())
@@ -98,7 +157,7 @@ class ChannelVisualizer:
 
     def _plot_trading_signals(self, ax: Axes) -> None:
         """绘制交易信号子图"""
-        ax.plot(self.df['Signal'], 
+        ax.plot(self.plot_df['Signal'], 
                label='交易信号', 
                color='#2F4F4F', 
                drawstyle='steps')
@@ -107,28 +166,95 @@ class ChannelVisualizer:
         ax.set_ylim(-1.5, 1.5)
 
     # ==== 修改保存路径类型 ====
-    def visualize(self, save_path: Union[str, Path, None] = None) -> None:
-        """执行完整可视化流程"""
-        fig, gs = self._create_figure()
-        ax1 = fig.add_subplot(gs[0])
-        ax2 = fig.add_subplot(gs[1], sharex=ax1)
-        ax3 = fig.add_subplot(gs[2], sharex=ax1)
-
-        self._plot_price_band(ax1)
-        self._plot_band_width(ax2)
-        self._plot_trading_signals(ax3)
-
-        if save_path:
-            save_path = Path(save_path)  # 统一转换为Path对象
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"图表已保存至：{save_path}")
-        plt.show()
+    def visualize(self,
+                  save_path: Union[str, Path, None] = None,
+                  show: bool = True,
+                  dpi: int = 300) -> None:
+        """执行完整可视化流程
+
+        Args:
+            save_path: 图片保存路径
+            show (bool): 是否弹出窗口；False时使用无界面渲染并在保存后释放图形
+            dpi (int): 保存分辨率
+        """
+        with stage('data_analysis.chart', symbol=self.symbol) as st:
+            fig, gs = self._create_figure(headless=not show)
+            ax1 = fig.add_subplot(gs[0])
+            ax2 = fig.add_subplot(gs[1], sharex=ax1)
+            ax3 = fig.add_subplot(gs[2], sharex=ax1)
+
+            self._plot_price_band(ax1)
+            self._plot_band_width(ax2)
+            self._plot_trading_signals(ax3)
+            st.add_rows(len(self.plot_df))
+
+            if save_path:
+                save_path = Path(save_path)  # 统一转换为Path对象
+                save_path.parent.mkdir(parents=True, exist_ok=True)
+                fig.savefig(save_path, dpi=dpi, bbox_inches='tight')
+                record_file_written(st, save_path)
+                print(f"图表已保存至：{save_path}")
+        if show:
+            plt.show()
+            plt.close(fig)
+        else:
+            fig.clear()
+
+
+def _render_one(symbol: str, file_path: str, save_path: str,
+                dpi: int, max_points: Optional[int], kwargs: Dict) -> str:
+    """子进程任务：无界面渲染单个标的"""
+    visualizer = ChannelVisualizer(file_path=file_path, symbol=symbol,
+                                   max_points=max_points, **kwargs)
+    visualizer.visualize(save_path=save_path, show=False, dpi=dpi)
+    return save_path
+
+
+def render_batch(files: Union[Dict[str, Union[str, Path]], List[Union[str, Path]]],
+                 output_dir: Union[str, Path] = "output",
+                 max_workers: Optional[int] = None,
+                 dpi: int = 100,
+                 max_points: Optional[int] = 2000,
+                 **kwargs) -> Dict[str, Optional[str]]:
+    """多进程批量生成通道图（无界面模式）
+
+    Args:
+        files: {标的代码: 信号文件} 映射，或信号文件列表（以文件名作为标的名）
+        output_dir: 图片输出目录，文件名为 channel_<标的>.png
+        max_workers (int): 进程数，默认CPU核数
+        dpi (int): 保存分辨率，批量模式默认100
+        max_points (int): 单图绘制点数上限
+        **kwargs: 透传给ChannelVisualizer的参数(window/band_pct/figure_size)
+    Returns:
+        dict: {标的代码: 图片路径}，失败的标的为None
+    """
+    if not isinstance(files, dict):
+        files = {Path(f).stem: f for f in files}
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    results: Dict[str, Optional[str]] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_render_one, symbol, str(path),
+                            str(output_dir / f"channel_{symbol}.png"),
+                            dpi, max_points, kwargs): symbol
+            for symbol, path in files.items()
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                print(f"[Error] {symbol} 绘图失败: {str(e)}")
+                results[symbol] = None
+    return results
 
 if __name__ == "__main__":
     # 现在可以接受两种路径格式
     visualizer = ChannelVisualizer(
-        file_path="E://gzhtemp//etf_trade_v1//data//signal_Adaptive_MA_Envelope_20250311_133351.csv",  # 字符串路径
+        file_path=default_catalog().latest('signal', symbol='159995')
+        or "E://gzhtemp//etf_trade_v1//data//signal_Adaptive_MA_Envelope_20250311_133351.csv",  # 字符串路径
         # 或 Path 对象路径
         # file_path=Path("data") / "signal_...csv",
         symbol="159995",
@@ -0,0 +1,405 @@
+import json
+import hashlib
+import math
+import numpy as np
+import pandas as pd
+import sys
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import read_header, read_rows
+
+
+class P2Quantile:
+    """P²分位数估计器（Jain & Chlamtac），O(1)内存、O(1)更新的中位数草图"""
+
+    def __init__(self, q: float = 0.5, state: Optional[Dict[str, Any]] = None):
+        self.q = q
+        if state:
+            self.heights: List[float] = state['heights']
+            self.positions: List[float] = state['positions']
+            self.desired: List[float] = state['desired']
+        else:
+            self.heights = []
+            self.positions = [1, 2, 3, 4, 5]
+            self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x: float) -> None:
+        if len(self.heights) < 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        h = self.heights
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # 调整中间三个标记的位置和高度
+        for i in range(1, 4):
+            d = self.desired[i] - self.positions[i]
+            if (d >= 1 and self.positions[i + 1] - self.positions[i] > 1) or \
+               (d <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = self._linear(i, step)
+                h[i] = candidate
+                self.positions[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+
+    def value(self) -> float:
+        if not self.heights:
+            return 0.0
+        if len(self.heights) < 5:
+            return float(np.quantile(self.heights, self.q))
+        return self.heights[2]
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'heights': self.heights, 'positions': self.positions, 'desired': self.desired}
+
+
+class IncrementalStrategyAnalyzer:
+    """增量策略分析器：持久化运行聚合量，追加数据时仅处理新增行
+
+    指标口径与StrategyAnalyzer.calculate_metrics一致；通道宽度中位数使用P²草图近似。
+    """
+
+    STATE_VERSION = 3
+    # 状态校验：记录表头及偏移量之前首尾两段字节的摘要，文件被改写时全量重建
+    FINGERPRINT_HEAD = 64 * 1024
+    FINGERPRINT_TAIL = 4 * 1024
+
+    def __init__(self,
+                 signal_path: str,
+                 state_path: Optional[str] = None,
+                 price_col: str = "close",
+                 signal_col: str = "Signal",
+                 upper_col: str = "MA_Upper",
+                 lower_col: str = "MA_Lower",
+                 periods_per_year: int = 252,
+                 commission: float = 0.00015,
+                 long_only: bool = True):
+        self.signal_path: Path = Path(signal_path)
+        self.state_path: Path = Path(state_path) if state_path else \
+            self.signal_path.with_suffix('.state.json')
+        self.price_col = price_col
+        self.signal_col = signal_col
+        self.upper_col = upper_col
+        self.lower_col = lower_col
+        self.periods_per_year = periods_per_year
+        self.commission = commission
+        self.long_only = long_only
+
+        if not self.signal_path.exists():
+            raise FileNotFoundError(f"信号文件不存在: {self.signal_path}")
+        self.state: Dict[str, Any] = self._load_state()
+        self._width_median = P2Quantile(0.5, self.state['width_median'])
+
+    # ==== 状态管理 ====
+    def _empty_state(self) -> Dict[str, Any]:
+        return {
+            'version': self.STATE_VERSION,
+            'offset': 0,
+            'fingerprint': None,
+            'columns': None,
+            'start_date': None,
+            'last_date': None,
+            'total_days': 0,
+            'active_signals': 0,
+            'upper_breakouts': 0,
+            'lower_breakouts': 0,
+            # Welford累加量：(样本数, 均值, 二阶中心矩)
+            'width': [0, 0.0, 0.0],
+            'width_median': None,
+            'returns': [0, 0.0, 0.0],
+            'downside_sq_sum': 0.0,
+            'last_close': None,
+            'last_signal_state': 0.0,
+            # 收盘价与上/下轨最近一次非零差值，用于逐根复现bt.CrossOver
+            'last_diff_upper': None,
+            'last_diff_lower': None,
+            'position': 0.0,
+            'equity': 1.0,
+            'peak': 1.0,
+            'max_drawdown': 0.0,
+            'underwater_run': 0,
+            'max_drawdown_duration': 0,
+            'turnover': 0.0,
+            'held_periods': 0,
+            'total_trades': 0,
+            'winning_trades': 0,
+            'closed_trades': 0,
+            'trade_growth': 1.0,
+        }
+
+    def _fingerprint(self, offset: int) -> Dict[str, Any]:
+        """已消费部分（偏移量之前）的指纹：表头行 + 开头与末尾两段字节的blake2b摘要"""
+        with open(self.signal_path, 'rb') as f:
+            header = f.readline()
+            f.seek(0)
+            head = f.read(min(offset, self.FINGERPRINT_HEAD))
+            tail_start = max(offset - self.FINGERPRINT_TAIL, 0)
+            f.seek(tail_start)
+            tail = f.read(offset - tail_start)
+        return {
+            'header': header.decode('utf-8', errors='replace').rstrip('\r\n'),
+            'head': hashlib.blake2b(head, digest_size=16).hexdigest(),
+            'tail': hashlib.blake2b(tail, digest_size=16).hexdigest(),
+        }
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == self.STATE_VERSION and \
+                    state['offset'] <= self.signal_path.stat().st_size and \
+                    state['fingerprint'] == self._fingerprint(state['offset']):
+                return state
+            print(f"状态文件失效（版本不符或信号文件已被改写），将全量重建: {self.state_path}")
+        return self._empty_state()
+
+    def save_state(self) -> None:
+        self.state['width_median'] = self._width_median.to_state()
+        self.state['fingerprint'] = self._fingerprint(self.state['offset'])
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        tmp_path.replace(self.state_path)
+
+    def reset(self) -> "IncrementalStrategyAnalyzer":
+        """丢弃已有状态，下次update时全量重建"""
+        self.state = self._empty_state()
+        self._width_median = P2Quantile(0.5)
+        return self
+
+    # ==== 增量读取 ====
+    def _read_new_rows(self) -> pd.DataFrame:
+        """从上次读取的字节偏移处继续读取新增行"""
+        with open(self.signal_path, 'rb') as f:
+            if self.state['offset'] == 0:
+                header = f.readline()
+                self.state['columns'] = read_header(self.signal_path)
+            else:
+                f.seek(self.state['offset'])
+            chunk = f.read()
+
+        # 仅消费完整行，写入中的半行留到下次
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            if self.state['offset'] == 0:
+                self.state['offset'] = len(header)
+            return pd.DataFrame(columns=self.state['columns'])
+        base = self.state['offset'] or len(header)
+        self.state['offset'] = base + end
+
+        # 与批量分析共用load_csv的列类型与日期解析规则
+        return read_rows(chunk[:end], self.state['columns'])
+
+    def update(self) -> "IncrementalStrategyAnalyzer":
+        """读取新增数据并更新全部聚合指标"""
+        new_rows = self._read_new_rows()
+        if not new_rows.empty:
+            self.update_frame(new_rows)
+        self.save_state()
+        return self
+
+    def update_frame(self, df: pd.DataFrame) -> "IncrementalStrategyAnalyzer":
+        """将一批新增行并入聚合状态（要求按日期递增）"""
+        s = self.state
+        df = df.dropna(subset=['date'])
+        if s['last_date'] is not None:
+            df = df[df['date'] > pd.Timestamp(s['last_date'])]
+        if df.empty:
+            return self
+
+        close = df[self.price_col].to_numpy(dtype=float)
+        upper = df[self.upper_col].to_numpy(dtype=float)
+        lower = df[self.lower_col].to_numpy(dtype=float)
+        signal = df[self.signal_col].fillna(0).to_numpy(dtype=int)
+
+        # 计数类指标：直接向量化累加
+        s['total_days'] += len(df)
+        s['active_signals'] += int(np.count_nonzero(signal))
+        s['upper_breakouts'] += int((close > upper).sum())
+        s['lower_breakouts'] += int((close < lower).sum())
+
+        base = np.where(upper == 0, 1e-6, upper)
+        width = (upper - lower) / base
+        width = width[~np.isnan(width)]
+        s['width'] = self._merge_moments(s['width'], width)
+        for w in width:
+            self._width_median.add(float(w))
+
+        # 路径依赖指标：沿新增行递推
+        for price, sig, up, low in zip(close, signal, upper, lower):
+            self._step(price, sig, up, low)
+
+        if s['start_date'] is None:
+            s['start_date'] = df['date'].iloc[0].strftime('%Y-%m-%d')
+        s['last_date'] = df['date'].iloc[-1].strftime('%Y-%m-%d')
+        return self
+
+    @staticmethod
+    def _merge_moments(moments: List[float], values: np.ndarray) -> List[float]:
+        """Chan并行公式合并(样本数, 均值, M2)"""
+        n_a, mean_a, m2_a = moments
+        n_b = len(values)
+        if n_b == 0:
+            return moments
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        return [n, mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n]
+
+    def _cross_up(self, key: str, diff: float) -> bool:
+        """收盘价是否上穿轨道（NonZeroDifference口径，差值为0时沿用之前的相对位置）"""
+        s = self.state
+        prev = s[key]
+        crossed = prev is not None and prev < 0 and diff > 0
+        if prev is None or diff != 0:  # NaN同样覆盖，与向量化版本一致
+            s[key] = diff
+        return crossed
+
+    def _step(self, price: float, signal: int, upper: float, lower: float) -> None:
+        s = self.state
+        held = s['position']
+
+        if self.long_only:
+            # 与MaStrategy一致：上穿上轨开仓，上穿下轨平仓
+            enter = self._cross_up('last_diff_upper', price - upper)
+            leave = self._cross_up('last_diff_lower', price - lower)
+            if held == 0 and enter:
+                position = 1.0
+            elif held != 0 and leave:
+                position = 0.0
+            else:
+                position = held
+        else:
+            # 非零信号覆盖状态，零信号沿用上一状态
+            if signal != 0:
+                s['last_signal_state'] = float(signal)
+            position = s['last_signal_state']
+
+        price_return = price / s['last_close'] - 1 if s['last_close'] else 0.0
+        if math.isnan(price_return):
+            price_return = 0.0
+        turnover = abs(position - held)
+        strategy_return = held * price_return - turnover * self.commission
+
+        s['returns'] = self._merge_moments(s['returns'], np.array([strategy_return]))
+        s['downside_sq_sum'] += min(strategy_return, 0.0) ** 2
+        s['turnover'] += turnover
+        if held != 0:
+            s['held_periods'] += 1
+
+        s['equity'] *= 1 + strategy_return
+        s['peak'] = max(s['peak'], s['equity'])
+        drawdown = s['equity'] / s['peak'] - 1
+        s['max_drawdown'] = min(s['max_drawdown'], drawdown)
+        s['underwater_run'] = s['underwater_run'] + 1 if drawdown < 0 else 0
+        s['max_drawdown_duration'] = max(s['max_drawdown_duration'], s['underwater_run'])
+
+        # 逐笔交易：开仓/反手时结算上一笔并开始新一笔
+        is_entry = (position > 0 >= held) if self.long_only else (position != 0 and position != held)
+        if is_entry:
+            if s['total_trades'] > 0 and held != 0:
+                self._close_trade()
+            s['total_trades'] += 1
+            s['trade_growth'] = 1 + strategy_return
+        elif held != 0 or position != 0:
+            s['trade_growth'] *= 1 + strategy_return
+            if position == 0:
+                self._close_trade()
+
+        s['position'] = position
+        s['last_close'] = price
+
+    def _close_trade(self) -> None:
+        s = self.state
+        s['closed_trades'] += 1
+        if s['trade_growth'] > 1:
+            s['winning_trades'] += 1
+        s['trade_growth'] = 1.0
+
+    # ==== 指标输出 ====
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """与StrategyAnalyzer.metrics同结构的指标字典"""
+        s = self.state
+        n = s['total_days']
+        w_n, w_mean, w_m2 = s['width']
+        r_n, r_mean, r_m2 = s['returns']
+
+        years = n / self.periods_per_year if self.periods_per_year > 0 else 0.0
+        equity = s['equity']
+        ann_factor = math.sqrt(self.periods_per_year)
+        ret_std = math.sqrt(r_m2 / (r_n - 1)) if r_n > 1 else 0.0
+        downside_std = math.sqrt(s['downside_sq_sum'] / r_n) if r_n > 0 else 0.0
+
+        # 未平仓交易按当前浮动收益计入胜率
+        closed, wins = s['closed_trades'], s['winning_trades']
+        if s['position'] != 0:
+            closed += 1
+            wins += int(s['trade_growth'] > 1)
+
+        return {
+            'total_days': n,
+            'active_signals': s['active_signals'],
+            'signal_ratio': s['active_signals'] / n if n > 0 else 0.0,
+            'upper_breakouts': s['upper_breakouts'],
+            'lower_breakouts': s['lower_breakouts'],
+            'width_stats': {
+                'mean': w_mean if w_n > 0 else 0.0,
+                'median': self._width_median.value(),
+                'std': math.sqrt(w_m2 / (w_n - 1)) if w_n > 1 else 0.0,
+            },
+            'total_trades': s['total_trades'],
+            'avg_holding_days': s['held_periods'] / s['total_trades'] if s['total_trades'] > 0 else 0.0,
+            'performance': {
+                'total_return': equity - 1,
+                'cagr': equity ** (1 / years) - 1 if years > 0 and equity > 0 else 0.0,
+                'sharpe': r_mean / ret_std * ann_factor if ret_std > 0 else 0.0,
+                'sortino': r_mean / downside_std * ann_factor if downside_std > 0 else 0.0,
+                'max_drawdown': s['max_drawdown'],
+                'max_drawdown_duration': s['max_drawdown_duration'],
+                'win_rate': wins / closed if closed > 0 else 0.0,
+                'turnover': s['turnover'] / years if years > 0 else 0.0,
+                'exposure': s['held_periods'] / n if n > 0 else 0.0,
+            },
+        }
+
+
+# 使用示例
+if __name__ == "__main__":
+    analyzer = IncrementalStrategyAnalyzer(
+        signal_path="E://gzhtemp//etf_trade_v1//data//signal_Adaptive_MA_Envelope_20250311_133351.csv"
+    ).update()
+
+    print(f"数据区间: {analyzer.state['start_date']} - {analyzer.state['last_date']}")
+    print(json.dumps(analyzer.metrics, ensure_ascii=False, indent=2))
@@ -0,0 +1,387 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.trading_calendar import TradingCalendar
+from src.data_engine.run_catalog import RunCatalog, default_catalog
+from src.data_analysis.summary_utils import infer_symbol
+from src.instrumentation.stage_monitor import stage
+
+
+class RollingCorrelation:
+    """滚动截面相关/协方差矩阵（增量维护）
+
+    窗口内每个交易日一行收益率（日期 × 标的），维护以下累加矩阵：
+        P   = Σ x_i·x_j           交叉乘积
+        N   = Σ m_i·m_j           两标的同时有数据的天数（pairwise）
+        Sx  = Σ x_i·m_j           标的i在与j共同有效日上的收益和
+        Sxx = Σ x_i²·m_j          同上，平方和
+    新K线进入、最旧K线移出各是一次秩1更新，代价O(N²)，无需对窗口重新做O(W·N²)计算；
+    每隔resync_interval根用窗口缓冲区整体重算一次，消除浮点累积误差。
+
+    pairwise=True 时按每对标的的共同有效日计算（与DataFrame.corr()/cov()一致，
+    适合上市时间不同、存在停牌的ETF）；pairwise=False 时缺失收益按0处理，
+    只维护P一个N×N矩阵，内存约为前者的1/4。
+
+    Attributes:
+        symbols (list): 已登记的标的代码，下标即矩阵行列号
+    """
+
+    def __init__(self, window: int = 60,
+                 min_periods: Optional[int] = None,
+                 pairwise: bool = True,
+                 dtype=np.float64,
+                 resync_interval: int = 250):
+        """
+        Args:
+            window (int): 滚动窗口（交易日）
+            min_periods (int): 一对标的至少需要的共同有效天数，默认等于window
+            pairwise (bool): 是否按共同有效日计算，False时缺失按0收益处理
+            dtype: 累加矩阵精度，标的数很多时可用np.float32减半内存
+            resync_interval (int): 每隔多少次更新整体重算一次
+        """
+        if window < 2:
+            raise ValueError("window 至少为2")
+        self.window = window
+        self.min_periods = max(2, min_periods or window)
+        self.pairwise = pairwise
+        self.dtype = np.dtype(dtype)
+        self.resync_interval = resync_interval
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._values = np.zeros((window, 0))          # 收益率环形缓冲区，缺失为0
+        self._mask = np.zeros((window, 0), dtype=bool)
+        self._dates = np.full(window, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self._count = 0                                # 已写入的总行数
+        self._updates = 0
+        self._last_close = np.empty(0)
+        self.last_date: Optional[pd.Timestamp] = None
+
+        self._p = np.zeros((0, 0), dtype=self.dtype)
+        self._n = np.zeros((0, 0), dtype=self.dtype)
+        self._sx = np.zeros((0, 0), dtype=self.dtype)
+        self._sxx = np.zeros((0, 0), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def nbytes(self) -> int:
+        """状态占用字节数"""
+        return sum(a.nbytes for a in (self._values, self._mask, self._p, self._n, self._sx, self._sxx))
+
+    # ==== 状态维护 ====
+    def _matrices(self) -> Tuple[np.ndarray, ...]:
+        return (self._p, self._n, self._sx, self._sxx) if self.pairwise else (self._p,)
+
+    def _register(self, symbols: Iterable[str]) -> np.ndarray:
+        """返回标的对应的列号，新标的追加到末尾（矩阵补零，相当于此前一直缺失）"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if new:
+            n_old, n_new = len(self.symbols), len(new)
+            for s in new:
+                self._index[s] = len(self.symbols)
+                self.symbols.append(s)
+            self._values = np.hstack([self._values, np.zeros((self.window, n_new))])
+            self._mask = np.hstack([self._mask, np.zeros((self.window, n_new), dtype=bool)])
+            self._last_close = np.concatenate([self._last_close, np.full(n_new, np.nan)])
+            size = n_old + n_new
+            for name in ('_p', '_n', '_sx', '_sxx'):
+                if name in ('_n', '_sx', '_sxx') and not self.pairwise:
+                    continue
+                grown = np.zeros((size, size), dtype=self.dtype)
+                grown[:n_old, :n_old] = getattr(self, name)
+                setattr(self, name, grown)
+        return np.fromiter((self._index[s] for s in symbols), dtype=np.int64)
+
+    def _resync(self) -> None:
+        """由窗口缓冲区整体重算累加矩阵（BLAS矩阵乘，O(W·N²)）"""
+        filled = min(self._count, self.window)
+        slots = np.arange(filled)
+        x = self._values[slots]
+        self._p[...] = x.T @ x
+        if self.pairwise:
+            m = self._mask[slots].astype(float)
+            self._n[...] = m.T @ m
+            self._sx[...] = x.T @ m
+            self._sxx[...] = (x * x).T @ m
+        self._updates = 0
+
+    def update(self, date, returns: pd.Series) -> bool:
+        """写入某一交易日各标的收益率
+
+        Args:
+            date: 交易日，不晚于上次写入日期时忽略
+            returns (Series): 标的代码 → 收益率，NaN或未出现的标的视为当日缺失
+        Returns:
+            bool: 是否实际写入
+        """
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            return False
+        returns = returns.dropna()
+        cols = self._register(returns.index)
+
+        x_new = np.zeros(len(self.symbols))
+        x_new[cols] = returns.to_numpy(dtype=float)
+        m_new = np.zeros(len(self.symbols), dtype=bool)
+        m_new[cols] = True
+
+        slot = self._count % self.window
+        full = self._count >= self.window
+        x_old, m_old = self._values[slot].copy(), self._mask[slot].copy()
+        self._values[slot], self._mask[slot] = x_new, m_new
+        self._dates[slot] = np.datetime64(date, 'ns')
+        self._count += 1
+        self.last_date = date
+
+        self._updates += 1
+        if self._updates >= self.resync_interval:
+            self._resync()
+            return True
+
+        # 进入与移出合并为一次 (N×2)@(2×N) 的秩2更新
+        if full:
+            u = np.stack([x_new, x_old], axis=1)
+            self._p += (u * [1.0, -1.0]) @ u.T
+            if self.pairwise:
+                m = np.stack([m_new, m_old], axis=1).astype(float)
+                self._n += (m * [1.0, -1.0]) @ m.T
+                self._sx += (u * [1.0, -1.0]) @ m.T
+                self._sxx += (u * u * [1.0, -1.0]) @ m.T
+        else:
+            self._p += np.outer(x_new, x_new)
+            if self.pairwise:
+                m = m_new.astype(float)
+                self._n += np.outer(m, m)
+                self._sx += np.outer(x_new, m)
+                self._sxx += np.outer(x_new * x_new, m)
+        return True
+
+    def update_prices(self, date, closes: pd.Series) -> bool:
+        """写入当日收盘价，收益率相对各标的上一次有效收盘价计算（首次出现的标的当日记为缺失）"""
+        closes = closes.dropna()
+        cols = self._register(closes.index)
+        prices = closes.to_numpy(dtype=float)
+        prev = self._last_close[cols]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = pd.Series(prices / prev - 1, index=closes.index)
+        if not self.update(date, returns):
+            return False
+        self._last_close[cols] = prices
+        return True
+
+    @classmethod
+    def from_panel(cls, returns: pd.DataFrame, **kwargs) -> "RollingCorrelation":
+        """由历史收益率面板（日期 × 标的）初始化，只装入尾部窗口并一次性计算累加矩阵"""
+        engine = cls(**kwargs)
+        tail = returns.sort_index().iloc[-engine.window:]
+        engine._register(map(str, tail.columns))
+        values = tail.to_numpy(dtype=float)
+        mask = ~np.isnan(values)
+        n_rows = len(tail)
+        engine._values[:n_rows] = np.where(mask, values, 0.0)
+        engine._mask[:n_rows] = mask
+        engine._dates[:n_rows] = tail.index.to_numpy(dtype='datetime64[ns]')
+        engine._count = n_rows
+        engine.last_date = tail.index[-1] if n_rows else None
+        engine._resync()
+        return engine
+
+    # ==== 矩阵输出 ====
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        """当前窗口覆盖的交易日（按时间顺序）"""
+        filled = min(self._count, self.window)
+        order = (np.arange(filled) + (self._count - filled)) % self.window
+        return pd.DatetimeIndex(self._dates[order])
+
+    def _block(self, lo: int, hi: int, kind: str) -> np.ndarray:
+        """第lo:hi行对全部标的的协方差或相关系数块，有效天数不足min_periods为NaN"""
+        p = self._p[lo:hi].astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.pairwise:
+                n = self._n[lo:hi].astype(float)
+                sx_i, sx_j = self._sx[lo:hi].astype(float), self._sx[:, lo:hi].T.astype(float)
+                cov = (p - sx_i * sx_j / n) / (n - 1)
+                enough = n >= self.min_periods
+                if kind == 'corr':
+                    var_i = (self._sxx[lo:hi] - sx_i * sx_i / n) / (n - 1)
+                    var_j = (self._sxx[:, lo:hi].T - sx_j * sx_j / n) / (n - 1)
+                    out = cov / np.sqrt(var_i * var_j)
+                    enough &= (var_i > 0) & (var_j > 0)
+                else:
+                    out = cov
+            else:
+                n = float(min(self._count, self.window))
+                s = self._values.sum(axis=0) if self._count else np.zeros(len(self.symbols))
+                cov = (p - np.outer(s[lo:hi], s) / n) / (n - 1)
+                if kind == 'corr':
+                    var = (np.einsum('ii->i', self._p).astype(float) - s * s / n) / (n - 1)
+                    out = cov / np.sqrt(np.outer(var[lo:hi], var))
+                    enough = np.outer(var[lo:hi] > 0, var > 0) & (n >= self.min_periods)
+                else:
+                    out = cov
+                    enough = np.full(out.shape, n >= self.min_periods)
+        out = np.where(enough, out, np.nan)
+        if kind == 'corr':
+            np.clip(out, -1.0, 1.0, out=out)
+            diag = np.arange(lo, hi)
+            out[diag - lo, diag] = np.where(np.isnan(out[diag - lo, diag]), np.nan, 1.0)
+        return out
+
+    def _iter_blocks(self, kind: str, block_size: int) -> Iterator[Tuple[int, int, np.ndarray]]:
+        for lo in range(0, len(self.symbols), block_size):
+            hi = min(lo + block_size, len(self.symbols))
+            yield lo, hi, self._block(lo, hi, kind)
+
+    def correlation(self, block_size: int = 512) -> pd.DataFrame:
+        """当前窗口的相关系数矩阵"""
+        return self._matrix('corr', block_size)
+
+    def covariance(self, block_size: int = 512) -> pd.DataFrame:
+        """当前窗口的协方差矩阵（ddof=1）"""
+        return self._matrix('cov', block_size)
+
+    def _matrix(self, kind: str, block_size: int) -> pd.DataFrame:
+        with stage(f'data_analysis.rolling_{kind}', symbols=len(self.symbols)) as st:
+            out = np.empty((len(self.symbols), len(self.symbols)))
+            for lo, hi, block in self._iter_blocks(kind, block_size):
+                out[lo:hi] = block
+            st.add_rows(out.size)
+        return pd.DataFrame(out, index=pd.Index(self.symbols, name='symbol'), columns=self.symbols)
+
+    # ==== 去重 ====
+    def pairs(self, threshold: float = 0.9, block_size: int = 512) -> pd.DataFrame:
+        """相关系数不低于阈值的标的对，分块计算，不生成完整N×N矩阵
+
+        Returns:
+            DataFrame: [left, right, corr]，按相关系数降序
+        """
+        lefts, rights, values = [], [], []
+        for lo, _, block in self._iter_blocks('corr', block_size):
+            with np.errstate(invalid='ignore'):
+                i, j = np.nonzero(block >= threshold)
+            i = i + lo
+            upper = j > i
+            lefts.append(i[upper])
+            rights.append(j[upper])
+            values.append(block[i[upper] - lo, j[upper]])
+        i = np.concatenate(lefts) if lefts else np.empty(0, dtype=np.int64)
+        j = np.concatenate(rights) if rights else np.empty(0, dtype=np.int64)
+        corr = np.concatenate(values) if values else np.empty(0)
+        symbols = np.array(self.symbols, dtype=object)
+        return (pd.DataFrame({'left': symbols[i], 'right': symbols[j], 'corr': corr})
+                .sort_values('corr', ascending=False, ignore_index=True))
+
+    def clusters(self, threshold: float = 0.9) -> pd.Series:
+        """按相关系数阈值做单链接聚类（连通分量），相关性高于阈值的标的归入同一簇
+
+        Returns:
+            Series: 标的 → 簇编号（按簇大小降序编号，0为最大簇）
+        """
+        edges = self.pairs(threshold)
+        left = edges['left'].map(self._index).to_numpy(dtype=np.int64)
+        right = edges['right'].map(self._index).to_numpy(dtype=np.int64)
+        labels = _connected_components(len(self.symbols), left, right)
+
+        # 按簇大小重新编号，单独成簇的标的排在最后
+        sizes = np.bincount(labels)
+        order = np.argsort(-sizes[np.unique(labels)], kind='stable')
+        remap = np.empty(labels.max() + 1 if labels.size else 0, dtype=np.int64)
+        remap[np.unique(labels)[order]] = np.arange(len(order))
+        return pd.Series(remap[labels] if labels.size else labels,
+                         index=pd.Index(self.symbols, name='symbol'), name='cluster')
+
+    def representatives(self, threshold: float = 0.9,
+                        score: Optional[pd.Series] = None) -> pd.DataFrame:
+        """每个高相关簇保留一个代表标的，用于合并重复敞口
+
+        Args:
+            threshold (float): 聚类相关系数阈值
+            score (Series): 标的 → 优先级（如成交额、规模），取簇内最高者；默认取簇内首个登记的标的
+        Returns:
+            DataFrame: 索引为标的，列[cluster, size, representative, keep]
+        """
+        labels = self.clusters(threshold)
+        table = labels.to_frame()
+        table['size'] = table.groupby('cluster')['cluster'].transform('size')
+        priority = (score.reindex(table.index).fillna(-np.inf) if score is not None
+                    else pd.Series(-np.arange(len(table)), index=table.index, dtype=float))
+        best = priority.groupby(table['cluster']).idxmax()
+        table['representative'] = table['cluster'].map(best)
+        table['keep'] = table.index == table['representative']
+        return table
+
+
+def _connected_components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """无向图连通分量（向量化标签传播），返回每个节点所在分量的最小节点号"""
+    labels = np.arange(n)
+    if left.size == 0:
+        return labels
+    while True:
+        prev = labels.copy()
+        # 边两端取较小标签，再沿标签链压缩（指针跳跃）
+        low = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, left, low)
+        np.minimum.at(labels, right, low)
+        labels = labels[labels]
+        if np.array_equal(labels, prev):
+            return labels
+
+
+def strategy_return_panel(signal_paths: Iterable[Union[str, Path]],
+                          catalog: Optional[RunCatalog] = None, **analyzer_kwargs) -> pd.DataFrame:
+    """多个信号文件的策略日收益按交易日历对齐为 日期 × 标的 面板
+
+    收益口径与StrategyAnalyzer一致（收盘信号次日生效、扣除手续费）；
+    某标的无数据的日期为NaN，由RollingCorrelation按缺失处理。
+    """
+    from src.data_analysis.StrategyAnalyzer import StrategyAnalyzer
+
+    catalog = catalog or default_catalog()
+    frames = {}
+    for path in map(Path, signal_paths):
+        analyzer = StrategyAnalyzer(str(path), **analyzer_kwargs).load_data().calculate_metrics()
+        frames[infer_symbol(path, catalog=catalog)] = analyzer.df[['Strategy_Return']]
+    calendar = TradingCalendar.from_indexes([df.index for df in frames.values()])
+    return calendar.panel(frames, 'Strategy_Return')
+
+
+# 使用示例
+if __name__ == "__main__":
+    import time
+    from src.benchmark.synthetic import trading_days
+
+    # 200个“指数” × 每个指数若干只跟踪ETF，同一指数下的ETF收益高度相关
+    rng = np.random.default_rng(0)
+    days = trading_days(3)
+    n_index, per_index = 200, 5
+    factors = rng.normal(0, 0.012, (len(days), n_index))
+    noise = rng.normal(0, 0.002, (len(days), n_index * per_index))
+    returns = pd.DataFrame(np.repeat(factors, per_index, axis=1) + noise, index=days,
+                           columns=[f"{510000 + i:06d}" for i in range(n_index * per_index)])
+    returns.iloc[:300, :50] = np.nan  # 部分ETF上市较晚
+
+    history, live = returns.iloc[:-20], returns.iloc[-20:]
+    engine = RollingCorrelation.from_panel(history, window=120, min_periods=60)
+    start = time.perf_counter()
+    for date, row in live.iterrows():
+        engine.update(date, row)
+    per_bar = (time.perf_counter() - start) / len(live) * 1000
+    print(f"{len(engine)} 个标的，增量更新 {per_bar:.1f} ms/根，状态 {engine.nbytes / 1e6:.0f} MB")
+
+    start = time.perf_counter()
+    expected = returns.iloc[-120:].corr(min_periods=60)
+    print(f"pandas整窗重算: {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"与DataFrame.corr()最大误差: {np.nanmax(np.abs(engine.correlation().to_numpy() - expected.to_numpy())):.2e}")
+
+    table = engine.representatives(threshold=0.9)
+    print(f"\n相关系数≥0.9 聚为 {table['cluster'].nunique()} 簇，保留 {table['keep'].sum()} 个代表标的")
+    print(table[table['size'] > 1].head(10))
@@ -1,7 +1,17 @@
+import numpy as np
 import pandas as pd
+import sys
+import os
 from pathlib import Path
 from typing import Dict, Optional, Any
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.run_catalog import default_catalog
+from src.signal_engine.crossover import crossover
+from src.instrumentation.stage_monitor import instrumented, stage, record_file_written
+
 class StrategyAnalyzer:
     """专业级策略分析器（最终修复版v3）"""
 
@@ -11,13 +21,19 @@ class StrategyAnalyzer:
                  price_col: str = "close",
                  signal_col: str = "Signal",
                  upper_col: str = "MA_Upper",
-                 lower_col: str = "MA_Lower"):
+                 lower_col: str = "MA_Lower",
+                 periods_per_year: int = 252,
+                 commission: float = 0.00015,
+                 long_only: bool = True):
         self.signal_path: Path = Path(signal_path)
         self.output_dir: Path = Path(output_dir)
         self.price_col: str = price_col
         self.signal_col: str = signal_col
         self.upper_col: str = upper_col
         self.lower_col: str = lower_col
+        self.periods_per_year: int = periods_per_year
+        self.commission: float = commission
+        self.long_only: bool = long_only
         
         self.df: Optional[pd.DataFrame] = None
         self.metrics: Dict[str, Any] = {
@@ -25,7 +41,8 @@ class StrategyAnalyzer:
             'avg_holding_days': 0.0,
             'upper_breakouts': 0,
             'lower_breakouts': 0,
-            'width_stats': {'mean':0.0, 'median':0.0, 'std':0.0}
+            'width_stats': {'mean':0.0, 'median':0.0, 'std':0.0},
+            'performance': {}
         }
 
         self._validate_signal_path()
@@ -36,12 +53,9 @@ class StrategyAnalyzer:
 
     def load_data(self) -> "StrategyAnalyzer":
         try:
-            df = pd.read_csv(
-                self.signal_path
-                # parse_dates=['date'],
-                # index_col='date',
-                # infer_datetime_format=True,
-                # dayfirst=True
+            df = load_csv(
+                self.signal_path,
+                usecols=[self.price_col, self.signal_col, self.upper_col, self.lower_col]
             )
             
             if not isinstance(df, pd.DataFrame):
@@ -56,12 +70,7 @@ class StrategyAnalyzer:
             raise RuntimeError(f"数据加载失败: {str(e)}")
 
     def _post_process_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        return (
-            df.sort_index()
-            .assign(date=lambda x: pd.to_datetime(x.date, errors='coerce'))
-            .dropna(subset=['date'])
-            .set_index('date')
-        )
+        return df[df.index.notna()].sort_index()
 
     def _validate_required_columns(self) -> None:
         if self.df is None:
@@ -89,6 +98,7 @@ class StrategyAnalyzer:
             .fillna(0)
         )
 
+    @instrumented('data_analysis.metrics')
     def calculate_metrics(self) -> "StrategyAnalyzer":
         if self.df is None:
             return self  # 明确返回 self
@@ -110,13 +120,105 @@ class StrategyAnalyzer:
             'std': width_series.std() if not width_series.empty else 0.0
         }
 
-        signal_changes = int(signal_series.diff().abs().gt(0).sum())
-        self.metrics['total_trades'] = signal_changes // 2
+        self._calculate_performance(signal_series)
+        return self  # 支持链式调用
+
+    def _derive_position(self, signal_series: pd.Series) -> pd.Series:
+        """由K线推导持仓序列
+
+        long_only（默认）与MaStrategy的开平仓规则一致：收盘价上穿上轨开仓，
+        收盘价上穿下轨平仓（均为bt.CrossOver口径），同一根K线两者同时成立时
+        空仓则开仓、持仓则平仓；策略中的波动过滤与头寸规模不在此建模。
+        long_only=False 时按Signal状态多空持有：1做多、-1做空、0沿用上一状态。
+        """
+        if not self.long_only:
+            events = signal_series.replace(0, np.nan).ffill().fillna(0)
+            return events.astype(float)
+
+        close = self.df[self.price_col].to_numpy(dtype=float)
+        enter = crossover(close, self.df[self.upper_col].to_numpy(dtype=float)) == 1
+        leave = crossover(close, self.df[self.lower_col].to_numpy(dtype=float)) == 1
+
+        # 开平仓状态机的向量化：只有开仓或只有平仓的K线直接决定之后的状态（重复信号不改变状态），
+        # 两者同时成立的K线翻转当时状态；因此每个事件后的状态 = 最近一次单一事件的取值
+        # 异或 其后“同时成立”事件个数的奇偶
+        events = np.flatnonzero(enter | leave)
+        both = enter[events] & leave[events]
+        single = ~both
+        group = np.cumsum(single)                                  # 0表示首个单一事件之前
+        base = np.concatenate([[0], enter[events][single].astype(np.int64)])[group]
+        toggles = np.cumsum(both)
+        parity = (toggles - np.concatenate([[0], toggles[single]])[group]) % 2
+        state = np.full(len(close), np.nan)
+        state[events] = base ^ parity
+        position = pd.Series(state, index=self.df.index).ffill().fillna(0.0)
+        return position
+
+    def _calculate_performance(self, signal_series: pd.Series) -> None:
+        """向量化计算收益、回撤、胜率、换手等绩效指标（无需运行backtrader）"""
+        if self.df is None:
+            return
+
+        position = self._derive_position(signal_series)
+        price_returns = self.df[self.price_col].pct_change().fillna(0.0)
+        # 收盘产生信号，次一周期起持仓生效
+        held = position.shift(1).fillna(0.0)
+        trades_turnover = position.diff().abs().fillna(position.abs())
+        strategy_returns = held * price_returns - trades_turnover * self.commission
+        equity = (1 + strategy_returns).cumprod()
+
+        self.df['Position'] = position
+        self.df['Strategy_Return'] = strategy_returns
+        self.df['Equity'] = equity
+
+        n_periods = len(strategy_returns)
+        years = n_periods / self.periods_per_year if self.periods_per_year > 0 else 0.0
+        final_equity = float(equity.iloc[-1]) if n_periods > 0 else 1.0
+        cagr = final_equity ** (1 / years) - 1 if years > 0 and final_equity > 0 else 0.0
+
+        ann_factor = np.sqrt(self.periods_per_year)
+        ret_std = strategy_returns.std()
+        downside = strategy_returns.clip(upper=0)
+        downside_std = np.sqrt((downside ** 2).mean()) if n_periods > 0 else 0.0
+        sharpe = strategy_returns.mean() / ret_std * ann_factor if ret_std > 0 else 0.0
+        sortino = strategy_returns.mean() / downside_std * ann_factor if downside_std > 0 else 0.0
+
+        # 回撤及最长水下周期
+        running_peak = equity.cummax()
+        drawdown = equity / running_peak - 1
+        underwater = drawdown < 0
+        underwater_runs = underwater.groupby((~underwater).cumsum()).sum()
+        max_dd_duration = int(underwater_runs.max()) if not underwater_runs.empty else 0
+
+        # 逐笔交易：以开仓点划分交易编号，持仓期内收益复利汇总
+        entries = position.gt(0) & position.shift(1, fill_value=0).le(0)
+        if not self.long_only:
+            entries = position.ne(0) & position.ne(position.shift(1, fill_value=0))
+        trade_id = entries.cumsum()
+        in_trade = (held.ne(0) | position.ne(0)) & trade_id.gt(0)
+        trade_returns = (
+            (1 + strategy_returns[in_trade])
+            .groupby(trade_id[in_trade])
+            .prod() - 1
+        )
+        total_trades = int(entries.sum())
+        holding_periods = int(held.ne(0).sum())
+
+        self.metrics['total_trades'] = total_trades
         self.metrics['avg_holding_days'] = (
-            len(signal_series) / self.metrics['total_trades']
-            if self.metrics['total_trades'] > 0 else 0.0
+            holding_periods / total_trades if total_trades > 0 else 0.0
         )
-        return self  # 支持链式调用
+        self.metrics['performance'] = {
+            'total_return': final_equity - 1,
+            'cagr': cagr,
+            'sharpe': float(sharpe),
+            'sortino': float(sortino),
+            'max_drawdown': float(drawdown.min()) if n_periods > 0 else 0.0,
+            'max_drawdown_duration': max_dd_duration,
+            'win_rate': float((trade_returns > 0).mean()) if not trade_returns.empty else 0.0,
+            'turnover': float(trades_turnover.sum() / years) if years > 0 else 0.0,
+            'exposure': holding_periods / n_periods if n_periods > 0 else 0.0,
+        }
 
     def generate_report(self, filename: Optional[str] = None) -> str:
         if self.df is None or not self.metrics:
@@ -127,6 +229,7 @@ class StrategyAnalyzer:
         if isinstance(self.df.index, pd.DatetimeIndex):
             start_date = self.df.index[0].strftime('%Y-%m-%d')
             end_date = self.df.index[-1].strftime('%Y-%m-%d')
+        perf = self.metrics.get('performance', {})
         
         report = f"""
         ======= 量化策略分析报告 =======
@@ -145,6 +248,16 @@ class StrategyAnalyzer:
         - 宽度均值: {self.metrics['width_stats']['mean']:.3f}
         - 宽度中位数: {self.metrics['width_stats']['median']:.3f}
         - 宽度波动率: {self.metrics['width_stats']['std']:.3f}
+        
+        4. 绩效指标
+        - 交易次数: {self.metrics['total_trades']}
+        - 累计收益: {perf.get('total_return', 0.0):.2%}
+        - 年化收益: {perf.get('cagr', 0.0):.2%}
+        - 夏普比率: {perf.get('sharpe', 0.0):.2f}
+        - 索提诺比率: {perf.get('sortino', 0.0):.2f}
+        - 最大回撤: {perf.get('max_drawdown', 0.0):.2%} (持续{perf.get('max_drawdown_duration', 0)}天)
+        - 胜率: {perf.get('win_rate', 0.0):.1%}
+        - 年化换手: {perf.get('turnover', 0.0):.2f}
         """
         
         self._save_report(report, filename)
@@ -156,8 +269,10 @@ class StrategyAnalyzer:
             final_filename = filename or f"report_{pd.Timestamp.now().strftime('%Y%m%d')}.txt"
             file_path = self.output_dir / final_filename
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            with stage('data_analysis.report') as st:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                record_file_written(st, file_path)
             print(f"报告已成功保存至: {file_path}")
         except Exception as e:
             print(f"文件保存失败: {str(e)}")
@@ -167,7 +282,8 @@ if __name__ == "__main__":
     try:
         analyzer = (
             StrategyAnalyzer(
-                signal_path="E://gzhtemp//etf_trade_v1//data//signal_Adaptive_MA_Envelope_20250311_133351.csv",
+                signal_path=default_catalog().latest('signal', symbol='159995')
+                or "E://gzhtemp//etf_trade_v1//data//signal_Adaptive_MA_Envelope_20250311_133351.csv",
                 upper_col="MA_Upper",
                 lower_col="MA_Lower"
             )
@@ -0,0 +1,59 @@
+# ==== summary_utils.py ====
+import re
+import sys
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import read_header
+from src.data_engine.run_catalog import RunCatalog
+
+# 项目内文件名中代码的位置：{symbol}_*.csv（行情）、signal_{symbol}_*.csv（daily_job）等；
+# signal_Adaptive_MA_Envelope_{日期}_{时间}.csv 一类文件名不含代码，不能从中截取6位数字
+_SYMBOL_LAYOUT = re.compile(r'^(?:(?:signal|factor|report)_)?(\d{6})(?!\d)')
+
+
+def infer_symbol(path: Union[str, Path],
+                 frame: Optional[pd.DataFrame] = None,
+                 catalog: Optional[RunCatalog] = None) -> str:
+    """确定文件对应的证券代码
+
+    依次取：数据中的symbol列 → 产物目录登记的标的 → 已知文件名格式中的代码 → 文件名
+    """
+    path = Path(path)
+    if frame is not None and 'symbol' in frame.columns and not frame.empty:
+        return str(frame['symbol'].iloc[0])
+    if frame is None and path.exists() and 'symbol' in read_header(path):
+        first = pd.read_csv(path, usecols=['symbol'], dtype={'symbol': 'str'}, nrows=1)
+        if not first.empty and pd.notna(first['symbol'].iloc[0]):
+            return str(first['symbol'].iloc[0])
+    if catalog is not None:
+        record = catalog.lookup(path)
+        if record and record['symbol']:
+            return record['symbol']
+    match = _SYMBOL_LAYOUT.match(path.stem)
+    return match.group(1) if match else path.stem
+
+
+def envelope_params(path: Union[str, Path], catalog: Optional[RunCatalog]) -> Dict[str, Any]:
+    """产物目录中登记的包络参数，展开为 param_* 列；未登记的文件返回空字典"""
+    record = catalog.lookup(path) if catalog is not None else None
+    if not record:
+        return {}
+    params = record['params']
+    return flatten_metrics(params.get('envelope', params), prefix='param_')
+
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """将嵌套指标字典展开为单层列"""
+    flat: Dict[str, Any] = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, prefix=f"{name}_"))
+        else:
+            flat[name] = value.item() if hasattr(value, 'item') else value
+    return flat
@@ -0,0 +1,206 @@
+# ==== adjustment.py ====
+import sys
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+from src.instrumentation.stage_monitor import stage
+
+PRICE_COLS = ['open', 'high', 'low', 'close']
+ADJUST_MODES = ('hfq', 'qfq', None)
+
+
+def derive_factors(raw_df: pd.DataFrame,
+                   hfq_df: pd.DataFrame,
+                   tolerance: float = 1e-4,
+                   last_factor: Optional[float] = None,
+                   tick: float = 0.001) -> pd.DataFrame:
+    """由同期未复权/后复权行情反推后复权因子，仅保留因子发生变化的日期
+
+    逐日与前一交易日的比值比较（而非与上次记录的因子比较），小额分红不会被累积后记到错误日期。
+    判定阈值取 tolerance 与价格精度下限中的较大者：两边价格都按tick四舍五入，
+    单日比值的最大舍入误差约为 0.5·tick·(1/未复权价 + 1/后复权价)，相邻两日误差相加。
+
+    Args:
+        raw_df (DataFrame): 未复权行情，日期索引
+        hfq_df (DataFrame): 后复权行情，日期索引
+        tolerance (float): 最小相对变化阈值
+        last_factor (float): 已存储的最新因子，增量追加时作为首日的比较基准
+        tick (float): 报价精度，ETF为0.001元
+    Returns:
+        DataFrame: 列[hfq_factor]，日期索引
+    """
+    common = raw_df.index.intersection(hfq_df.index)
+    raw = raw_df.loc[common, PRICE_COLS].to_numpy(dtype=float)
+    hfq = hfq_df.loc[common, PRICE_COLS].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.nanmean(hfq / raw, axis=1)
+        noise = np.nanmean(0.5 * tick * (1 / raw + 1 / hfq), axis=1)
+
+    dates, values = [], []
+    prev_ratio, prev_noise = last_factor, 0.0
+    for dt, r, eps in zip(common, ratio, noise):
+        if not np.isfinite(r):
+            continue
+        if prev_ratio is None or abs(r / prev_ratio - 1) > max(tolerance, eps + prev_noise):
+            dates.append(dt)
+            values.append(r)
+        prev_ratio, prev_noise = r, eps
+    return pd.DataFrame({'hfq_factor': values}, index=pd.DatetimeIndex(dates, name='date'))
+
+
+def apply_adjustment(raw_df: pd.DataFrame,
+                     factors: pd.DataFrame,
+                     adjust: Optional[str] = 'hfq') -> pd.DataFrame:
+    """按因子表对未复权行情做向量化复权
+
+    hfq: 价格 × 当日因子；qfq: 价格 × 当日因子 / 最新因子；None: 原样返回
+    """
+    if adjust not in ADJUST_MODES:
+        raise ValueError(f"不支持的复权方式: {adjust}，可选: {ADJUST_MODES}")
+    if adjust is None or factors.empty:
+        return raw_df.copy()
+
+    factor_dates = factors.index.to_numpy()
+    factor_values = factors['hfq_factor'].to_numpy(dtype=float)
+    # 每根K线取其日期之前（含）最近一次的因子
+    pos = np.searchsorted(factor_dates, raw_df.index.to_numpy(), side='right') - 1
+    daily_factor = np.where(pos >= 0, factor_values[np.clip(pos, 0, None)], factor_values[0])
+    if adjust == 'qfq':
+        daily_factor = daily_factor / factor_values[-1]
+
+    out = raw_df.copy()
+    cols = [c for c in PRICE_COLS if c in out.columns]
+    out[cols] = out[cols].to_numpy(dtype=float) * daily_factor[:, None]
+    return out
+
+
+class AdjustmentStore:
+    """未复权行情 + 复权因子存储，读取时按需计算后复权/前复权
+
+    目录结构：
+        <root>/raw/<symbol>.csv       未复权日线（仅追加）
+        <root>/factors/<symbol>.csv   后复权因子变化点（仅追加）
+    后复权因子以上市首日为基准，历史值不随新的分红变化，因此两张表都只需追加；
+    前复权在读取时用最新因子归一化得到。
+    """
+
+    def __init__(self, root: Union[str, Path, None] = None, tolerance: float = 1e-4):
+        if root is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            root = os.path.join(project_root, 'data', 'store')
+        self.root = Path(root)
+        self.tolerance = tolerance
+        (self.root / 'raw').mkdir(parents=True, exist_ok=True)
+        (self.root / 'factors').mkdir(parents=True, exist_ok=True)
+
+    def _raw_path(self, symbol: str) -> Path:
+        return self.root / 'raw' / f'{symbol}.csv'
+
+    def _factor_path(self, symbol: str) -> Path:
+        return self.root / 'factors' / f'{symbol}.csv'
+
+    def _load_factors(self, symbol: str) -> pd.DataFrame:
+        path = self._factor_path(symbol)
+        if not path.exists():
+            return pd.DataFrame({'hfq_factor': []}, index=pd.DatetimeIndex([], name='date'))
+        return load_csv(path, dtypes={'hfq_factor': 'float64'})
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        """已存储的最后一根K线日期，读取文件末行即可"""
+        path = self._raw_path(symbol)
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            block = 4096
+            while True:
+                start = max(size - block, 0)
+                f.seek(start)
+                lines = [line for line in f.read(size - start).splitlines() if line.strip()]
+                if start == 0:
+                    lines = lines[1:]  # 读到文件开头时首行为表头
+                    break
+                if len(lines) >= 2:  # 首行可能不完整，末行必然完整
+                    break
+                block *= 2
+        if not lines:
+            return None  # 只有表头或空文件
+        return pd.Timestamp(lines[-1].decode('utf-8').split(',')[0])
+
+    def append(self, symbol: str, raw_df: pd.DataFrame, hfq_df: pd.DataFrame) -> int:
+        """追加新行情及因子，已存储日期之前的数据会被忽略，返回新增K线数"""
+        last = self.last_date(symbol)
+        if last is not None:
+            raw_df = raw_df[raw_df.index > last]
+            hfq_df = hfq_df[hfq_df.index > last]
+        if raw_df.empty:
+            return 0
+
+        with stage('data_engine.adjust_append', symbol=symbol) as st:
+            stored = self._load_factors(symbol)
+            last_factor = float(stored['hfq_factor'].iloc[-1]) if not stored.empty else None
+            new_factors = derive_factors(raw_df, hfq_df, self.tolerance, last_factor)
+
+            raw_path = self._raw_path(symbol)
+            raw_df.sort_index().to_csv(raw_path, mode='a', header=not raw_path.exists())
+            if not new_factors.empty:
+                factor_path = self._factor_path(symbol)
+                new_factors.to_csv(factor_path, mode='a', header=not factor_path.exists())
+            st.add_rows(len(raw_df))
+        return len(raw_df)
+
+    def load(self, symbol: str,
+             adjust: Optional[str] = 'hfq',
+             start_date=None,
+             end_date=None) -> pd.DataFrame:
+        """读取并复权
+
+        Args:
+            symbol (str): 证券代码
+            adjust (str): 'hfq' 后复权 / 'qfq' 前复权 / None 不复权
+            start_date, end_date: 可选日期区间
+        """
+        path = self._raw_path(symbol)
+        if not path.exists():
+            raise FileNotFoundError(f"未找到 {symbol} 的原始行情: {path}")
+        raw_df = load_csv(path)
+        if start_date is not None or end_date is not None:
+            raw_df = raw_df.loc[start_date:end_date]
+        return apply_adjustment(raw_df, self._load_factors(symbol), adjust)
+
+    def refresh(self, symbol: str, fetcher_cls=None, start_date='19900101') -> int:
+        """增量刷新：仅拉取已存储日期之后的未复权/后复权行情
+
+        Args:
+            symbol (str): 证券代码
+            fetcher_cls: 行情获取类，默认DataFetcher
+            start_date: 尚无存储时的回补起始日期
+        """
+        last = self.last_date(symbol)
+        today = pd.Timestamp.today().normalize()
+        if last is not None and last >= today:
+            return 0
+        if fetcher_cls is None:
+            from src.data_engine.data_fetcher import DataFetcher as fetcher_cls
+        start = (last + pd.Timedelta(days=1)) if last is not None else start_date
+        raw_df = fetcher_cls(symbol, start, adjust="").fetch_etf_data(save=False)
+        hfq_df = fetcher_cls(symbol, start, adjust="hfq").fetch_etf_data(save=False)
+        added = self.append(symbol, raw_df, hfq_df)
+        print(f"{symbol} 新增 {added} 根K线")
+        return added
+
+
+# ==== 测试代码 ====
+if __name__ == "__main__":
+    store = AdjustmentStore()
+    store.refresh('159995')
+    for mode in ADJUST_MODES:
+        print(f"\n复权方式: {mode}")
+        print(store.load('159995', adjust=mode).tail(3))
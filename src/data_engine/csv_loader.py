@@ -0,0 +1,223 @@
+import io
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+import os
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow为可选依赖，缺失时退回pandas C引擎
+    pa = None
+    pa_csv = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.instrumentation.stage_monitor import stage, record_file_read
+
+# 项目内CSV的统一列类型：价格/因子为float64，信号为int8，代码保留前导零
+COLUMN_DTYPES: Dict[str, str] = {
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+    'MA_Base': 'float64',
+    'MA_Upper': 'float64',
+    'MA_Lower': 'float64',
+    'MA_UpperBand': 'float64',
+    'MA_LowerBand': 'float64',
+    'Envelope_Pct': 'float64',
+    'Band_Width': 'float64',
+    'Signal': 'int8',
+    'symbol': 'str',
+}
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def load_csv(path: Union[str, Path],
+             usecols: Optional[Iterable[str]] = None,
+             date_col: str = 'date',
+             date_format: Optional[str] = DATE_FORMAT,
+             dtypes: Optional[Dict[str, str]] = None,
+             set_index: bool = True,
+             engine: Optional[str] = None) -> pd.DataFrame:
+    """统一的类型化CSV加载入口
+
+    Args:
+        path: CSV文件路径
+        usecols: 需要读取的列（自动包含日期列），None表示全部列；
+            文件中不存在的列会被忽略，由调用方负责字段校验
+        date_col (str): 日期列名
+        date_format (str): 日期格式，默认%Y-%m-%d；与文件不符时退回ISO8601解析
+        dtypes (dict): 额外/覆盖的列类型
+        set_index (bool): 是否将日期列设为索引
+        engine (str): 'pyarrow' 或 'c'，默认pyarrow可用时使用pyarrow
+    Returns:
+        DataFrame: 日期已解析的数据框
+    """
+    if usecols is not None:
+        header = set(read_header(path))
+        usecols = [c for c in dict.fromkeys([date_col, *usecols]) if c in header]
+    dtype_map = {**COLUMN_DTYPES, **(dtypes or {})}
+    dtype_map.pop(date_col, None)
+
+    engine = engine or ('pyarrow' if pa_csv is not None else 'c')
+    with stage('io.load_csv', path=str(path), engine=engine) as st:
+        if engine == 'pyarrow':
+            df = _read_pyarrow(path, usecols, date_col, date_format, dtype_map)
+        else:
+            if usecols is not None:
+                dtype_map = {k: v for k, v in dtype_map.items() if k in usecols}
+            df = _read_c(path, usecols, dtype_map)
+            df[date_col] = parse_dates(df[date_col], date_format)
+        st.add_rows(len(df))
+        record_file_read(st, path)
+
+    if set_index:
+        df = df.set_index(date_col)
+    return df
+
+
+def _read_pyarrow(path, usecols, date_col, date_format, dtype_map) -> pd.DataFrame:
+    """pyarrow多线程解析，结果与C引擎一致
+
+    日期按字符串读入后与C引擎共用parse_dates，无法解析的置为NaT而非整体报错；
+    整数列先按float64读入，无缺失时再转回声明类型，含缺失时与C引擎一样放宽为float64。
+    """
+    column_types = {}
+    for k, v in dtype_map.items():
+        if v == 'str':
+            column_types[k] = pa.string()
+        elif np.dtype(v).kind in 'iu':
+            column_types[k] = pa.float64()
+        else:
+            column_types[k] = pa.from_numpy_dtype(np.dtype(v))
+    column_types[date_col] = pa.string()
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        include_columns=usecols,
+        strings_can_be_null=True,
+    )
+    df = pa_csv.read_csv(path, convert_options=convert_options).to_pandas()
+    df[date_col] = parse_dates(df[date_col], date_format)
+    int_cols = [k for k, v in dtype_map.items()
+                if k in df.columns and v != 'str' and np.dtype(v).kind in 'iu']
+    if int_cols and not df[int_cols].isna().any().any():
+        df = df.astype({k: dtype_map[k] for k in int_cols})
+    return df
+
+
+def _read_c(path, usecols, dtype_map, **kwargs) -> pd.DataFrame:
+    """pandas C引擎解析；整数列含缺失值时放宽为float64
+
+    path可为文件路径或bytes（无表头的CSV片段，列名经kwargs的names传入）。
+    """
+    def read(dtype):
+        source = io.BytesIO(path) if isinstance(path, bytes) else path
+        return pd.read_csv(source, usecols=usecols, dtype=dtype, **kwargs)
+
+    try:
+        return read(dtype_map)
+    except ValueError:
+        relaxed = {k: ('float64' if v.startswith('int') else v) for k, v in dtype_map.items()}
+        return read(relaxed)
+
+
+def read_rows(data: bytes,
+              names: List[str],
+              date_col: str = 'date',
+              date_format: Optional[str] = DATE_FORMAT,
+              dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """解析不含表头的CSV片段（增量读取用），列类型与日期解析规则与load_csv一致
+
+    Args:
+        data (bytes): 由完整行组成的CSV片段
+        names (list): 列名，通常来自read_header
+        date_col/date_format/dtypes: 同load_csv
+    Returns:
+        DataFrame: 日期列已解析、未设索引的数据框
+    """
+    dtype_map = {k: v for k, v in {**COLUMN_DTYPES, **(dtypes or {})}.items()
+                 if k in names and k != date_col}
+    df = _read_c(data, None, dtype_map, header=None, names=names)
+    df[date_col] = parse_dates(df[date_col], date_format)
+    return df
+
+
+def read_header(path: Union[str, Path]) -> List[str]:
+    """仅读取表头行"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return [c.strip().strip('"') for c in f.readline().rstrip('\r\n').split(',')]
+
+
+def parse_dates(values: pd.Series, date_format: Optional[str] = DATE_FORMAT) -> pd.Series:
+    """按固定格式解析日期，格式不符时退回ISO8601，仍无法解析的置为NaT"""
+    if date_format is not None:
+        try:
+            return pd.to_datetime(values, format=date_format)
+        except (ValueError, TypeError):
+            pass
+    try:
+        return pd.to_datetime(values, format='ISO8601')
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, errors='coerce')
+
+
+# ==== 基准测试：对比各模块原有读取方式 ====
+def _make_benchmark_file(path: Path, n_symbols: int, years: int) -> None:
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2010-01-01', periods=252 * years)
+    frames = []
+    for i in range(n_symbols):
+        close = 3 * np.exp(np.cumsum(rng.normal(0, 0.015, len(dates))))
+        frames.append(pd.DataFrame({
+            'date': dates.strftime(DATE_FORMAT),
+            'close': close,
+            'MA_Base': close * 0.99,
+            'Envelope_Pct': 0.03,
+            'MA_Upper': close * 1.02,
+            'MA_Lower': close * 0.96,
+            'Signal': rng.integers(-1, 2, len(dates)),
+            'symbol': f'{510000 + i:06d}',
+        }))
+    pd.concat(frames).to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    bench_path = Path('bench_signal.csv')
+    _make_benchmark_file(bench_path, n_symbols=50, years=10)
+    print(f"基准文件: {bench_path} ({bench_path.stat().st_size / 1e6:.1f} MB)")
+
+    def legacy_strategy_analyzer():
+        df = pd.read_csv(bench_path)
+        return df.assign(date=lambda x: pd.to_datetime(x.date, errors='coerce')).set_index('date')
+
+    def legacy_signal_generator():
+        return pd.read_csv(bench_path, parse_dates=['date'], index_col='date')
+
+    def legacy_backtest():
+        df = pd.read_csv(bench_path)
+        df['date'] = pd.to_datetime(df['date'].astype(str), format='%Y-%m-%d')
+        return df.set_index('date')
+
+    cases = {
+        'StrategyAnalyzer(原)': legacy_strategy_analyzer,
+        'SignalGenerator/ChannelVisualizer(原)': legacy_signal_generator,
+        'run_backtest(原)': legacy_backtest,
+        'load_csv(全部列)': lambda: load_csv(bench_path),
+        'load_csv(投影列)': lambda: load_csv(bench_path, usecols=['close', 'MA_Upper', 'MA_Lower', 'Signal']),
+        'load_csv(C引擎)': lambda: load_csv(bench_path, engine='c'),
+    }
+    for name, func in cases.items():
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<40s} 最优 {min(timings) * 1000:8.1f} ms")
+    bench_path.unlink()
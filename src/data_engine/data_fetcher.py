@@ -5,48 +5,133 @@ import sys
 import os
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.instrumentation.stage_monitor import stage, record_file_written
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.run_catalog import RunCatalog, default_catalog
+
+# akshare分钟线接口支持的周期（分钟）
+MINUTE_PERIODS = ('1', '5', '15', '30', '60')
+
 class DataFetcher:
     """统一数据获取引擎"""
     
-    def __init__(self, symbol, start_date, end_date=None):
+    def __init__(self, symbol, start_date, end_date=None, period="daily", adjust="hfq"):
+        """
+        Args:
+            symbol (str): 6位证券代码
+            start_date: 起始日期
+            end_date: 结束日期（含当日全部分钟线），默认今天
+            period (str): 'daily' 或分钟周期 '1'/'5'/'15'/'30'/'60'
+            adjust (str): 'hfq' 后复权(默认) / 'qfq' 前复权 / '' 不复权
+        """
+        if period != "daily" and period not in MINUTE_PERIODS:
+            raise ValueError(f"不支持的周期: {period}")
         self.symbol = symbol
+        self.period = period
+        self.adjust = adjust
         self.start_date = pd.to_datetime(start_date)
         self.end_date = pd.to_datetime(end_date or datetime.today().strftime('%Y%m%d'))
         print(f"证券代码====,{self.symbol}")
 
-    def fetch_etf_data(self):
-        """获取ETF行情数据"""
-        try:
-            raw_df = ak.fund_etf_hist_em(
+    @property
+    def is_intraday(self):
+        return self.period in MINUTE_PERIODS
+
+    @property
+    def params(self):
+        """目录登记/查重用的请求参数"""
+        return {
+            'symbol': self.symbol,
+            'period': self.period,
+            'adjust': self.adjust,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+        }
+
+    def _load_cached(self, catalog):
+        """区间已完全收盘且请求参数相同的历史文件可直接复用"""
+        if self.end_date.normalize() >= pd.Timestamp.today().normalize():
+            return None
+        path = catalog.latest('raw', symbol=self.symbol, params=self.params)
+        if path is None:
+            return None
+        print(f"复用已下载数据: {path}")
+        return load_csv(path)
+
+    def _fetch_raw(self):
+        """按周期调用日线或分钟线接口"""
+        if not self.is_intraday:
+            return ak.fund_etf_hist_em(
                 symbol=self.symbol,
                 period="daily",
-                adjust="hfq"
+                start_date=self.start_date.strftime('%Y%m%d'),
+                end_date=self.end_date.strftime('%Y%m%d'),
+                adjust=self.adjust
             )
-            cleaned_df = self._clean_data(raw_df)
-            
-            # 新增数据保存逻辑
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(current_dir))
-            data_dir = os.path.join(project_root, 'data')
-            os.makedirs(data_dir, exist_ok=True)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_path = os.path.join(data_dir, f'{self.symbol}_{timestamp}.csv')
-            cleaned_df.to_csv(save_path)
-            print(f"数据已保存至: {save_path}")
-            
-            return cleaned_df            
-
+        # 1分钟线接口不提供复权数据
+        return ak.fund_etf_hist_min_em(
+            symbol=self.symbol,
+            start_date=self.start_date.strftime('%Y-%m-%d 09:30:00'),
+            end_date=self.end_date.strftime('%Y-%m-%d 15:00:00'),
+            period=self.period,
+            adjust="" if self.period == '1' else self.adjust
+        )
 
+    def fetch_etf_data(self, save=True, reuse=True, catalog: RunCatalog = None):
+        """获取ETF行情数据
 
+        Args:
+            save (bool): 是否写入data目录，由AdjustmentStore等调用方自行存储时关闭
+            reuse (bool): 是否复用目录中参数相同的已下载文件
+            catalog (RunCatalog): 产物目录，默认data/catalog.sqlite
+        """
+        if save:
+            catalog = catalog or default_catalog()
+            if reuse:
+                cached_df = self._load_cached(catalog)
+                if cached_df is not None:
+                    return cached_df
+        try:
+            with stage('data_engine.fetch', symbol=self.symbol) as st:
+                raw_df = self._fetch_raw()
+                st.add_rows(len(raw_df))
+            with stage('data_engine.clean', symbol=self.symbol) as st:
+                cleaned_df = self._clean_data(raw_df)
+                st.add_rows(len(cleaned_df))
         except Exception as e:
             raise ConnectionError(f"数据获取失败: {str(e)}")
+        if not save:
+            return cleaned_df
+
+        # 新增数据保存逻辑（本地写盘/登记的异常原样抛出，不归为网络错误）
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(os.path.dirname(current_dir))
+        data_dir = os.path.join(project_root, 'data')
+        os.makedirs(data_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = f'_{self.period}min' if self.is_intraday else ''
+        save_path = os.path.join(data_dir, f'{self.symbol}{suffix}_{timestamp}.csv')
+        with stage('data_engine.save', symbol=self.symbol) as st:
+            cleaned_df.to_csv(save_path)
+            st.add_rows(len(cleaned_df))
+            record_file_written(st, save_path)
+        catalog.register(
+            save_path, 'raw', symbol=self.symbol, params=self.params,
+            start_date=cleaned_df.index.min(), end_date=cleaned_df.index.max(),
+            rows=len(cleaned_df)
+        )
+        print(f"数据已保存至: {save_path}")
+
+        return cleaned_df
 
     def _clean_data(self, df):
         """数据清洗流水线"""
         return (
             df.rename(columns={
-                '日期': 'date', '开盘': 'open', '最高': 'high',
+                '日期': 'date', '时间': 'date', '开盘': 'open', '最高': 'high',
                 '最低': 'low', '收盘': 'close', '成交量': 'volume'
             })
             .pipe(lambda df: df.assign(
@@ -55,7 +140,7 @@ class DataFetcher:
                 symbol=self.symbol
             ))
             .set_index('date')
-            .loc[self.start_date:self.end_date]
+            .loc[self.start_date:self.end_date + pd.Timedelta(days=1, microseconds=-1)]
             .sort_index()
             .replace(0, np.nan)
             .dropna()  
@@ -1,4 +1,10 @@
 import pandas as pd
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.instrumentation.stage_monitor import stage
 
 class DataValidator:
     """数据质量验证引擎"""
@@ -9,11 +15,23 @@ class DataValidator:
         if not isinstance(symbol, str) or len(symbol) != 6:
             raise ValueError("标的代码必须为6位字符")
             
+    def __init__(self, calendar=None):
+        """
+        Args:
+            calendar (TradingCalendar): 交易日历，提供时检查缺失交易日
+        """
+        self.calendar = calendar
+        self.gaps = None
+
     def validate_integrity(self, df):
         """执行完整数据校验"""
-        self._check_empty(df)
-        self._check_price_logic(df)
-        self._check_adjustment(df)
+        with stage('data_engine.validate') as st:
+            self._check_empty(df)
+            st.add_rows(len(df))
+            self._check_price_logic(df)
+            self._check_adjustment(df)
+            if self.calendar is not None:
+                self._check_gaps(df)
         return True
 
     def _check_empty(self, df):
@@ -26,6 +44,13 @@ class DataValidator:
         if (df['high'] < df['low']).any():
             raise ValueError("价格数据异常：最高价低于最低价")
 
+    def _check_gaps(self, df):
+        """对照交易日历检查停牌/缺失日，仅提示不报错，缺口明细保存在self.gaps"""
+        self.gaps = self.calendar.gaps(df.index)
+        if not self.gaps.empty:
+            print(f"提示：{len(self.gaps)} 段缺失交易日，共 {self.gaps['days'].sum()} 天，"
+                  f"最长 {self.gaps['days'].max()} 天（{self.gaps.loc[self.gaps['days'].idxmax(), 'start']:%Y-%m-%d} 起）")
+
     def _check_adjustment(self, df):
         """检查复权数据有效性"""
         if df['close'].iloc[-1] < 0.1:
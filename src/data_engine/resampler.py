@@ -0,0 +1,137 @@
+# ==== resampler.py ====
+import sys
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import COLUMN_DTYPES, parse_dates
+from src.instrumentation.stage_monitor import stage, record_file_written
+
+# A股连续竞价：上午 09:30-11:30，下午 13:00-15:00，共240分钟
+MORNING_OPEN = 9 * 60 + 30
+MORNING_CLOSE = 11 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+SESSION_MINUTES = 240
+HALF_SESSION = 120
+
+# 支持的目标周期（分钟），'daily' 按交易日聚合
+RULES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '60min': 60, 'daily': SESSION_MINUTES}
+
+OHLCV_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'amount': 'sum'}
+
+
+def periods_per_year(rule: str, trading_days: int = 252) -> int:
+    """各周期的年化K线数，供StrategyAnalyzer等年化计算使用"""
+    return trading_days * SESSION_MINUTES // RULES[rule]
+
+
+def session_minute(index: pd.DatetimeIndex) -> np.ndarray:
+    """时间戳 → 当日交易分钟序号(1..240)，跨过午休；集合竞价等边界归入首尾分钟"""
+    clock = index.hour.to_numpy() * 60 + index.minute.to_numpy()
+    minute = np.where(
+        clock <= MORNING_CLOSE,
+        clock - MORNING_OPEN,
+        HALF_SESSION + clock - AFTERNOON_OPEN,
+    )
+    # 午休期间的零星成交归入上午最后一根
+    minute = np.where((clock > MORNING_CLOSE) & (clock <= AFTERNOON_OPEN), HALF_SESSION, minute)
+    return np.clip(minute, 1, SESSION_MINUTES)
+
+
+def bucket_labels(index: pd.DatetimeIndex, rule: str) -> pd.DatetimeIndex:
+    """计算每根分钟线所属的目标K线标签（右端点，如60min为10:30/11:30/14:00/15:00）"""
+    if rule not in RULES:
+        raise ValueError(f"不支持的周期: {rule}，可选: {list(RULES)}")
+    day = index.normalize()
+    if rule == 'daily':
+        return day
+
+    n = RULES[rule]
+    end_minute = -(-session_minute(index) // n) * n  # 向上取整到桶右端
+    clock = np.where(
+        end_minute <= HALF_SESSION,
+        MORNING_OPEN + end_minute,
+        AFTERNOON_OPEN + end_minute - HALF_SESSION,
+    )
+    return day + pd.to_timedelta(clock, unit='min')
+
+
+def resample_ohlcv(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """向量化重采样分钟线为 5/15/30/60分钟 或 日线
+
+    Args:
+        df (DataFrame): 以时间戳为索引，包含open/high/low/close[/volume/amount]
+        rule (str): 目标周期，见RULES
+    Returns:
+        DataFrame: 以K线右端时间为索引的OHLCV
+    """
+    if df.empty:
+        return df
+    labels = bucket_labels(pd.DatetimeIndex(df.index), rule)
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in df.columns}
+    out = df[list(agg)].groupby(labels, sort=True).agg(agg)
+    out.index.name = df.index.name or 'date'
+    if 'symbol' in df.columns:
+        out['symbol'] = df['symbol'].iloc[0]
+    return out
+
+
+def iter_resampled_chunks(path: Union[str, Path],
+                          rule: str,
+                          chunksize: int = 500_000,
+                          date_col: str = 'date') -> Iterator[pd.DataFrame]:
+    """分块读取单标的分钟线CSV并逐块重采样，内存占用与chunksize成正比
+
+    每块末尾尚未完结的目标K线会留到下一块合并，保证结果与整体重采样一致。
+    """
+    dtypes = {k: v for k, v in COLUMN_DTYPES.items() if k != 'Signal'}
+    carry: Optional[pd.DataFrame] = None
+    reader = pd.read_csv(path, chunksize=chunksize, dtype=dtypes)
+    for chunk in reader:
+        chunk[date_col] = parse_dates(chunk[date_col], '%Y-%m-%d %H:%M:%S')
+        chunk = chunk.set_index(date_col)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+
+        labels = bucket_labels(pd.DatetimeIndex(chunk.index), rule)
+        tail_mask = labels == labels[-1]
+        carry = chunk[tail_mask]
+        done = chunk[~tail_mask]
+        if not done.empty:
+            yield resample_ohlcv(done, rule)
+
+    if carry is not None and not carry.empty:
+        yield resample_ohlcv(carry, rule)
+
+
+def resample_csv(path: Union[str, Path],
+                 rule: str,
+                 out_path: Union[str, Path],
+                 chunksize: int = 500_000) -> Path:
+    """流式重采样分钟线文件并追加写出"""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with stage('data_engine.resample', rule=rule) as st:
+        header = True
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            for block in iter_resampled_chunks(path, rule, chunksize):
+                block.to_csv(f, header=header)
+                header = False
+                st.add_rows(len(block))
+        record_file_written(st, out_path)
+    print(f"重采样完成({rule}): {out_path}")
+    return out_path
+
+
+# ==== 测试代码 ====
+if __name__ == "__main__":
+    from src.benchmark.synthetic import iter_market_data
+
+    _, minute_df = next(iter_market_data(1, years=1, freq='minute'))
+    for rule in ['5min', '15min', '60min', 'daily']:
+        bars = resample_ohlcv(minute_df, rule)
+        print(f"{rule:>6s}: {len(bars):6d} 根, 首日标签: {list(bars.index[:4].strftime('%H:%M'))}")
@@ -0,0 +1,222 @@
+# ==== run_catalog.py ====
+import sys
+import os
+import json
+import sqlite3
+import hashlib
+import contextlib
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+# 流水线各环节的产物类型
+STAGES = ('raw', 'factor', 'signal')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    path        TEXT NOT NULL UNIQUE,
+    stage       TEXT NOT NULL,
+    symbol      TEXT,
+    params      TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    input_hash  TEXT,
+    start_date  TEXT,
+    end_date    TEXT,
+    rows        INTEGER,
+    created_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_lookup
+    ON artifacts (stage, symbol, params_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_input
+    ON artifacts (stage, input_hash, params_hash);
+"""
+
+
+def _default_db_path() -> Path:
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return Path(project_root) / 'data' / 'catalog.sqlite'
+
+
+def hash_params(params: Optional[Dict[str, Any]]) -> str:
+    """参数字典的规范化哈希（键排序，元组与列表等价）"""
+    canonical = json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def hash_file(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """文件内容哈希，用于判断上游输入是否变化"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """DataFrame内容哈希（含索引），用于输入来自内存而非文件的环节"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(','.join(map(str, df.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _date_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+
+class RunCatalog:
+    """本地产物目录（SQLite）
+
+    按 标的/环节/参数/输入哈希/日期区间 索引流水线写出的每个文件，
+    下游通过 latest() 索引查询取得最新产物，不再依赖硬编码的时间戳文件名；
+    find() 命中相同输入与参数的已有产物时，上游可直接复用、跳过重复计算。
+    """
+
+    def __init__(self, db_path: Union[str, Path, None] = None):
+        self.db_path = Path(db_path) if db_path is not None else _default_db_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """短连接：正常退出时提交，随后关闭，多进程写入由SQLite文件锁串行化"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def register(self,
+                 path: Union[str, Path],
+                 stage: str,
+                 symbol: Optional[str] = None,
+                 params: Optional[Dict[str, Any]] = None,
+                 input_hash: Optional[str] = None,
+                 start_date=None,
+                 end_date=None,
+                 rows: Optional[int] = None) -> int:
+        """登记产物，同一路径重复登记时覆盖原记录
+
+        Returns:
+            int: 记录id
+        """
+        if stage not in STAGES:
+            raise ValueError(f"未知环节: {stage}，可选: {STAGES}")
+        record = (
+            str(Path(path).resolve()), stage, symbol,
+            json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str),
+            hash_params(params), input_hash,
+            _date_str(start_date), _date_str(end_date), rows,
+            datetime.now().isoformat(timespec='microseconds'),
+        )
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO artifacts (path, stage, symbol, params, params_hash, input_hash,
+                                          start_date, end_date, rows, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(path) DO UPDATE SET
+                       stage=excluded.stage, symbol=excluded.symbol, params=excluded.params,
+                       params_hash=excluded.params_hash, input_hash=excluded.input_hash,
+                       start_date=excluded.start_date, end_date=excluded.end_date,
+                       rows=excluded.rows, created_at=excluded.created_at""",
+                record,
+            )
+            return conn.execute('SELECT id FROM artifacts WHERE path = ?', (record[0],)).fetchone()['id']
+
+    def _query(self, stage: str, symbol: Optional[str], params: Optional[Dict[str, Any]],
+               input_hash: Optional[str], limit: Optional[int]) -> List[sqlite3.Row]:
+        clauses, args = ['stage = ?'], [stage]
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            args.append(symbol)
+        if params is not None:
+            clauses.append('params_hash = ?')
+            args.append(hash_params(params))
+        if input_hash is not None:
+            clauses.append('input_hash = ?')
+            args.append(input_hash)
+        sql = f"SELECT * FROM artifacts WHERE {' AND '.join(clauses)} ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        with self._connect() as conn:
+            return conn.execute(sql, args).fetchall()
+
+    def find(self, stage: str,
+             symbol: Optional[str] = None,
+             params: Optional[Dict[str, Any]] = None,
+             input_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """返回最新一条匹配且文件仍存在的记录，已被删除的文件会顺带从目录中清除"""
+        stale = []
+        found = None
+        for row in self._query(stage, symbol, params, input_hash, limit=None):
+            if os.path.exists(row['path']):
+                found = dict(row)
+                found['params'] = json.loads(found['params'])
+                break
+            stale.append(row['id'])
+        if stale:
+            with self._connect() as conn:
+                conn.executemany('DELETE FROM artifacts WHERE id = ?', [(i,) for i in stale])
+        return found
+
+    def latest(self, stage: str,
+               symbol: Optional[str] = None,
+               params: Optional[Dict[str, Any]] = None,
+               input_hash: Optional[str] = None) -> Optional[str]:
+        """最新匹配产物的路径，没有时返回None"""
+        record = self.find(stage, symbol, params, input_hash)
+        return record['path'] if record else None
+
+    def lookup(self, path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """按路径查询登记记录，供下游继承上游的标的、日期区间等信息"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM artifacts WHERE path = ?', (str(Path(path).resolve()),)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record['params'] = json.loads(record['params'])
+        return record
+
+    def history(self, stage: Optional[str] = None, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按时间倒序列出产物记录"""
+        clauses, args = [], []
+        if stage is not None:
+            clauses.append('stage = ?')
+            args.append(stage)
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            args.append(symbol)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._connect() as conn:
+            rows = conn.execute(f'SELECT * FROM artifacts {where} ORDER BY created_at DESC, id DESC', args)
+            return [dict(row) for row in rows]
+
+
+_default_catalog: Optional[RunCatalog] = None
+
+
+def default_catalog() -> RunCatalog:
+    """项目默认目录 data/catalog.sqlite（惰性创建）"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = RunCatalog()
+    return _default_catalog
+
+
+# ==== 测试代码 ====
+if __name__ == "__main__":
+    catalog = default_catalog()
+    for stage in STAGES:
+        records = catalog.history(stage)
+        print(f"{stage:>6s}: {len(records)} 个产物")
+        for rec in records[:3]:
+            print(f"    {rec['symbol']} {rec['start_date']}~{rec['end_date']} {rec['path']}")
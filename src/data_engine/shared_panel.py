@@ -0,0 +1,281 @@
+# ==== shared_panel.py ====
+import sys
+import os
+import uuid
+import weakref
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Iterator, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+BACKENDS = ('shm', 'mmap')
+
+# 各字段在共享块内按64字节对齐，保证每个数组视图的起始地址对齐
+_ALIGN = 64
+_INDEX_FIELD = '__index__'
+
+
+class PanelSpec(NamedTuple):
+    """共享面板的可序列化描述，子进程只需接收它（几百字节）即可挂载整块数据"""
+    backend: str                                          # 'shm' 共享内存 / 'mmap' 内存映射文件
+    name: str                                             # 共享内存名或映射文件路径
+    nbytes: int
+    columns: Tuple[str, ...]                              # 面板列（标的）
+    fields: Tuple[Tuple[str, int, Tuple[int, ...], str], ...]  # (字段名, 偏移, 形状, dtype)
+
+
+def _open_shm(name: str) -> shared_memory.SharedMemory:
+    """挂载已有共享内存，且不登记到resource_tracker
+
+    Python 3.13以下挂载方也会登记，fork出的子进程与父进程共用同一个tracker，
+    子进程的登记/注销会干扰发布方；由发布方独自负责unlink。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _release(backend: str, name: str, creator_pid: int) -> None:
+    """删除共享块；fork出的子进程继承了发布方对象，但不能替发布方删除"""
+    if os.getpid() != creator_pid:
+        return
+    if backend == 'shm':
+        with contextlib.suppress(FileNotFoundError):
+            shm = shared_memory.SharedMemory(name=name)
+            shm.close()
+            shm.unlink()
+    else:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(name)
+
+
+# 每个进程内已挂载的面板，同一进程池worker处理多个任务时只挂载一次
+_ATTACHED: Dict[str, "SharedPanel"] = {}
+
+
+class SharedPanel:
+    """一次发布、多进程零拷贝读取的 日期 × 标的 面板
+
+    主进程把价格/因子面板写入一块共享内存（或内存映射文件），子进程只接收PanelSpec，
+    挂载后得到指向同一物理内存的只读ndarray/DataFrame视图。32个worker的参数扫描
+    只占一份数据内存，启动时也无需对每个任务pickle整张DataFrame。
+
+    生命周期：
+        发布方  with SharedPanel.publish(...) as panel: ... 退出时删除共享块；
+                未显式关闭时对象回收或解释器退出也会删除。
+        挂载方  SharedPanel.attach(spec) 只映射不删除，进程退出即释放映射。
+    """
+
+    def __init__(self, spec: PanelSpec, owner: bool):
+        self.spec = spec
+        self.owner = owner
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._mmap: Optional[np.memmap] = None
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._finalizer = None
+
+    # ==== 发布 ====
+    @classmethod
+    def publish(cls,
+                panels: Mapping[str, Union[pd.DataFrame, np.ndarray]],
+                backend: str = 'shm',
+                directory: Optional[str] = None) -> "SharedPanel":
+        """将多个同形状面板写入一块共享存储
+
+        Args:
+            panels: {字段名: 面板}；DataFrame需与第一个DataFrame的索引、列一致，
+                ndarray形状不限（如预计算的参数数组）
+            backend (str): 'shm' 使用multiprocessing共享内存；'mmap' 使用内存映射文件
+                （适合超出/dev/shm容量的数据，或需跨会话复用的场景）
+            directory (str): mmap文件目录，默认系统临时目录
+        Returns:
+            SharedPanel: 发布方对象，用 .spec 分发给子进程
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"不支持的共享方式: {backend}，可选: {BACKENDS}")
+        if not panels:
+            raise ValueError("panels 不能为空")
+
+        frames = [p for p in panels.values() if isinstance(p, pd.DataFrame)]
+        index = frames[0].index if frames else pd.DatetimeIndex([])
+        columns = tuple(map(str, frames[0].columns)) if frames else ()
+        arrays = {_INDEX_FIELD: pd.DatetimeIndex(index).as_unit('ns').asi8}
+        for field, panel in panels.items():
+            if isinstance(panel, pd.DataFrame):
+                if not panel.index.equals(index) or tuple(map(str, panel.columns)) != columns:
+                    raise ValueError(f"面板 {field} 的索引或列与其他面板不一致")
+                panel = panel.to_numpy(dtype=np.float64)
+            arrays[field] = np.asarray(panel)
+
+        layout, offset = [], 0
+        for field, arr in arrays.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            layout.append((field, offset, tuple(arr.shape), arr.dtype.str))
+            offset += arr.nbytes
+        nbytes = max(offset, 1)
+
+        token = f"etfpanel_{os.getpid()}_{uuid.uuid4().hex[:12]}"
+        if backend == 'shm':
+            shm = shared_memory.SharedMemory(name=token, create=True, size=nbytes)
+            name, buffer = shm.name, shm.buf
+        else:
+            name = os.path.join(directory or tempfile.gettempdir(), f"{token}.panel")
+            buffer = np.memmap(name, mode='w+', dtype=np.uint8, shape=(nbytes,))
+
+        spec = PanelSpec(backend, name, nbytes, columns, tuple(layout))
+        panel = cls(spec, owner=True)
+        panel._finalizer = weakref.finalize(panel, _release, backend, name, os.getpid())
+        if backend == 'shm':
+            panel._shm = shm
+        else:
+            panel._mmap = buffer
+
+        for field, offset, shape, dtype in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            view[...] = arrays[field]
+        if backend == 'mmap':
+            buffer.flush()
+        return panel
+
+    # ==== 挂载 ====
+    @classmethod
+    def attach(cls, spec: PanelSpec, cache: bool = True) -> "SharedPanel":
+        """子进程按spec挂载面板（零拷贝、只读）；cache=True时同一进程重复挂载直接复用"""
+        if cache and spec.name in _ATTACHED:
+            return _ATTACHED[spec.name]
+        panel = cls(spec, owner=False)
+        if spec.backend == 'shm':
+            panel._shm = _open_shm(spec.name)
+        else:
+            panel._mmap = np.memmap(spec.name, mode='r', dtype=np.uint8, shape=(spec.nbytes,))
+        if cache:
+            _ATTACHED[spec.name] = panel
+        return panel
+
+    # ==== 读取 ====
+    def _buffer(self):
+        if self._shm is not None:
+            return self._shm.buf
+        if self._mmap is not None:
+            return self._mmap
+        raise ValueError("共享面板已关闭")
+
+    def array(self, field: str) -> np.ndarray:
+        """字段的只读ndarray视图（不复制数据）"""
+        if field not in self._arrays:
+            for name, offset, shape, dtype in self.spec.fields:
+                if name == field:
+                    view = np.ndarray(shape, dtype=dtype, buffer=self._buffer(), offset=offset)
+                    view.flags.writeable = False
+                    self._arrays[field] = view
+                    break
+            else:
+                raise KeyError(f"共享面板中没有字段: {field}")
+        return self._arrays[field]
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(name for name, *_ in self.spec.fields if name != _INDEX_FIELD)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.array(_INDEX_FIELD).view('datetime64[ns]'), name='date')
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self.spec.columns)
+
+    def frame(self, field: str) -> pd.DataFrame:
+        """字段包装为 日期 × 标的 DataFrame，底层仍指向共享内存"""
+        return pd.DataFrame(self.array(field), index=self.index, columns=self.columns, copy=False)
+
+    def __getitem__(self, field: str) -> pd.DataFrame:
+        return self.frame(field)
+
+    # ==== 生命周期 ====
+    def close(self) -> None:
+        """解除本进程的映射；发布方同时删除共享块"""
+        self._arrays.clear()
+        _ATTACHED.pop(self.spec.name, None)
+        if self.owner and self._finalizer is not None:
+            self._finalizer()  # 先删除名字/文件，已挂载的进程仍可读到进程退出
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # 仍有外部引用的视图，映射在视图回收后自动释放
+            self._shm = None
+        self._mmap = None
+
+    def __enter__(self) -> "SharedPanel":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        role = 'owner' if self.owner else 'attached'
+        return (f"SharedPanel({self.spec.backend}, {role}, {len(self.spec.columns)} 列, "
+                f"字段 {list(self.fields)}, {self.spec.nbytes / 1e6:.1f} MB)")
+
+
+@contextlib.contextmanager
+def shared_panels(panels: Mapping[str, Union[pd.DataFrame, np.ndarray]],
+                  backend: str = 'shm',
+                  directory: Optional[str] = None) -> Iterator[PanelSpec]:
+    """发布面板并只交出spec，with块结束（含异常）时删除共享块"""
+    with SharedPanel.publish(panels, backend=backend, directory=directory) as panel:
+        yield panel.spec
+
+
+def attached_frames(spec: PanelSpec, fields: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+    """子进程任务入口的便捷写法：挂载并返回 {字段: DataFrame视图}"""
+    panel = SharedPanel.attach(spec)
+    return {field: panel.frame(field) for field in (fields or panel.fields)}
+
+
+# ==== 测试代码 ====
+def _column_sum_pickled(close: pd.DataFrame, start: int, stop: int) -> float:
+    return float(np.nansum(close.iloc[:, start:stop].to_numpy()))
+
+
+def _column_sum_shared(spec: PanelSpec, start: int, stop: int) -> float:
+    close = SharedPanel.attach(spec).frame('close')
+    return float(np.nansum(close.iloc[:, start:stop].to_numpy()))
+
+
+if __name__ == "__main__":
+    import time
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2010-01-01', periods=2520)
+    close = pd.DataFrame(np.cumprod(1 + rng.normal(0, 0.01, (len(dates), 3000)), axis=0),
+                         index=dates, columns=[f"{i:06d}" for i in range(3000)])
+    workers, tasks = 32, [(i, i + 100) for i in range(0, 3000, 100)]
+    print(f"面板 {close.shape}, {close.to_numpy().nbytes / 1e6:.0f} MB, {workers} 个worker, {len(tasks)} 个任务")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        expected = list(executor.map(_column_sum_pickled, [close] * len(tasks), *zip(*tasks)))
+        print(f"逐任务pickle DataFrame: {time.perf_counter() - start:.2f} s, "
+              f"每任务传输 {len(pickle.dumps(close)) / 1e6:.0f} MB")
+
+    for backend in BACKENDS:
+        with shared_panels({'close': close}, backend=backend) as spec, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            result = list(executor.map(_column_sum_shared, [spec] * len(tasks), *zip(*tasks)))
+            print(f"共享面板({backend}): {time.perf_counter() - start:.2f} s, "
+                  f"每任务传输 {len(pickle.dumps(spec)) / 1e3:.1f} KB, 结果一致: {np.allclose(result, expected)}")
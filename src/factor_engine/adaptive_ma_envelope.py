@@ -10,28 +10,57 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  #
 # 修改为绝对导入路径
 from src.data_engine.data_fetcher import DataFetcher
 from src.data_engine.data_validator import DataValidator
+from src.data_engine.csv_loader import load_csv
+from src.factor_engine.volatility import rolling_volatility
+from src.data_engine.run_catalog import default_catalog, hash_frame
+from src.instrumentation.stage_monitor import instrumented
 from datetime import datetime
 
 class AdaptiveMAEnvelope:
     """基于波动率的自适应移动平均通道"""
     
-    def __init__(self, base_window=20, vol_window=20, scale_factor=2.0, clip_range=(0.01, 0.05)):
+    def __init__(self, base_window=20, vol_window=20, scale_factor=2.0, clip_range=(0.01, 0.05),
+                 vol_estimator='std'):
         """
         Args:
             base_window (int): 基础移动平均窗口，默认20天
             vol_window (int): 波动率计算窗口，默认20天
             scale_factor (float): 波动率缩放系数，默认2.0
             clip_range (tuple): 包络百分比限制范围，默认(1%,5%)
+            vol_estimator (str): 波动率估计器 'std'(默认)/'ewma'/'atr'/'parkinson'/'garman_klass'，
+                区间类估计器需要high/low[/open]列，可用更短的vol_window达到同等精度
         """
         self.base_window = base_window
         self.vol_window = vol_window
         self.scale_factor = scale_factor
         self.clip_min, self.clip_max = clip_range
+        self.vol_estimator = vol_estimator
+
+    @property
+    def params(self):
+        """通道参数，用于产物目录登记与查重"""
+        return {
+            'base_window': self.base_window,
+            'vol_window': self.vol_window,
+            'scale_factor': self.scale_factor,
+            'clip_range': [self.clip_min, self.clip_max],
+            'vol_estimator': self.vol_estimator,
+        }
+
+    def save(self, result_df, save_path, symbol=None, input_hash=None, catalog=None):
+        """写出通道结果并登记到产物目录"""
+        result_df.to_csv(save_path)
+        (catalog or default_catalog()).register(
+            save_path, 'factor', symbol=symbol, params=self.params, input_hash=input_hash,
+            start_date=result_df.index.min(), end_date=result_df.index.max(), rows=len(result_df)
+        )
+        return save_path
         
+    @instrumented('factor_engine.adaptive_envelope')
     def compute(self, df):
         """执行自适应通道计算
         Args:
-            df (DataFrame): 必须包含close价格列
+            df (DataFrame): 必须包含close价格列，区间类估计器另需high/low[/open]
         Returns:
             DataFrame: 新增列[MA_Base, MA_Upper, MA_Lower, Envelope_Pct]
         """
@@ -51,11 +80,8 @@ class AdaptiveMAEnvelope:
 
     def _calculate_adaptive_pct(self, df):
         """核心波动率计算逻辑"""
-        # 计算日收益率
-        returns = df['close'].pct_change()
-        
-        # 计算波动率(滚动标准差)
-        volatility = returns.rolling(self.vol_window).std()
+        # 计算波动率（默认为日收益率滚动标准差）
+        volatility = rolling_volatility(df, self.vol_estimator, self.vol_window)
         
         # 波动率缩放与归一化
         envelope_pct = volatility * self.scale_factor
@@ -87,18 +113,27 @@ if __name__ == "__main__":
         clip_range=(0.025, 0.12)  # 科创50ETF适用较宽范围
     )
     
-    # 执行计算
-    result_df = adapter.compute(test_df)
-    
-    # 修正路径设置（原错误行）
-    current_dir = os.path.dirname(os.path.abspath(__file__))  # 当前文件所在目录
-    project_root = os.path.dirname(os.path.dirname(current_dir))  # 上两级目录（src/factor_engine → src → 项目根目录）
-    log_dir = os.path.join(project_root, 'logs')  # 正确拼接路径
-    os.makedirs(log_dir, exist_ok=True)  # 自动创建目录
+    # 输入与参数未变化时复用已有结果，跳过重复计算
+    catalog = default_catalog()
+    input_hash = hash_frame(test_df)
+    cached_path = catalog.latest('factor', symbol=fetcher.symbol, params=adapter.params, input_hash=input_hash)
+
+    if cached_path:
+        print(f"输入与参数未变化，复用已有结果: {cached_path}")
+        result_df = load_csv(cached_path)
+    else:
+        # 执行计算
+        result_df = adapter.compute(test_df)
+        
+        # 修正路径设置（原错误行）
+        current_dir = os.path.dirname(os.path.abspath(__file__))  # 当前文件所在目录
+        project_root = os.path.dirname(os.path.dirname(current_dir))  # 上两级目录（src/factor_engine → src → 项目根目录）
+        log_dir = os.path.join(project_root, 'logs')  # 正确拼接路径
+        os.makedirs(log_dir, exist_ok=True)  # 自动创建目录
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    save_path = os.path.join(log_dir, f'Adaptive_MA_Envelope_{timestamp}.csv')
-    result_df.to_csv(save_path)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        save_path = os.path.join(log_dir, f'Adaptive_MA_Envelope_{timestamp}.csv')
+        adapter.save(result_df, save_path, symbol=fetcher.symbol, input_hash=input_hash, catalog=catalog)
     
     # 结果分析
     print("波动率自适应通道统计摘要：")
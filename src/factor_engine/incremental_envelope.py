@@ -0,0 +1,74 @@
+# ==== incremental_envelope.py ====
+import math
+from typing import NamedTuple, Optional
+
+from src.factor_engine.volatility import RollingWindow, make_estimator
+
+
+class EnvelopeState(NamedTuple):
+    """单根K线更新后的通道状态"""
+    close: float
+    ma_base: float
+    envelope_pct: float
+    ma_upper: float
+    ma_lower: float
+    signal: int          # 1: 收盘在上轨之上, -1: 收盘在下轨之下, 0: 通道内
+    cross_up: bool       # 收盘上穿上轨（MaStrategy的买入条件）
+    cross_down: bool     # 收盘下穿下轨
+    cross_up_lower: bool  # 收盘自下而上穿回下轨（MaStrategy的平仓条件）
+
+
+class IncrementalEnvelope:
+    """AdaptiveMAEnvelope的逐K线增量版本，结果与批量compute()一致"""
+
+    def __init__(self, base_window=20, vol_window=20, scale_factor=2.0, clip_range=(0.01, 0.05),
+                 vol_estimator='std'):
+        """
+        Args:
+            base_window (int): 基础移动平均窗口，默认20
+            vol_window (int): 波动率计算窗口，默认20
+            scale_factor (float): 波动率缩放系数，默认2.0
+            clip_range (tuple): 包络百分比限制范围，默认(1%,5%)
+            vol_estimator (str): 波动率估计器，见volatility.ESTIMATORS，默认'std'
+        """
+        self.scale_factor = scale_factor
+        self.clip_min, self.clip_max = clip_range
+        self._closes = RollingWindow(base_window)
+        self._volatility = make_estimator(vol_estimator, vol_window)
+        self._last_state: Optional[EnvelopeState] = None
+        # 收盘价与上/下轨最近一次非零差值，与bt.CrossOver一样，两线相等的K线沿用之前的相对位置
+        self._last_diff_upper: Optional[float] = None
+        self._last_diff_lower: Optional[float] = None
+
+    @property
+    def last(self) -> Optional[EnvelopeState]:
+        return self._last_state
+
+    def update(self, close: float, high: Optional[float] = None,
+               low: Optional[float] = None, open: Optional[float] = None) -> Optional[EnvelopeState]:
+        """输入最新K线（区间类估计器需要high/low[/open]），窗口预热完成前返回None"""
+        vol = self._volatility.update(close, high, low, open)
+        self._closes.push(close)
+
+        if not self._closes.full or math.isnan(vol):
+            return None
+
+        ma_base = self._closes.mean()
+        pct = min(max(vol * self.scale_factor, self.clip_min), self.clip_max)
+        upper = ma_base * (1 + pct)
+        lower = ma_base * (1 - pct)
+        signal = 1 if close > upper else (-1 if close < lower else 0)
+
+        diff_upper, diff_lower = close - upper, close - lower
+        last_upper, last_lower = self._last_diff_upper, self._last_diff_lower
+        cross_up = last_upper is not None and last_upper < 0 < diff_upper
+        cross_down = last_lower is not None and last_lower > 0 > diff_lower
+        cross_up_lower = last_lower is not None and last_lower < 0 < diff_lower
+        if diff_upper != 0:
+            self._last_diff_upper = diff_upper
+        if diff_lower != 0:
+            self._last_diff_lower = diff_lower
+
+        self._last_state = EnvelopeState(close, ma_base, pct, upper, lower, signal,
+                                         cross_up, cross_down, cross_up_lower)
+        return self._last_state
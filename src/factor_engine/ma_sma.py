@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  #
 # 修改为绝对导入路径
 from src.data_engine.data_fetcher import DataFetcher
 from src.data_engine.data_validator import DataValidator
+from src.instrumentation.stage_monitor import instrumented
 
 class MA_SMA:
     """移动平均通道指标计算器"""
@@ -21,6 +22,7 @@ class MA_SMA:
         self.window = window
         self.band_pct = band_pct
         
+    @instrumented('factor_engine.ma_sma')
     def compute(self, df):
         """执行指标计算
         Args:
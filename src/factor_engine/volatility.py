@@ -0,0 +1,291 @@
+# ==== volatility.py ====
+import math
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+# 可选波动率估计器：
+#   std          收盘收益率滚动标准差（原有口径）
+#   ewma         收益率平方的指数加权均值开方（RiskMetrics），span=window
+#   atr          平均真实波幅 / 收盘价（波幅口径，数值约为收益率标准差的1.2~1.6倍）
+#   parkinson    基于最高/最低价的Parkinson估计
+#   garman_klass 基于开高低收的Garman-Klass估计
+ESTIMATORS = ('std', 'ewma', 'atr', 'parkinson', 'garman_klass')
+
+REQUIRED_COLUMNS = {
+    'std': ('close',),
+    'ewma': ('close',),
+    'atr': ('high', 'low', 'close'),
+    'parkinson': ('high', 'low'),
+    'garman_klass': ('open', 'high', 'low', 'close'),
+}
+
+_LN2 = math.log(2.0)
+_GK_COEF = 2 * _LN2 - 1
+
+
+class RollingWindow:
+    """定长环形缓冲区，维护窗口内的和与平方和，O(1)更新
+
+    缺失值（NaN/inf）不计入累加量，只计数：窗口内有缺失值时mean/std为NaN，
+    缺失值移出窗口后自动恢复，与pandas rolling(window)默认min_periods=window的口径一致。
+    """
+
+    __slots__ = ('size', 'buffer', 'count', 'pos', 'total', 'total_sq', 'missing', '_updates')
+
+    # 累加量漂移控制：每隔该次数用缓冲区重算一次
+    RESYNC_INTERVAL = 1000
+
+    def __init__(self, size: int):
+        self.size = size
+        self.buffer = [0.0] * size
+        self.count = 0
+        self.pos = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.missing = 0
+        self._updates = 0
+
+    def push(self, value: float) -> None:
+        resync = False
+        if self.count == self.size:
+            old = self.buffer[self.pos]
+            if math.isfinite(old):
+                self.total -= old
+                self.total_sq -= old * old
+            else:
+                self.missing -= 1
+                resync = self.missing == 0  # 最后一个缺失值移出窗口，重算以消除此前的累积误差
+        else:
+            self.count += 1
+        self.buffer[self.pos] = value
+        if math.isfinite(value):
+            self.total += value
+            self.total_sq += value * value
+        else:
+            self.missing += 1
+        self.pos = (self.pos + 1) % self.size
+
+        self._updates += 1
+        if resync or self._updates >= self.RESYNC_INTERVAL:
+            self._resync()
+
+    def _resync(self) -> None:
+        window = [v for v in self.buffer[:self.count] if math.isfinite(v)]
+        self.total = math.fsum(window)
+        self.total_sq = math.fsum(v * v for v in window)
+        self._updates = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def mean(self) -> float:
+        if self.missing:
+            return math.nan
+        return self.total / self.count
+
+    def std(self) -> float:
+        """样本标准差(ddof=1)，与pandas rolling().std()一致"""
+        n = self.count
+        if n < 2 or self.missing:
+            return math.nan
+        var = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+def _check_estimator(estimator: str) -> None:
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"不支持的波动率估计器: {estimator}，可选: {ESTIMATORS}")
+
+
+def warmup_bars(estimator: str, window: int) -> int:
+    """得到第一个有效波动率所需的K线数；区间类估计器不依赖前收盘，少一根"""
+    _check_estimator(estimator)
+    return window + 1 if estimator in ('std', 'ewma') else window
+
+
+def rolling_volatility(df: pd.DataFrame, estimator: str = 'std', window: int = 20) -> pd.Series:
+    """向量化计算单根K线波动率序列（与增量版本逐点一致，含缺失K线：
+    滚动类估计器在缺失值移出窗口后恢复，ewma跳过缺失收益率并按间隔衰减权重）
+
+    Args:
+        df (DataFrame): 行情数据，列要求见REQUIRED_COLUMNS
+        estimator (str): 估计器名称，见ESTIMATORS
+        window (int): 窗口长度（ewma为span）
+    Returns:
+        Series: 波动率，预热期为NaN
+    """
+    _check_estimator(estimator)
+    missing = [col for col in REQUIRED_COLUMNS[estimator] if col not in df.columns]
+    if missing:
+        raise ValueError(f"波动率估计器 {estimator} 缺失必要字段: {missing}")
+
+    if estimator == 'std':
+        return df['close'].pct_change().rolling(window).std()
+    if estimator == 'ewma':
+        returns = df['close'].pct_change()
+        alpha = 2.0 / (window + 1)
+        return np.sqrt((returns ** 2).ewm(alpha=alpha, adjust=False, min_periods=window).mean())
+    if estimator == 'atr':
+        prev_close = df['close'].shift()
+        true_range = pd.concat([
+            df['high'] - df['low'],
+            (df['high'] - prev_close).abs(),
+            (df['low'] - prev_close).abs(),
+        ], axis=1).max(axis=1)
+        return true_range.rolling(window).mean() / df['close']
+
+    log_hl = np.log(df['high'] / df['low'])
+    if estimator == 'parkinson':
+        return np.sqrt((log_hl ** 2).rolling(window).mean() / (4 * _LN2))
+    log_co = np.log(df['close'] / df['open'])
+    gk_var = (0.5 * log_hl ** 2 - _GK_COEF * log_co ** 2).rolling(window).mean()
+    return np.sqrt(gk_var.clip(lower=0))
+
+
+class VolatilityEstimator:
+    """逐K线O(1)更新的波动率估计器基类，预热完成前返回NaN"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._last_close: Optional[float] = None
+
+    def update(self, close: float, high: Optional[float] = None,
+               low: Optional[float] = None, open: Optional[float] = None) -> float:
+        raise NotImplementedError
+
+
+class StdEstimator(VolatilityEstimator):
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._returns = RollingWindow(window)
+
+    def update(self, close, high=None, low=None, open=None):
+        if self._last_close is not None:
+            self._returns.push(close / self._last_close - 1)
+        self._last_close = close
+        return self._returns.std() if self._returns.full else math.nan
+
+
+class EwmaEstimator(VolatilityEstimator):
+    """与pandas ewm(adjust=False, ignore_na=False)相同的递推：缺失收益率不更新方差，
+    只让旧估计的权重继续衰减，下一个有效收益率按两者权重归一化合并"""
+
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._alpha = 2.0 / (window + 1)
+        self._var: Optional[float] = None
+        self._old_weight = 1.0
+        self._count = 0
+
+    def update(self, close, high=None, low=None, open=None):
+        if self._last_close is not None:
+            r2 = (close / self._last_close - 1) ** 2
+            if not math.isfinite(r2):
+                if self._var is not None:
+                    self._old_weight *= 1 - self._alpha
+            elif self._var is None:
+                self._var = r2
+                self._count += 1
+            else:
+                self._old_weight *= 1 - self._alpha
+                self._var = (self._old_weight * self._var + self._alpha * r2) / (self._old_weight + self._alpha)
+                self._old_weight = 1.0
+                self._count += 1
+        self._last_close = close
+        return math.sqrt(self._var) if self._count >= self.window else math.nan
+
+
+class _RangeEstimator(VolatilityEstimator):
+    """区间类估计器：对每根K线的单点方差项做滚动平均"""
+
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._terms = RollingWindow(window)
+
+    def _term(self, close, high, low, open) -> float:
+        raise NotImplementedError
+
+    def _finish(self, mean: float, close: float) -> float:
+        raise NotImplementedError
+
+    def update(self, close, high=None, low=None, open=None):
+        if high is None or low is None:
+            raise ValueError(f"{type(self).__name__} 需要最高价/最低价")
+        self._terms.push(self._term(close, high, low, open))
+        self._last_close = close
+        return self._finish(self._terms.mean(), close) if self._terms.full else math.nan
+
+
+class AtrEstimator(_RangeEstimator):
+    def _term(self, close, high, low, open):
+        if self._last_close is None:
+            return high - low
+        return max(high - low, abs(high - self._last_close), abs(low - self._last_close))
+
+    def _finish(self, mean, close):
+        return mean / close
+
+
+class ParkinsonEstimator(_RangeEstimator):
+    def _term(self, close, high, low, open):
+        return math.log(high / low) ** 2
+
+    def _finish(self, mean, close):
+        return math.sqrt(mean / (4 * _LN2))
+
+
+class GarmanKlassEstimator(_RangeEstimator):
+    def _term(self, close, high, low, open):
+        if open is None:
+            raise ValueError("GarmanKlassEstimator 需要开盘价")
+        return 0.5 * math.log(high / low) ** 2 - _GK_COEF * math.log(close / open) ** 2
+
+    def _finish(self, mean, close):
+        if math.isnan(mean):
+            return math.nan
+        return math.sqrt(mean) if mean > 0 else 0.0
+
+
+_ESTIMATOR_CLASSES = {
+    'std': StdEstimator,
+    'ewma': EwmaEstimator,
+    'atr': AtrEstimator,
+    'parkinson': ParkinsonEstimator,
+    'garman_klass': GarmanKlassEstimator,
+}
+
+
+def make_estimator(estimator: str = 'std', window: int = 20) -> VolatilityEstimator:
+    """按名称创建增量估计器"""
+    _check_estimator(estimator)
+    return _ESTIMATOR_CLASSES[estimator](window)
+
+
+# ==== 测试代码 ====
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+    from src.benchmark.synthetic import iter_market_data
+
+    # 同一窗口下各估计器的均值与离散度（变异系数越小，所需窗口越短）
+    _, bars = next(iter_market_data(1, years=20))
+    for window in (5, 10, 20):
+        print(f"\nwindow={window}")
+        for name in ESTIMATORS:
+            vol = rolling_volatility(bars, name, window).dropna()
+            print(f"  {name:>12s}: 均值 {vol.mean():.4f}, 变异系数 {vol.std() / vol.mean():.2f}, "
+                  f"预热 {warmup_bars(name, window)} 根")
+
+    # 含缺失K线（停牌/断流）时增量版本与向量化版本逐点一致
+    gappy = bars.iloc[:300].copy()
+    gappy.iloc[[50, 51, 120, 200]] = np.nan
+    for name in ESTIMATORS:
+        expected = rolling_volatility(gappy, name, 5).to_numpy()
+        estimator = make_estimator(name, 5)
+        actual = np.array([estimator.update(*row) for row in
+                           gappy[['close', 'high', 'low', 'open']].itertuples(index=False)])
+        same = np.allclose(actual, expected, rtol=1e-9, atol=1e-12, equal_nan=True)
+        print(f"缺失K线 {name:>12s}: 与pandas一致 {same}")
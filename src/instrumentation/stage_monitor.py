@@ -0,0 +1,250 @@
+# ==== stage_monitor.py ====
+# 流水线阶段监控：计时、行数、读写字节、内存高水位及可选cProfile
+# 默认关闭，关闭时 stage()/instrumented 仅多一次布尔判断。开启方式：
+#   - 环境变量 ETF_TRADE_METRICS=<jsonl路径>（ETF_TRADE_PROFILE=<目录> 同时开启cProfile）
+#   - 代码中调用 enable(sink_path=..., profile_dir=..., trace_memory=...)
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows无resource模块，内存高水位退回psutil
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class _Config:
+    enabled: bool = False
+    sink: Optional["JsonLinesSink"] = None
+    records: deque = deque(maxlen=100_000)  # 长驻进程中仅保留最近的记录
+    profile_dir: Optional[Path] = None
+    trace_memory: bool = False
+
+
+_config = _Config()
+
+
+class JsonLinesSink:
+    """线程安全的JSON Lines指标输出"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def _rss_peak_mb() -> Optional[float]:
+    """进程常驻内存高水位(MB)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux单位为KB，macOS为字节
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 ** 2
+    return None
+
+
+class _NullStage:
+    """关闭状态下的空实现"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def add_rows(self, n: int) -> None:
+        pass
+
+    def add_bytes_read(self, n: int) -> None:
+        pass
+
+    def add_bytes_written(self, n: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """单次阶段执行的度量记录"""
+
+    __slots__ = ('name', 'tags', 'rows', 'bytes_read', 'bytes_written',
+                 '_start', '_cpu_start', '_profiler')
+
+    def __init__(self, name: str, tags: Dict[str, Any]):
+        self.name = name
+        self.tags = tags
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def add_rows(self, n: int) -> None:
+        self.rows += int(n)
+
+    def add_bytes_read(self, n: int) -> None:
+        self.bytes_read += int(n)
+
+    def add_bytes_written(self, n: int) -> None:
+        self.bytes_written += int(n)
+
+    def __enter__(self) -> "Stage":
+        if _config.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        if _config.profile_dir is not None:
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:  # 已有其他profiler运行（嵌套阶段），仅在最外层采样
+                self._profiler = None
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        seconds = time.perf_counter() - self._start
+        cpu_seconds = time.process_time() - self._cpu_start
+        record: Dict[str, Any] = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'stage': self.name,
+            'seconds': seconds,
+            'cpu_seconds': cpu_seconds,
+            'rows': self.rows,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'rss_peak_mb': _rss_peak_mb(),
+            'pid': os.getpid(),
+            'ok': exc_type is None,
+        }
+        if _config.trace_memory and tracemalloc.is_tracing():
+            record['heap_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        if self.tags:
+            record['tags'] = self.tags
+        if self._profiler is not None:
+            self._profiler.disable()
+            _config.profile_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            prof_path = _config.profile_dir / f"{self.name}_{os.getpid()}_{stamp}.prof"
+            self._profiler.dump_stats(prof_path)
+            record['profile'] = str(prof_path)
+
+        _config.records.append(record)
+        if _config.sink is not None:
+            _config.sink.write(record)
+
+
+def stage(name: str, **tags: Any) -> Union[Stage, _NullStage]:
+    """阶段度量上下文：with stage('factor.envelope', symbol='159995') as st: ..."""
+    if not _config.enabled:
+        return _NULL_STAGE
+    return Stage(name, tags)
+
+
+def instrumented(name: str) -> Callable:
+    """方法/函数装饰器：返回值带长度(如DataFrame)时自动记录行数"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _config.enabled:
+                return func(*args, **kwargs)
+            with Stage(name, {}) as st:
+                result = func(*args, **kwargs)
+                if hasattr(result, '__len__'):
+                    st.add_rows(len(result))
+                elif hasattr(result, 'df') and getattr(result, 'df') is not None:
+                    st.add_rows(len(result.df))
+                return result
+        return wrapper
+    return decorator
+
+
+def record_file_read(st: Union[Stage, _NullStage], path: Union[str, Path]) -> None:
+    """以文件大小记录读取字节数"""
+    if st is not _NULL_STAGE and os.path.exists(path):
+        st.add_bytes_read(os.path.getsize(path))
+
+
+def record_file_written(st: Union[Stage, _NullStage], path: Union[str, Path]) -> None:
+    """以文件大小记录写入字节数"""
+    if st is not _NULL_STAGE and os.path.exists(path):
+        st.add_bytes_written(os.path.getsize(path))
+
+
+def enable(sink_path: Union[str, Path, None] = None,
+           profile_dir: Union[str, Path, None] = None,
+           trace_memory: bool = False) -> None:
+    """开启阶段监控
+
+    Args:
+        sink_path: JSON Lines输出路径，None时仅保存在内存(records())
+        profile_dir: cProfile结果输出目录，None表示不采样
+        trace_memory (bool): 是否开启tracemalloc统计各阶段Python堆峰值（开销较大）
+    """
+    _config.enabled = True
+    _config.sink = JsonLinesSink(sink_path) if sink_path else None
+    _config.profile_dir = Path(profile_dir) if profile_dir else None
+    _config.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    _config.enabled = False
+    _config.sink = None
+    _config.profile_dir = None
+    if _config.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _config.trace_memory = False
+
+
+def is_enabled() -> bool:
+    return _config.enabled
+
+
+def records() -> List[Dict[str, Any]]:
+    """本进程已采集的阶段记录"""
+    return list(_config.records)
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """按阶段汇总：调用次数、总耗时、行数、读写字节"""
+    result: Dict[str, Dict[str, float]] = {}
+    for rec in _config.records:
+        agg = result.setdefault(rec['stage'], {
+            'calls': 0, 'seconds': 0.0, 'rows': 0, 'bytes_read': 0, 'bytes_written': 0
+        })
+        agg['calls'] += 1
+        agg['seconds'] += rec['seconds']
+        agg['rows'] += rec['rows']
+        agg['bytes_read'] += rec['bytes_read']
+        agg['bytes_written'] += rec['bytes_written']
+    return result
+
+
+# 环境变量开启：便于在不改动脚本的情况下采集现有流程
+if os.environ.get('ETF_TRADE_METRICS'):
+    enable(sink_path=os.environ['ETF_TRADE_METRICS'],
+           profile_dir=os.environ.get('ETF_TRADE_PROFILE') or None)
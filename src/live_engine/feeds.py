@@ -0,0 +1,76 @@
+# ==== feeds.py ====
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+
+
+class Bar(NamedTuple):
+    """单根K线事件"""
+    symbol: str
+    dt: pd.Timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class BarFeed:
+    """行情源接口：按时间顺序产出Bar，实盘接入时替换为推送/轮询实现"""
+
+    def __iter__(self) -> Iterator[Bar]:
+        raise NotImplementedError
+
+
+class ReplayFeed(BarFeed):
+    """本地文件回放行情源，多标的按时间戳归并后逐根推送"""
+
+    def __init__(self,
+                 files: Dict[str, Union[str, Path]],
+                 speed: float = 0.0):
+        """
+        Args:
+            files (dict): {标的代码: CSV路径}，至少包含date/close列
+            speed (float): 回放节奏，每根K线间隔的秒数，0表示不等待
+        """
+        self.files = files
+        self.speed = speed
+        self._frame = self._load()
+
+    def _load(self) -> pd.DataFrame:
+        frames = []
+        for symbol, path in self.files.items():
+            df = load_csv(path, usecols=['open', 'high', 'low', 'close', 'volume'])
+            # 仅有收盘价的信号/因子文件：其余价格以收盘价代替
+            for col in ('open', 'high', 'low'):
+                if col not in df.columns:
+                    df[col] = df['close']
+            if 'volume' not in df.columns:
+                df['volume'] = np.nan
+            frames.append(df[['open', 'high', 'low', 'close', 'volume']].assign(symbol=symbol))
+        merged = pd.concat(frames).reset_index()
+        return merged.sort_values(['date', 'symbol'], kind='stable').reset_index(drop=True)
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def __iter__(self) -> Iterator[Bar]:
+        f = self._frame
+        columns = (f['symbol'].to_numpy(), f['date'].to_numpy(),
+                   f['open'].to_numpy(dtype=float), f['high'].to_numpy(dtype=float),
+                   f['low'].to_numpy(dtype=float), f['close'].to_numpy(dtype=float),
+                   f['volume'].to_numpy(dtype=float))
+        last_dt = None
+        for symbol, dt, o, h, l, c, v in zip(*columns):
+            if self.speed and last_dt is not None and dt != last_dt:
+                time.sleep(self.speed)
+            last_dt = dt
+            yield Bar(symbol, pd.Timestamp(dt), float(o), float(h), float(l), float(c), float(v))
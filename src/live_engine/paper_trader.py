@@ -0,0 +1,164 @@
+# ==== paper_trader.py ====
+import sys
+import os
+import math
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.factor_engine.incremental_envelope import IncrementalEnvelope
+from src.live_engine.feeds import Bar, BarFeed, ReplayFeed
+from src.live_engine.sim_broker import Order, SimulatedBroker
+
+
+@dataclass
+class _SymbolState:
+    envelope: IncrementalEnvelope
+    last_price: Optional[float] = None
+
+
+class PaperTradingEngine:
+    """事件驱动模拟交易：逐K线增量更新通道与信号，按AdaptiveMAEnvelopeStrategy规则下单"""
+
+    def __init__(self,
+                 feed: BarFeed,
+                 broker: Optional[SimulatedBroker] = None,
+                 base_window: int = 20,
+                 vol_window: int = 20,
+                 scale_factor: float = 2.0,
+                 clip_range: tuple = (0.01, 0.05),
+                 vol_estimator: str = 'std',
+                 risk_per_trade: float = 0.002,
+                 max_price_change: float = 0.05,
+                 min_position: int = 100,
+                 slippage: float = 0.01,
+                 printlog: bool = False):
+        """
+        Args:
+            feed (BarFeed): 行情源
+            broker (SimulatedBroker): 模拟券商，默认1000万初始资金
+            base_window/vol_window/scale_factor/clip_range/vol_estimator: 自适应通道参数
+            risk_per_trade/max_price_change/min_position/slippage: 与AdaptiveMAEnvelopeStrategy同名参数一致
+            printlog (bool): 是否打印下单/成交日志
+        """
+        self.feed = feed
+        self.broker = broker or SimulatedBroker()
+        self.envelope_params = dict(base_window=base_window, vol_window=vol_window,
+                                    scale_factor=scale_factor, clip_range=clip_range,
+                                    vol_estimator=vol_estimator)
+        self.risk_per_trade = risk_per_trade
+        self.max_price_change = max_price_change
+        self.min_position = min_position
+        self.slippage = slippage
+        self.printlog = printlog
+
+        self.states: Dict[str, _SymbolState] = {}
+        self.latencies_ns: List[int] = []
+        self.bars_processed = 0
+
+    def log(self, bar: Bar, txt: str) -> None:
+        if self.printlog:
+            print(f'[{bar.dt.isoformat()}] {bar.symbol} {txt}')
+
+    def on_bar(self, bar: Bar) -> Optional[Order]:
+        """处理单根K线：撮合挂单 → 更新通道 → 生成委托"""
+        for order in self.broker.on_bar(bar):
+            if order.status == 'rejected':
+                self.log(bar, f"资金不足，委托被拒绝: 买入 {order.size}股 @ 限价{order.limit_price:.3f}")
+                continue
+            self.log(bar, f"{'买入' if order.side == 'buy' else '卖出'}成交: "
+                          f"{order.size}股 @ {order.fill_price:.3f}, 手续费: {order.commission:.2f}")
+
+        state = self.states.get(bar.symbol)
+        if state is None:
+            state = self.states[bar.symbol] = _SymbolState(IncrementalEnvelope(**self.envelope_params))
+
+        # 数据有效性检查：缺失/非正价格不进入通道，避免污染增量状态
+        if not (math.isfinite(bar.close) and bar.close > 0):
+            return None
+
+        env = state.envelope.update(bar.close, bar.high, bar.low, bar.open)
+        if env is None:
+            return None
+        if not (env.ma_upper > 0 and env.ma_lower > 0):
+            return None
+
+        # 波动性过滤
+        if state.last_price is None:
+            state.last_price = bar.close
+        else:
+            change = abs(bar.close - state.last_price) / state.last_price
+            state.last_price = bar.close
+            if change > self.max_price_change:
+                self.log(bar, f"波动过大: {change:.2%}")
+                return None
+
+        # 头寸计算
+        capital = self.broker.value
+        if capital <= 0:
+            return None
+        size = max(int(capital * self.risk_per_trade / bar.close), self.min_position)
+
+        # 执行交易
+        position = self.broker.position(bar.symbol)
+        if self.broker.has_pending(bar.symbol):
+            return None
+        if position == 0 and env.cross_up:
+            self.log(bar, f'买入 {size} 股 @ 限价{bar.close:.3f}')
+            order = self.broker.submit(bar.symbol, 'buy', size, bar.close * (1 + self.slippage), bar.dt)
+            if order.status == 'rejected':
+                self.log(bar, f"资金不足，委托被拒绝: 买入 {size}股")
+            return order
+        if position > 0 and env.cross_up_lower:
+            self.log(bar, f'卖出 {position} 股 @ 限价{bar.close:.3f}')
+            return self.broker.submit(bar.symbol, 'sell', position, bar.close * (1 - self.slippage), bar.dt)
+        return None
+
+    def run(self) -> Dict[str, float]:
+        """消费行情源直至结束，返回运行摘要"""
+        clock = time.perf_counter_ns
+        latencies = self.latencies_ns
+        for bar in self.feed:
+            start = clock()
+            self.on_bar(bar)
+            latencies.append(clock() - start)
+        self.bars_processed = len(latencies)
+        return self.summary()
+
+    def summary(self) -> Dict[str, float]:
+        lat_us = np.asarray(self.latencies_ns, dtype=float) / 1e3
+        filled = [o for o in self.broker.orders if o.status == 'filled']
+        return {
+            'bars': self.bars_processed,
+            'symbols': len(self.states),
+            'orders': len(self.broker.orders),
+            'fills': len(filled),
+            'rejected': sum(o.status == 'rejected' for o in self.broker.orders),
+            'final_value': self.broker.value,
+            'latency_p50_us': float(np.percentile(lat_us, 50)) if lat_us.size else 0.0,
+            'latency_p99_us': float(np.percentile(lat_us, 99)) if lat_us.size else 0.0,
+            'latency_max_us': float(lat_us.max()) if lat_us.size else 0.0,
+        }
+
+
+# ==== 测试代码 ====
+if __name__ == "__main__":
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
+    feed = ReplayFeed({
+        '159995': os.path.join(data_dir, '159995_20250311_090320.csv'),
+    })
+    engine = PaperTradingEngine(
+        feed,
+        base_window=40,
+        vol_window=20,
+        scale_factor=3.8,
+        clip_range=(0.025, 0.12),
+        printlog=True
+    )
+    result = engine.run()
+    print("\n=== 模拟交易摘要 ===")
+    for key, value in result.items():
+        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
@@ -0,0 +1,119 @@
+# ==== sim_broker.py ====
+import itertools
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+@dataclass
+class Order:
+    """模拟委托（限价，GTC）"""
+    order_id: int
+    symbol: str
+    side: str                  # 'buy' / 'sell'
+    size: int
+    limit_price: float
+    created: pd.Timestamp
+    status: str = 'submitted'  # submitted / filled / canceled / rejected（资金不足，对应backtrader的Margin）
+    fill_price: float = math.nan
+    commission: float = 0.0
+    filled: Optional[pd.Timestamp] = None
+
+
+@dataclass
+class SimulatedBroker:
+    """模拟撮合：委托在该标的下一根K线按限价规则成交
+
+    买入限价: 最低价 <= 限价 时成交，成交价取 min(开盘价, 限价)
+    卖出限价: 最高价 >= 限价 时成交，成交价取 max(开盘价, 限价)
+    资金检查与backtrader一致：提交时按限价、成交时按成交价核对现金（含手续费），
+    不足时委托记为rejected，不做部分成交或缩量。
+    """
+
+    cash: float = 10_000_000.0
+    commission: float = 0.00015
+    positions: Dict[str, int] = field(default_factory=dict)
+    last_prices: Dict[str, float] = field(default_factory=dict)
+    pending: Dict[str, List[Order]] = field(default_factory=dict)
+    orders: List[Order] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._ids = itertools.count(1)
+        # 持仓市值随行情增量维护，避免每次估值遍历全部标的
+        self._market_value = 0.0
+
+    @property
+    def value(self) -> float:
+        """账户总资产"""
+        return self.cash + self._market_value
+
+    def position(self, symbol: str) -> int:
+        return self.positions.get(symbol, 0)
+
+    def has_pending(self, symbol: str) -> bool:
+        return bool(self.pending.get(symbol))
+
+    def _affordable(self, size: int, price: float) -> bool:
+        return size * price * (1 + self.commission) <= self.cash
+
+    def submit(self, symbol: str, side: str, size: int,
+               limit_price: float, dt: pd.Timestamp) -> Order:
+        """提交委托；买入所需资金超过可用现金时直接拒绝（status='rejected'）"""
+        order = Order(next(self._ids), symbol, side, size, limit_price, dt)
+        self.orders.append(order)
+        if side == 'buy' and not self._affordable(size, limit_price):
+            order.status = 'rejected'
+            return order
+        self.pending.setdefault(symbol, []).append(order)
+        return order
+
+    def cancel(self, order: Order) -> None:
+        if order.status == 'submitted':
+            order.status = 'canceled'
+            self.pending[order.symbol].remove(order)
+
+    def mark(self, symbol: str, price: float) -> None:
+        """按最新价更新持仓市值"""
+        old = self.last_prices.get(symbol)
+        qty = self.positions.get(symbol, 0)
+        if qty and old is not None:
+            self._market_value += qty * (price - old)
+        self.last_prices[symbol] = price
+
+    def on_bar(self, bar) -> List[Order]:
+        """用该标的新K线撮合挂单并更新市值，返回本根成交及因资金不足被拒绝的委托"""
+        self.mark(bar.symbol, bar.close)
+        queue = self.pending.get(bar.symbol)
+        if not queue:
+            return []
+
+        done = []
+        for order in list(queue):
+            if order.side == 'buy':
+                if bar.low > order.limit_price:
+                    continue
+                price = min(bar.open, order.limit_price)
+                qty = order.size
+                if not self._affordable(qty, price):
+                    order.status = 'rejected'
+                    queue.remove(order)
+                    done.append(order)
+                    continue
+            else:
+                if bar.high < order.limit_price:
+                    continue
+                price = max(bar.open, order.limit_price)
+                qty = -order.size
+
+            order.fill_price = price
+            order.commission = abs(qty) * price * self.commission
+            order.status = 'filled'
+            order.filled = bar.dt
+            self.cash -= qty * price + order.commission
+            self.positions[bar.symbol] = self.positions.get(bar.symbol, 0) + qty
+            self._market_value += qty * bar.close
+            queue.remove(order)
+            done.append(order)
+        return done
@@ -0,0 +1,263 @@
+# ==== checkpoint.py ====
+import sys
+import os
+import json
+import pickle
+import tempfile
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.run_catalog import hash_params
+
+DONE, FAILED = 'done', 'failed'
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes) -> None:
+    """先写同目录临时文件并fsync，再原子替换；中途被杀不会留下半个文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        _remove_quietly(tmp)
+        raise
+
+
+def _remove_quietly(path: Union[str, Path]) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def task_id(key: Any) -> str:
+    """任务键（标的代码或参数字典）→ 稳定的任务id"""
+    if isinstance(key, str):
+        return key
+    return hash_params(key if isinstance(key, dict) else {'key': key})[:16]
+
+
+class Checkpoint:
+    """长任务的断点续跑
+
+    目录结构：
+        job.json         任务配置；续跑时配置不一致直接报错，避免混入不同参数的结果
+        manifest.jsonl   追加写的任务状态日志（每行fsync），同一任务以最后一行为准，
+                         进程被杀时最多丢失正在写的最后一行
+        shards/<id>.pkl  每个完成任务的结果分片，原子写入
+
+    续跑时 pending() 跳过已完成任务；失败任务在尝试次数未达max_attempts前重新执行。
+    清单只由主进程写入，子进程只负责计算并把结果返回主进程。
+    """
+
+    def __init__(self, root: Union[str, Path],
+                 job_params: Optional[Dict[str, Any]] = None,
+                 max_attempts: int = 3,
+                 fresh: bool = False):
+        """
+        Args:
+            root: 检查点目录
+            job_params (dict): 任务配置（参数网格、区间等），与已有检查点不一致时抛出ValueError
+            max_attempts (int): 单个任务最多尝试次数，达到后续跑不再重试
+            fresh (bool): 忽略已有进度，清空后从头开始
+        """
+        self.root = Path(root)
+        self.job_params = job_params or {}
+        self.max_attempts = max_attempts
+        self.shard_dir = self.root / 'shards'
+        self.manifest_path = self.root / 'manifest.jsonl'
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self._state: Dict[str, Dict[str, Any]] = {}
+        if fresh:
+            self.reset()
+        self._check_job()
+        self._state = self._replay()
+
+    def _check_job(self) -> None:
+        job_path = self.root / 'job.json'
+        fingerprint = {'params_hash': hash_params(self.job_params),
+                       'params': json.loads(json.dumps(self.job_params, default=str))}
+        if job_path.exists():
+            saved = json.loads(job_path.read_text(encoding='utf-8'))
+            if saved['params_hash'] != fingerprint['params_hash']:
+                raise ValueError(f"检查点 {self.root} 的任务配置与本次不一致: {saved['params']}，"
+                                 f"请更换目录或使用 fresh=True 重新开始")
+            return
+        fingerprint['created_at'] = datetime.now().isoformat(timespec='seconds')
+        atomic_write_bytes(job_path, json.dumps(fingerprint, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def _replay(self) -> Dict[str, Dict[str, Any]]:
+        """回放状态日志；不完整的末行（写入时被杀）直接忽略"""
+        state: Dict[str, Dict[str, Any]] = {}
+        if not self.manifest_path.exists():
+            return state
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                state[record['task']] = record
+        # 日志记为完成但分片丢失的任务重新执行
+        for tid, record in state.items():
+            if record['status'] == DONE and not self._shard_path(tid).exists():
+                record['status'] = FAILED
+                record['error'] = '结果分片缺失'
+        return state
+
+    def _shard_path(self, tid: str) -> Path:
+        return self.shard_dir / f'{tid}.pkl'
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._state[record['task']] = record
+
+    # ==== 状态 ====
+    def attempts(self, tid: str) -> int:
+        record = self._state.get(tid)
+        return record['attempts'] if record else 0
+
+    def is_done(self, tid: str) -> bool:
+        record = self._state.get(tid)
+        return record is not None and record['status'] == DONE
+
+    def pending(self, tasks: Iterable[str]) -> List[str]:
+        """需要执行的任务：未开始，或失败且尝试次数未用完"""
+        return [tid for tid in tasks
+                if not self.is_done(tid) and self.attempts(tid) < self.max_attempts]
+
+    def exhausted(self) -> List[str]:
+        """已达最大尝试次数仍失败的任务"""
+        return [tid for tid, rec in self._state.items()
+                if rec['status'] == FAILED and rec['attempts'] >= self.max_attempts]
+
+    def status(self) -> pd.DataFrame:
+        """每个任务的最新状态：[task, key, status, attempts, error, ts]"""
+        if not self._state:
+            return pd.DataFrame(columns=['task', 'key', 'status', 'attempts', 'error', 'ts']).set_index('task')
+        return pd.DataFrame(list(self._state.values())).set_index('task').sort_values('ts')
+
+    # ==== 记录 ====
+    def save_result(self, tid: str, result: Any, key: Any = None) -> Path:
+        """原子写入结果分片，成功后再在清单中记为完成"""
+        path = self._shard_path(tid)
+        atomic_write_bytes(path, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        self._append({'task': tid, 'key': key, 'status': DONE, 'attempts': self.attempts(tid) + 1,
+                      'error': None, 'ts': datetime.now().isoformat(timespec='milliseconds')})
+        return path
+
+    def mark_failed(self, tid: str, error: str, key: Any = None) -> None:
+        self._append({'task': tid, 'key': key, 'status': FAILED, 'attempts': self.attempts(tid) + 1,
+                      'error': error, 'ts': datetime.now().isoformat(timespec='milliseconds')})
+
+    def load_result(self, tid: str) -> Any:
+        with open(self._shard_path(tid), 'rb') as f:
+            return pickle.load(f)
+
+    def results(self, tasks: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """已完成任务的结果，默认全部"""
+        tasks = [tid for tid, rec in self._state.items() if rec['status'] == DONE] if tasks is None \
+            else [tid for tid in tasks if self.is_done(tid)]
+        return {tid: self.load_result(tid) for tid in tasks}
+
+    def reset(self) -> None:
+        """清空状态日志与结果分片，按当前任务配置重新开始"""
+        for path in self.shard_dir.glob('*.pkl'):
+            path.unlink()
+        for name in ('manifest.jsonl', 'job.json'):
+            _remove_quietly(self.root / name)
+        self._state = {}
+        self._check_job()
+
+    # ==== 通用执行器 ====
+    def run(self, func: Callable[..., Any],
+            tasks: Mapping[Any, Tuple],
+            max_workers: Optional[int] = 1) -> Dict[Any, Any]:
+        """执行 {任务键: 参数元组} 中尚未完成的任务，返回全部（含历史已完成）结果
+
+        func在子进程中执行，抛出异常的任务记为失败后继续其余任务；
+        进程池崩溃（如worker被OOM杀掉）时未完成的任务记为失败并停止，续跑时重试。
+        """
+        ids = {task_id(key): key for key in tasks}
+        todo = self.pending(ids)
+        skipped = len(ids) - len(todo)
+        if skipped:
+            print(f"断点续跑: 跳过 {skipped} 个已完成/已放弃任务，剩余 {len(todo)} 个")
+
+        finished = set()
+
+        def record(tid: str, outcome: Any = None, error: Optional[str] = None) -> None:
+            if error is None:
+                self.save_result(tid, outcome, key=ids[tid])
+            else:
+                self.mark_failed(tid, error, key=ids[tid])
+            finished.add(tid)
+
+        if max_workers == 1:
+            for tid in todo:
+                try:
+                    outcome = func(*tasks[ids[tid]])
+                except Exception as e:
+                    record(tid, error=f"{type(e).__name__}: {e}")
+                else:
+                    record(tid, outcome)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(func, *tasks[ids[tid]]): tid for tid in todo}
+                try:
+                    for future in as_completed(futures):
+                        tid = futures[future]
+                        try:
+                            outcome = future.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            record(tid, error=f"{type(e).__name__}: {e}")
+                        else:
+                            record(tid, outcome)
+                except BrokenProcessPool as e:
+                    unfinished = [tid for tid in todo if tid not in finished]
+                    for tid in unfinished:
+                        record(tid, error=f"BrokenProcessPool: {e}")
+                    print(f"进程池异常终止，{len(unfinished)} 个任务待续跑重试")
+
+        failed = [tid for tid in ids if not self.is_done(tid)]
+        if failed:
+            print(f"{len(failed)} 个任务未完成（可再次运行续跑）")
+        return {ids[tid]: result for tid, result in self.results(ids).items()}
+
+
+# ==== 测试代码 ====
+def _flaky_square(x: int, fail_on: Tuple[int, ...]) -> int:
+    if x in fail_on:
+        raise ValueError(f"模拟失败: {x}")
+    return x * x
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        tasks = {f'task{x:02d}': (x, (3, 7)) for x in range(10)}
+        first = Checkpoint(tmp, job_params={'demo': 1}).run(_flaky_square, tasks, max_workers=2)
+        print(f"首次运行完成 {len(first)} 个")
+
+        # 续跑：只重试失败的两个任务（这次不再失败）
+        tasks = {key: (x, ()) for key, (x, _) in tasks.items()}
+        checkpoint = Checkpoint(tmp, job_params={'demo': 1})
+        second = checkpoint.run(_flaky_square, tasks, max_workers=2)
+        print(f"续跑后完成 {len(second)} 个")
+        print(checkpoint.status()[['status', 'attempts', 'error']])
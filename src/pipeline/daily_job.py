@@ -0,0 +1,434 @@
+# ==== daily_job.py ====
+import sys
+import os
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.data_validator import DataValidator
+from src.data_engine.run_catalog import RunCatalog, hash_file, hash_frame, hash_params
+from src.factor_engine.adaptive_ma_envelope import AdaptiveMAEnvelope
+from src.signal_engine.SignalGenerator import SignalGenerator
+from src.data_analysis.StrategyAnalyzer import StrategyAnalyzer
+from src.data_analysis.summary_utils import flatten_metrics
+from src.pipeline.checkpoint import Checkpoint
+
+# 计算阶段在子进程内依次执行的子步骤
+COMPUTE_STEPS = ('validate', 'envelope', 'signal', 'analyze')
+
+_SENTINEL = None
+
+
+# ==== 数据源 ====
+class AkshareSource:
+    """线上数据源：每个标的调用一次DataFetcher（阻塞IO，由编排器放到线程中执行）"""
+
+    def __init__(self, start_date, end_date=None, adjust: str = "hfq",
+                 save: bool = True, catalog: Optional[RunCatalog] = None):
+        """
+        Args:
+            start_date: 起始日期
+            end_date: 结束日期，默认今天；在构造时确定，跨日续跑时仍取同一区间
+        """
+        self.start_date = pd.Timestamp(start_date).normalize()
+        self.end_date = pd.Timestamp(end_date).normalize() if end_date is not None else pd.Timestamp.today().normalize()
+        self.adjust = adjust
+        self.save = save
+        self.catalog = catalog
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """数据区间与复权方式，计入检查点任务配置"""
+        return {'source': 'akshare', 'start_date': self.start_date.strftime('%Y-%m-%d'),
+                'end_date': self.end_date.strftime('%Y-%m-%d'), 'adjust': self.adjust}
+
+    def fetch(self, symbol: str) -> pd.DataFrame:
+        from src.data_engine.data_fetcher import DataFetcher
+        fetcher = DataFetcher(symbol, start_date=self.start_date, end_date=self.end_date, adjust=self.adjust)
+        return fetcher.fetch_etf_data(save=self.save, catalog=self.catalog)
+
+
+class StoreSource:
+    """本地复权存储数据源：每个标的只增量拉取已存储日期之后的新K线，读取时按因子复权
+
+    分红除权只新增一个因子变化点，已存储的未复权行情和因子都无需重写，
+    替代AkshareSource每天整段重新下载后复权历史的做法。
+    """
+
+    def __init__(self, start_date, end_date=None, adjust: Optional[str] = "hfq",
+                 store=None, refresh: bool = True):
+        """
+        Args:
+            start_date: 起始日期（首次回补亦从此日开始）
+            end_date: 结束日期，默认今天；在构造时确定
+            adjust (str): 'hfq' / 'qfq' / None
+            store (AdjustmentStore): 复权存储，默认 data/store
+            refresh (bool): 读取前是否先增量拉取新K线；False时只读本地存储（离线回放）
+        """
+        from src.data_engine.adjustment import AdjustmentStore
+        self.start_date = pd.Timestamp(start_date).normalize()
+        self.end_date = pd.Timestamp(end_date).normalize() if end_date is not None else pd.Timestamp.today().normalize()
+        self.adjust = adjust
+        self.store = store if store is not None else AdjustmentStore()
+        self.refresh = refresh
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """数据区间与复权方式，计入检查点任务配置"""
+        return {'source': 'store', 'start_date': self.start_date.strftime('%Y-%m-%d'),
+                'end_date': self.end_date.strftime('%Y-%m-%d'), 'adjust': self.adjust}
+
+    def fetch(self, symbol: str) -> pd.DataFrame:
+        if self.refresh:
+            self.store.refresh(symbol, start_date=self.start_date)
+        return self.store.load(symbol, adjust=self.adjust, start_date=self.start_date, end_date=self.end_date)
+
+
+class LocalSource:
+    """本地替身数据源：从内存或CSV目录取数，可模拟网络延迟，用于离线测试编排"""
+
+    def __init__(self, frames: Union[Mapping[str, pd.DataFrame], str, Path], latency: float = 0.0):
+        """
+        Args:
+            frames: {标的: 行情DataFrame}，或包含 <标的>*.csv 的目录
+            latency (float): 每次请求的模拟延迟（秒）
+        """
+        self.frames = frames if isinstance(frames, Mapping) else None
+        self.directory = None if self.frames is not None else Path(frames)
+        self.latency = latency
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """数据内容哈希（逐标的），数据变化后旧检查点不再复用"""
+        if self.frames is not None:
+            hashes = {symbol: hash_frame(df) for symbol, df in self.frames.items()}
+        else:
+            hashes = {path.name: hash_file(path) for path in sorted(self.directory.glob('*.csv'))}
+        return {'source': 'local', 'data': hash_params(hashes)}
+
+    @classmethod
+    def synthetic(cls, n_symbols: int, years: float = 5, latency: float = 0.0, seed: int = 0) -> "LocalSource":
+        from src.benchmark.synthetic import iter_market_data
+        return cls(dict(iter_market_data(n_symbols, years, seed=seed)), latency=latency)
+
+    @property
+    def symbols(self) -> List[str]:
+        if self.frames is not None:
+            return list(self.frames)
+        return sorted({path.stem[:6] for path in self.directory.glob('*.csv')})
+
+    def fetch(self, symbol: str) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.frames is not None:
+            if symbol not in self.frames:
+                raise KeyError(f"本地数据源中没有标的: {symbol}")
+            return self.frames[symbol]
+        paths = sorted(self.directory.glob(f'{symbol}*.csv'))
+        if not paths:
+            raise FileNotFoundError(f"{self.directory} 中没有 {symbol} 的数据文件")
+        return load_csv(paths[-1])
+
+
+# ==== 计算阶段（子进程） ====
+def _compute_symbol(symbol: str,
+                    df: pd.DataFrame,
+                    envelope_params: Dict[str, Any],
+                    output_dir: str,
+                    analyzer_kwargs: Dict[str, Any],
+                    catalog: Optional[RunCatalog]) -> Dict[str, Any]:
+    """子进程任务：校验 → 通道 → 信号 → 绩效分析，返回一行汇总及各子步骤耗时"""
+    row: Dict[str, Any] = {'symbol': symbol, 'error': None, 'signal_path': None}
+    timings = dict.fromkeys(COMPUTE_STEPS, 0.0)
+    step = COMPUTE_STEPS[0]
+    try:
+        start = time.perf_counter()
+        DataValidator.validate_symbol(symbol)
+        DataValidator().validate_integrity(df)
+
+        step, mark = 'envelope', time.perf_counter()
+        timings['validate'] = mark - start
+        envelope = AdaptiveMAEnvelope(**envelope_params)
+        factor_df = envelope.compute(df)
+
+        step, start = 'signal', time.perf_counter()
+        timings['envelope'] = start - mark
+        generator = SignalGenerator(input_path='', upper_band_col='MA_Upper', lower_band_col='MA_Lower',
+                                    envelope_params=envelope.params)
+        generator.df = factor_df
+        signal_df = generator.process().df
+        os.makedirs(output_dir, exist_ok=True)
+        signal_path = os.path.join(output_dir, f"signal_{symbol}_{signal_df.index.max():%Y%m%d}.csv")
+        signal_df.to_csv(signal_path)
+        if catalog is not None:
+            catalog.register(signal_path, 'signal', symbol=symbol, params=generator.params,
+                             start_date=signal_df.index.min(), end_date=signal_df.index.max(),
+                             rows=len(signal_df))
+        row['signal_path'] = signal_path
+
+        step, mark = 'analyze', time.perf_counter()
+        timings['signal'] = mark - start
+        analyzer = StrategyAnalyzer(signal_path, **analyzer_kwargs).load_data().calculate_metrics()
+        timings['analyze'] = time.perf_counter() - mark
+
+        row['rows'] = len(signal_df)
+        row.update(flatten_metrics({k: v for k, v in analyzer.metrics.items() if k != 'total_days'}))
+    except Exception as e:
+        row['error'] = f"{step}: {e}"
+    row['timings'] = timings
+    return row
+
+
+# ==== 吞吐统计 ====
+class StageMeter:
+    """单阶段吞吐统计：处理数、失败数、累计忙碌时间及首尾时间跨度"""
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.items = 0
+        self.errors = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.wait = 0.0   # 等待上游/下游（队列空或满）的累计时间
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+    def record(self, start: float, end: float, rows: int = 0, ok: bool = True) -> None:
+        self.items += 1
+        self.errors += 0 if ok else 1
+        self.rows += rows
+        self.busy += end - start
+        self.first = start if self.first is None else min(self.first, start)
+        self.last = end if self.last is None else max(self.last, end)
+
+    def as_dict(self) -> Dict[str, Any]:
+        span = (self.last - self.first) if self.items else 0.0
+        return {
+            'stage': self.name,
+            'items': self.items,
+            'errors': self.errors,
+            'rows': self.rows,
+            'busy_s': self.busy,
+            'wall_s': span,
+            'items_per_s': self.items / span if span > 0 else np.nan,
+            'rows_per_s': self.rows / span if span > 0 else np.nan,
+            'utilization': self.busy / (span * self.concurrency) if span > 0 else np.nan,
+            'wait_s': self.wait,
+        }
+
+
+# ==== 编排器 ====
+class DailyUniverseJob:
+    """日常全市场任务的IO/计算重叠编排
+
+    获取阶段（asyncio协程 + 线程执行阻塞的akshare请求）与计算阶段（进程池）之间
+    用有界队列连接：计算跟不上时获取协程阻塞在put上（背压），内存中最多驻留
+    queue_size + compute_workers 个标的的数据；下载与计算在不同标的间流水并行，
+    总耗时趋近 max(IO, 计算) 而非二者之和。
+    """
+
+    def __init__(self,
+                 source,
+                 envelope_params: Optional[Dict[str, Any]] = None,
+                 output_dir: str = "data/daily",
+                 fetch_concurrency: int = 4,
+                 compute_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 catalog: Optional[RunCatalog] = None,
+                 checkpoint: Union[str, Path, Checkpoint, None] = None,
+                 **analyzer_kwargs: Any):
+        """
+        Args:
+            source: 数据源，需提供 fetch(symbol) -> DataFrame（StoreSource / AkshareSource / LocalSource）
+            envelope_params (dict): AdaptiveMAEnvelope参数
+            output_dir (str): 信号文件输出目录
+            fetch_concurrency (int): 并发下载数（同时占用的线程数）
+            compute_workers (int): 计算进程数，默认CPU核数
+            queue_size (int): 获取→计算队列容量，默认2倍计算进程数
+            catalog (RunCatalog): 提供时登记信号产物
+            checkpoint: 检查点目录或Checkpoint；提供时每个标的完成即落盘，
+                中断后重新运行只处理未完成及失败的标的
+            **analyzer_kwargs: 透传给StrategyAnalyzer的参数
+        """
+        self.source = source
+        self.envelope_params = envelope_params or {
+            'base_window': 40, 'vol_window': 20, 'scale_factor': 3.8, 'clip_range': (0.025, 0.12)
+        }
+        self.output_dir = output_dir
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.compute_workers = compute_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.compute_workers
+        self.catalog = catalog
+        self.analyzer_kwargs = analyzer_kwargs
+        if checkpoint is not None and not isinstance(checkpoint, Checkpoint):
+            checkpoint = Checkpoint(checkpoint, job_params=self.params)
+        self.checkpoint: Optional[Checkpoint] = checkpoint
+
+        self.results: Optional[pd.DataFrame] = None
+        self.throughput: Optional[pd.DataFrame] = None
+        self.elapsed: float = 0.0
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """决定计算结果的任务配置（含数据源区间/数据哈希），用于检查点一致性校验"""
+        return {'envelope': self.envelope_params, 'analyzer': self.analyzer_kwargs,
+                'output_dir': str(self.output_dir),
+                'source': getattr(self.source, 'params', type(self.source).__name__)}
+
+    def _record(self, row: Dict[str, Any]) -> None:
+        """单个标的结束后立即写入检查点
+
+        含fsync，由run_async放到单线程执行器中执行：不阻塞事件循环，清单也始终只有一个写入方
+        """
+        if self.checkpoint is None:
+            return
+        if row['error'] is None:
+            self.checkpoint.save_result(row['symbol'], {k: v for k, v in row.items() if k != 'timings'})
+        else:
+            self.checkpoint.mark_failed(row['symbol'], row['error'])
+
+    def _resume(self, symbols: List[str]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """拆分为待执行标的与检查点中已有结果（已完成的结果行、已放弃的失败行）"""
+        if self.checkpoint is None:
+            return symbols, []
+        todo = self.checkpoint.pending(symbols)
+        queued = set(todo)
+        skip = [s for s in symbols if s not in queued]
+        rows = list(self.checkpoint.results(skip).values())
+        status = self.checkpoint.status()
+        rows += [{'symbol': s, 'error': status.loc[s, 'error'], 'signal_path': None}
+                 for s in skip if not self.checkpoint.is_done(s)]
+        if skip:
+            print(f"断点续跑: 跳过 {len(skip)} 个标的，剩余 {len(todo)} 个")
+        return todo, rows
+
+    def run(self, symbols: Iterable[str]) -> pd.DataFrame:
+        """同步入口：执行全部标的，返回每个标的一行的汇总表"""
+        return asyncio.run(self.run_async(symbols))
+
+    async def run_async(self, symbols: Iterable[str]) -> pd.DataFrame:
+        symbols = list(dict.fromkeys(symbols))
+        todo, rows = self._resume(symbols)
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue()
+        for symbol in todo:
+            pending.put_nowait(symbol)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        fetch_meter = StageMeter('fetch', self.fetch_concurrency)
+        compute_meter = StageMeter('compute', self.compute_workers)
+
+        async def record(row: Dict[str, Any]) -> None:
+            await loop.run_in_executor(record_pool, self._record, row)
+            rows.append(row)
+
+        async def fetcher(io_pool: ThreadPoolExecutor) -> None:
+            while not pending.empty():
+                symbol = pending.get_nowait()
+                start = time.perf_counter()
+                try:
+                    df = await loop.run_in_executor(io_pool, self.source.fetch, symbol)
+                    fetch_meter.record(start, time.perf_counter(), rows=len(df))
+                except Exception as e:
+                    fetch_meter.record(start, time.perf_counter(), ok=False)
+                    await record({'symbol': symbol, 'error': f"fetch: {e}", 'signal_path': None})
+                    continue
+                mark = time.perf_counter()
+                await ready.put((symbol, df))  # 队列满时在此等待，形成背压
+                fetch_meter.wait += time.perf_counter() - mark
+
+        async def computer(cpu_pool: ProcessPoolExecutor) -> None:
+            while True:
+                mark = time.perf_counter()
+                item = await ready.get()
+                compute_meter.wait += time.perf_counter() - mark
+                if item is _SENTINEL:
+                    return
+                symbol, df = item
+                start = time.perf_counter()
+                row = await loop.run_in_executor(
+                    cpu_pool, _compute_symbol, symbol, df, self.envelope_params,
+                    self.output_dir, self.analyzer_kwargs, self.catalog,
+                )
+                compute_meter.record(start, time.perf_counter(), rows=row.get('rows') or 0,
+                                     ok=row['error'] is None)
+                await record(row)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.fetch_concurrency, thread_name_prefix='fetch') as io_pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint') as record_pool, \
+                ProcessPoolExecutor(max_workers=self.compute_workers) as cpu_pool:
+            async def produce() -> None:
+                await asyncio.gather(*(fetcher(io_pool) for _ in range(self.fetch_concurrency)))
+                for _ in range(self.compute_workers):
+                    await ready.put(_SENTINEL)
+
+            tasks = [asyncio.create_task(produce())]
+            tasks += [asyncio.create_task(computer(cpu_pool)) for _ in range(self.compute_workers)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # 任一阶段异常（如进程池崩溃）时取消其余协程，避免获取端阻塞在满队列上
+                for task in tasks:
+                    task.cancel()
+        self.elapsed = time.perf_counter() - started
+
+        self._summarize(symbols, rows, fetch_meter, compute_meter)
+        return self.results
+
+    def _summarize(self, symbols: List[str], rows: List[Dict[str, Any]],
+                   fetch_meter: StageMeter, compute_meter: StageMeter) -> None:
+        order = {symbol: i for i, symbol in enumerate(symbols)}
+        stages = [fetch_meter.as_dict(), compute_meter.as_dict()]
+        for step in COMPUTE_STEPS:
+            busy = sum(row['timings'][step] for row in rows if 'timings' in row)
+            stages.append({'stage': f'compute.{step}', 'items': compute_meter.items, 'busy_s': busy})
+        self.throughput = pd.DataFrame(stages).set_index('stage')
+
+        for row in rows:
+            row.pop('timings', None)
+        self.results = (
+            pd.DataFrame(rows)
+            .assign(_order=lambda d: d['symbol'].map(order))
+            .sort_values('_order')
+            .drop(columns='_order')
+            .reset_index(drop=True)
+        ) if rows else pd.DataFrame(columns=['symbol', 'error', 'signal_path'])
+        failed = self.results['error'].notna().sum()
+        print(f"日常任务完成: {len(self.results)} 个标的, 失败 {failed} 个, 耗时 {self.elapsed:.2f} s")
+
+    def report(self) -> str:
+        """各阶段吞吐及重叠程度：串行耗时约为获取与计算的忙碌时间之和"""
+        if self.throughput is None:
+            return "尚未运行"
+        fetch_busy = self.throughput.loc['fetch', 'busy_s'] / self.fetch_concurrency
+        compute_busy = self.throughput.loc['compute', 'busy_s'] / self.compute_workers
+        lines = [self.throughput.to_string(float_format=lambda v: f'{v:.3f}'), '',
+                 f"总耗时 {self.elapsed:.2f} s | 获取 {fetch_busy:.2f} s + 计算 {compute_busy:.2f} s "
+                 f"(按并发折算) | 下界 max={max(fetch_busy, compute_busy):.2f} s, "
+                 f"不重叠时 sum={fetch_busy + compute_busy:.2f} s"]
+        return '\n'.join(lines)
+
+
+# 使用示例
+if __name__ == "__main__":
+    import tempfile
+
+    # 线上运行使用 StoreSource('20150101')：每天只增量拉取新K线，复权在本地完成
+    # 本地替身数据源：每个标的模拟0.3秒下载延迟
+    source = LocalSource.synthetic(24, years=5, latency=0.3)
+    with tempfile.TemporaryDirectory() as tmp:
+        job = DailyUniverseJob(source, output_dir=tmp, fetch_concurrency=2, compute_workers=2,
+                               checkpoint=os.path.join(tmp, 'checkpoint'))
+        summary = job.run(source.symbols)
+        print(summary[['symbol', 'error', 'performance_total_return', 'performance_sharpe']].head())
+        print()
+        print(job.report())
@@ -0,0 +1,204 @@
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.instrumentation.stage_monitor import stage
+
+
+class BreakoutScanner:
+    """全市场通道突破扫描器
+
+    为每个标的保存收盘价/收益率环形缓冲区，每日只需写入各标的最新一根K线，
+    再在整个面板上向量化计算 MA_Base / Envelope_Pct / MA_Upper / MA_Lower，
+    按突破距离（相对包络宽度）排序输出。计算口径与AdaptiveMAEnvelope一致。
+
+    Attributes:
+        symbols (list): 已登记的标的代码，行号即状态数组下标
+    """
+
+    def __init__(self, base_window: int = 20, vol_window: int = 20,
+                 scale_factor: float = 2.0, clip_range: tuple = (0.01, 0.05)):
+        """
+        Args:
+            base_window (int): 基础移动平均窗口，默认20
+            vol_window (int): 波动率计算窗口，默认20
+            scale_factor (float): 波动率缩放系数，默认2.0
+            clip_range (tuple): 包络百分比限制范围，默认(1%,5%)
+        """
+        self.base_window = base_window
+        self.vol_window = vol_window
+        self.scale_factor = scale_factor
+        self.clip_min, self.clip_max = clip_range
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._closes = np.empty((0, base_window))
+        self._returns = np.empty((0, vol_window))
+        self._close_count = np.empty(0, dtype=np.int64)
+        self._return_count = np.empty(0, dtype=np.int64)
+        self._last_close = np.empty(0)
+        self._last_date = np.empty(0, dtype='datetime64[ns]')
+        self._signal = np.empty(0, dtype=np.int8)
+
+    # ==== 状态维护 ====
+    def _register(self, symbols: Iterable[str]) -> np.ndarray:
+        """返回标的对应的行号，新标的追加到状态数组末尾"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if new:
+            n_new = len(new)
+            for s in new:
+                self._index[s] = len(self.symbols)
+                self.symbols.append(s)
+            self._closes = np.vstack([self._closes, np.full((n_new, self.base_window), np.nan)])
+            self._returns = np.vstack([self._returns, np.full((n_new, self.vol_window), np.nan)])
+            self._close_count = np.concatenate([self._close_count, np.zeros(n_new, dtype=np.int64)])
+            self._return_count = np.concatenate([self._return_count, np.zeros(n_new, dtype=np.int64)])
+            self._last_close = np.concatenate([self._last_close, np.full(n_new, np.nan)])
+            self._last_date = np.concatenate([self._last_date, np.full(n_new, np.datetime64('NaT'), dtype='datetime64[ns]')])
+            self._signal = np.concatenate([self._signal, np.zeros(n_new, dtype=np.int8)])
+        return np.fromiter((self._index[s] for s in symbols), dtype=np.int64)
+
+    def update(self, date, closes: pd.Series) -> np.ndarray:
+        """写入某一交易日各标的收盘价
+
+        Args:
+            date: 交易日
+            closes (Series): 标的代码 → 收盘价
+        Returns:
+            ndarray: 本次实际更新（日期晚于已存状态）的行号
+        """
+        closes = closes.dropna()
+        rows = self._register(closes.index)
+        prices = closes.to_numpy(dtype=float)
+        day = np.datetime64(pd.Timestamp(date), 'ns')
+
+        # 同一日期重复写入或乱序数据直接跳过
+        fresh = np.isnat(self._last_date[rows]) | (self._last_date[rows] < day)
+        rows, prices = rows[fresh], prices[fresh]
+
+        prev = self._last_close[rows]
+        has_prev = ~np.isnan(prev)
+        r_rows = rows[has_prev]
+        self._returns[r_rows, self._return_count[r_rows] % self.vol_window] = prices[has_prev] / prev[has_prev] - 1
+        self._return_count[r_rows] += 1
+
+        self._closes[rows, self._close_count[rows] % self.base_window] = prices
+        self._close_count[rows] += 1
+        self._last_close[rows] = prices
+        self._last_date[rows] = day
+        return rows
+
+    def warm_up(self, panel: pd.DataFrame) -> "BreakoutScanner":
+        """用历史收盘价面板（日期 × 标的）初始化状态，只回放所需的尾部窗口"""
+        tail = panel.sort_index().iloc[-(max(self.base_window, self.vol_window + 1)):]
+        for date, row in tail.iterrows():
+            self.update(date, row)
+        return self
+
+    # ==== 扫描 ====
+    def envelope(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """向量化计算当前通道，未完成预热的标的为NaN"""
+        rows = np.arange(len(self.symbols)) if rows is None else rows
+        closes = self._closes[rows]
+        returns = self._returns[rows]
+        ready = (self._close_count[rows] >= self.base_window) & (self._return_count[rows] >= self.vol_window)
+
+        with np.errstate(invalid='ignore'):
+            ma_base = closes.mean(axis=1)
+            vol = returns.std(axis=1, ddof=1)
+        pct = np.clip(vol * self.scale_factor, self.clip_min, self.clip_max)
+        ma_base[~ready] = np.nan
+        pct[~ready] = np.nan
+
+        return pd.DataFrame({
+            'date': self._last_date[rows],
+            'close': self._last_close[rows],
+            'MA_Base': ma_base,
+            'Envelope_Pct': pct,
+            'MA_Upper': ma_base * (1 + pct),
+            'MA_Lower': ma_base * (1 - pct),
+        }, index=pd.Index([self.symbols[i] for i in rows], name='symbol'))
+
+    def scan(self, date, closes: pd.Series, top_n: Optional[int] = None) -> pd.DataFrame:
+        """写入当日收盘价并返回突破标的排名
+
+        Returns:
+            DataFrame: [Signal, Distance, New, close, MA_Upper, MA_Lower, Envelope_Pct, ...]，
+                Distance = 越过轨道的幅度 / Envelope_Pct，New 表示当日新发生的突破；
+                上轨突破在前、按距离降序
+        """
+        with stage('signal_engine.scan', symbols=len(closes)) as st:
+            rows = self.update(date, closes)
+            env = self.envelope(rows).dropna(subset=['MA_Base'])
+            upper_dist = (env['close'] / env['MA_Upper'] - 1) / env['Envelope_Pct']
+            lower_dist = (1 - env['close'] / env['MA_Lower']) / env['Envelope_Pct']
+
+            env['Signal'] = np.select([upper_dist > 0, lower_dist > 0], [1, -1], default=0)
+            env['Distance'] = np.where(env['Signal'] == 1, upper_dist,
+                                       np.where(env['Signal'] == -1, lower_dist, 0.0))
+            ready_rows = np.fromiter((self._index[s] for s in env.index), dtype=np.int64, count=len(env))
+            env['New'] = env['Signal'].to_numpy() != self._signal[ready_rows]
+            self._signal[ready_rows] = env['Signal'].to_numpy()
+            result = (
+                env[env['Signal'] != 0]
+                .sort_values(['Signal', 'Distance'], ascending=[False, False])
+            )
+            if top_n is not None:
+                result = result.groupby('Signal', sort=False).head(top_n)
+            st.add_rows(len(rows))
+        return result[['Signal', 'Distance', 'New', 'close', 'MA_Upper', 'MA_Lower', 'Envelope_Pct', 'MA_Base', 'date']]
+
+    # ==== 持久化 ====
+    def save(self, path: Union[str, Path]) -> None:
+        """保存状态为npz（临时文件+替换，写入中断不会损坏旧状态）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        params = json.dumps({'base_window': self.base_window, 'vol_window': self.vol_window,
+                             'scale_factor': self.scale_factor,
+                             'clip_range': [self.clip_min, self.clip_max]})
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, symbols=np.array(self.symbols, dtype=str), params=np.array(params),
+                     closes=self._closes, returns=self._returns,
+                     close_count=self._close_count, return_count=self._return_count,
+                     last_close=self._last_close, last_date=self._last_date, signal=self._signal)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "BreakoutScanner":
+        with np.load(path) as data:
+            params = json.loads(str(data['params']))
+            scanner = cls(params['base_window'], params['vol_window'],
+                          params['scale_factor'], tuple(params['clip_range']))
+            scanner.symbols = data['symbols'].tolist()
+            scanner._index = {s: i for i, s in enumerate(scanner.symbols)}
+            scanner._closes = data['closes']
+            scanner._returns = data['returns']
+            scanner._close_count = data['close_count']
+            scanner._return_count = data['return_count']
+            scanner._last_close = data['last_close']
+            scanner._last_date = data['last_date']
+            scanner._signal = data['signal']
+        return scanner
+
+
+# 测试用例
+if __name__ == "__main__":
+    from src.benchmark.synthetic import iter_market_data
+
+    panel = pd.DataFrame({symbol: df['close'] for symbol, df in iter_market_data(3000, years=1)})
+    scanner = BreakoutScanner(base_window=40, vol_window=20, scale_factor=3.8,
+                              clip_range=(0.025, 0.12)).warm_up(panel.iloc[:-1])
+    scanner.save('scanner_state.npz')
+
+    scanner = BreakoutScanner.load('scanner_state.npz')
+    start = pd.Timestamp.now()
+    ranking = scanner.scan(panel.index[-1], panel.iloc[-1], top_n=10)
+    print(f"扫描 {len(panel.columns)} 个标的耗时: {(pd.Timestamp.now() - start).total_seconds() * 1000:.1f} ms")
+    print(ranking)
@@ -1,42 +1,83 @@
 import pandas as pd
 import numpy as np
+import sys
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))  # 添加项目根目录到PYTHONPATH
+
+from src.data_engine.csv_loader import load_csv
+from src.data_engine.run_catalog import RunCatalog, default_catalog, hash_file
+from src.instrumentation.stage_monitor import instrumented, stage, record_file_written
+
+def signal_params(envelope_params: Optional[Dict[str, Any]],
+                  upper_band_col: str = 'MA_UpperBand',
+                  lower_band_col: str = 'MA_LowerBand') -> Dict[str, Any]:
+    """信号产物在目录中登记的统一参数结构，所有写出信号文件的环节都按此登记
+
+    Returns:
+        dict: {'envelope': 通道参数（AdaptiveMAEnvelope.params）, 'upper_band_col', 'lower_band_col'}
+    """
+    return {
+        'envelope': dict(envelope_params or {}),
+        'upper_band_col': upper_band_col,
+        'lower_band_col': lower_band_col,
+    }
+
+
 class SignalGenerator:
     """自适应移动平均线包络策略信号生成器
     
     Attributes:
         upper_band_col (str): 上轨列名，默认'MA_UpperBand'
         lower_band_col (str): 下轨列名，默认'MA_LowerBand'
+        envelope_params (dict): 生成上下轨的通道参数，未给出时继承上游因子文件的登记信息
     """
     
     def __init__(self, input_path: str, output_dir: str = "data",
                  upper_band_col: str = 'MA_UpperBand',
-                 lower_band_col: str = 'MA_LowerBand'):
+                 lower_band_col: str = 'MA_LowerBand',
+                 envelope_params: Optional[Dict[str, Any]] = None):
         """
         Args:
             input_path (str): 输入数据文件路径
             output_dir (str): 信号文件输出目录，默认data/
             upper_band_col (str): 上轨列名，默认'MA_UpperBand'
             lower_band_col (str): 下轨列名，默认'MA_LowerBand'
+            envelope_params (dict): 通道参数（AdaptiveMAEnvelope.params），默认从产物目录查询
         """
         self.input_path = input_path
         self.output_dir = output_dir
         self.upper_band_col = upper_band_col
         self.lower_band_col = lower_band_col
+        self.envelope_params = envelope_params
         self.df: Optional[pd.DataFrame] = None  # 明确类型提示
 
+    @property
+    def params(self) -> dict:
+        """信号参数，用于产物目录登记与查重"""
+        return signal_params(self.envelope_params, self.upper_band_col, self.lower_band_col)
+
+    def _resolve_envelope_params(self, catalog: RunCatalog) -> None:
+        """未显式给出通道参数时，继承上游因子文件登记的参数"""
+        if self.envelope_params is None and self.input_path and os.path.exists(self.input_path):
+            upstream = catalog.lookup(self.input_path)
+            if upstream and upstream['stage'] == 'factor':
+                self.envelope_params = upstream['params']
+
+    def _symbol(self, catalog: RunCatalog) -> Optional[str]:
+        """标的代码：优先取数据中的symbol列，其次继承上游产物的登记信息"""
+        if self.df is not None and 'symbol' in self.df.columns and not self.df.empty:
+            return str(self.df['symbol'].iloc[0])
+        upstream = catalog.lookup(self.input_path)
+        return upstream['symbol'] if upstream else None
+
     def load_data(self) -> 'SignalGenerator':
         """加载原始数据文件（增强类型安全）"""
         try:
-            self.df = pd.read_csv(
-                self.input_path, 
-                parse_dates=['date'], 
-                index_col='date'
-            )
+            self.df = load_csv(self.input_path)
             print(f"成功加载数据：{self.input_path}")
             return self
         except Exception as e:
@@ -73,6 +114,7 @@ class SignalGenerator:
         )
         return df
     
+    @instrumented('signal_engine.process')
     def process(self) -> 'SignalGenerator':
         """类型安全的处理流程"""
         if self.df is None:
@@ -84,30 +126,70 @@ class SignalGenerator:
         self.df = self._generate_signals()
         return self
     
-    def save_to_csv(self, filename: Optional[str] = None) -> None:
-        """类型安全的文件保存"""
+    def save_to_csv(self, filename: Optional[str] = None, catalog: Optional[RunCatalog] = None) -> str:
+        """类型安全的文件保存，写出后登记到产物目录
+
+        Args:
+            filename (str): 输出文件名，相对路径位于项目data目录下；默认按时间戳命名
+            catalog (RunCatalog): 产物目录，默认data/catalog.sqlite
+        Returns:
+            str: 信号文件路径
+        """
         if self.df is None:
             raise ValueError("没有可供保存的数据，请先执行process()")
+        catalog = catalog or default_catalog()
+        self._resolve_envelope_params(catalog)
         # 修正路径设置（原错误行）
         current_dir = os.path.dirname(os.path.abspath(__file__))  # 当前文件所在目录
         project_root = os.path.dirname(os.path.dirname(current_dir))  # 上两级目录（src/factor_engine → src → 项目根目录）
         signal_file_dir = os.path.join(project_root, 'data')  # 正确拼接路径
+        os.makedirs(signal_file_dir, exist_ok=True)
     
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        signal_save_path = os.path.join(signal_file_dir, f'signal_Adaptive_MA_Envelope_{timestamp}.csv')
-        self.df.to_csv(signal_save_path)
+        if filename:
+            signal_save_path = os.path.join(signal_file_dir, filename)  # 绝对路径时join直接返回filename
+            os.makedirs(os.path.dirname(signal_save_path), exist_ok=True)
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            signal_save_path = os.path.join(signal_file_dir, f'signal_Adaptive_MA_Envelope_{timestamp}.csv')
+        with stage('signal_engine.save') as st:
+            self.df.to_csv(signal_save_path)
+            st.add_rows(len(self.df))
+            record_file_written(st, signal_save_path)
+        catalog.register(
+            signal_save_path, 'signal', symbol=self._symbol(catalog), params=self.params,
+            input_hash=hash_file(self.input_path) if os.path.exists(self.input_path) else None,
+            start_date=self.df.index.min(), end_date=self.df.index.max(), rows=len(self.df)
+        )
         print(f"[Success] 信号文件已保存至：{signal_save_path}")
+        return signal_save_path
+
+    def run(self, catalog: Optional[RunCatalog] = None) -> str:
+        """加载 → 生成信号 → 保存；输入文件与参数均未变化时直接复用已有信号文件
+
+        Returns:
+            str: 信号文件路径
+        """
+        catalog = catalog or default_catalog()
+        self._resolve_envelope_params(catalog)
+        if os.path.exists(self.input_path):
+            cached_path = catalog.latest('signal', params=self.params, input_hash=hash_file(self.input_path))
+            if cached_path:
+                print(f"输入与参数未变化，复用已有信号文件：{cached_path}")
+                self.df = load_csv(cached_path)
+                return cached_path
+        return self.load_data().process().save_to_csv(catalog=catalog)
 
 # 测试用例
 if __name__ == "__main__":
     # 正确路径测试
     valid_processor = SignalGenerator(
-        input_path=r"E:\gzhtemp\etf_trade_v1\data\factor_Adaptive_MA_Envelope_20250311_130754.csv",
+        input_path=default_catalog().latest('factor', symbol='159995')
+        or r"E:\gzhtemp\etf_trade_v1\data\factor_Adaptive_MA_Envelope_20250311_130754.csv",
         upper_band_col="MA_Upper",
         lower_band_col="MA_Lower"
     )
     try:
-        valid_processor.load_data().process().save_to_csv()
+        valid_processor.run()
     except Exception as e:
         print(f"正常用例测试失败: {str(e)}")
     else:
@@ -0,0 +1,28 @@
+# ==== crossover.py ====
+import numpy as np
+
+# 纯numpy实现，分析层（StrategyAnalyzer等）可直接使用而无需导入backtrader
+
+
+def crossover(data0: np.ndarray, data1: np.ndarray) -> np.ndarray:
+    """向量化的bt.indicators.CrossOver：+1 上穿，-1 下穿，0 无交叉
+
+    与backtrader一致：以“非零差值”(NonZeroDifference)判断前一状态，
+    两线相等的K线沿用之前的相对位置；第一根K线没有前值，恒为0。
+    """
+    diff = np.asarray(data0, dtype=float) - np.asarray(data1, dtype=float)
+    n = len(diff)
+    if n == 0:
+        return diff
+    carry = np.zeros(n, dtype=bool)
+    carry[1:] = diff[1:] == 0
+    idx = np.where(carry, 0, np.arange(n))
+    np.maximum.accumulate(idx, out=idx)
+    nzd = diff[idx]
+
+    with np.errstate(invalid='ignore'):
+        up = np.zeros(n, dtype=bool)
+        down = np.zeros(n, dtype=bool)
+        up[1:] = (nzd[:-1] < 0) & (diff[1:] > 0)
+        down[1:] = (nzd[:-1] > 0) & (diff[1:] < 0)
+    return up.astype(float) - down.astype(float)
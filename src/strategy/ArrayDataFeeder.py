@@ -0,0 +1,136 @@
+import array
+import os
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from typing import Dict, Optional
+
+from src.signal_engine.crossover import crossover
+
+# backtrader日期数值：0001-01-01起的天数（含小数），1970-01-01对应719163
+_EPOCH_ORDINAL = 719163.0
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def precompute_lines(close: np.ndarray, ma_upper: np.ndarray, ma_lower: np.ndarray) -> Dict[str, np.ndarray]:
+    """信号阶段一次性计算策略所需的辅助线
+
+    Returns:
+        dict: cross_upper（收盘价相对上轨的交叉）、cross_lower（相对下轨的交叉）、
+            valid（价格与通道均为正，对应原bt.And校验）
+    """
+    with np.errstate(invalid='ignore'):
+        valid = (close > 0) & (ma_upper > 0) & (ma_lower > 0)
+    return {
+        'cross_upper': crossover(close, ma_upper),
+        'cross_lower': crossover(close, ma_lower),
+        'valid': valid.astype(float),
+    }
+
+
+def _load_columns(source, columns: Dict[str, Optional[str]]) -> Dict[str, np.ndarray]:
+    """从DataFrame / 数组字典 / 列式文件(.npz/.parquet/.csv)取出所需列为连续float64数组"""
+    wanted = [c for c in columns.values() if c]
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                source = {k: data[k] for k in data.files}
+        elif path.endswith('.parquet'):
+            source = pd.read_parquet(path, columns=[c for c in wanted if c != 'date'] or None)
+        else:
+            from src.data_engine.csv_loader import load_csv
+            source = load_csv(path, usecols=wanted)
+
+    if isinstance(source, pd.DataFrame):
+        out = {'datetime': source.index.to_numpy()}
+        for line, col in columns.items():
+            if col and col in source.columns:
+                out[line] = source[col].to_numpy(dtype=np.float64)
+        return out
+
+    out = {'datetime': np.asarray(source['datetime'] if 'datetime' in source else source['date'])}
+    for line, col in columns.items():
+        if col and col in source:
+            out[line] = np.ascontiguousarray(source[col], dtype=np.float64)
+    return out
+
+
+class ArrayDataFeeder(bt.feed.DataBase):
+    """基于连续NumPy数组的数据源
+
+    与SignalDataFeeder列名参数一致，但预加载时直接把整列数组写入各条数据线，
+    不再逐行转换DataFrame；同时携带信号阶段预先算好的 cross_upper / cross_lower / valid 线，
+    策略检测到这些线后不再创建CrossOver与bt.And指标，next()只做数组下标读取。
+
+    dataname 可为DataFrame（日期索引）、{'datetime': ..., 列名: 数组} 字典，
+    或 .npz / .parquet / .csv 文件路径。
+    """
+
+    lines = ('ma_upper', 'ma_lower', 'signal', 'cross_upper', 'cross_lower', 'valid')
+
+    params = (
+        ('ma_upper', 'MA_Upper'),
+        ('ma_lower', 'MA_Lower'),
+        ('signal', 'Signal'),
+        ('cross_upper', 'Cross_Upper'),  # 列式存储中已有预计算列时直接读取，否则加载时向量化计算
+        ('cross_lower', 'Cross_Lower'),
+        ('valid', 'Valid'),
+        ('close', 'close'),
+        ('open', -1),             # 与PandasData一致：-1 自动匹配同名列，None 表示无此列
+        ('high', -1),
+        ('low', -1),
+        ('volume', -1),
+        ('openinterest', -1),
+    )
+
+    _DATA_LINES = ('open', 'high', 'low', 'close', 'volume', 'openinterest',
+                   'ma_upper', 'ma_lower', 'signal', 'cross_upper', 'cross_lower', 'valid')
+
+    def start(self):
+        super(ArrayDataFeeder, self).start()
+        columns = {}
+        for line in self._DATA_LINES:
+            col = getattr(self.p, line)
+            columns[line] = line if col == -1 else col
+        arrays = _load_columns(self.p.dataname, columns)
+
+        stamps = pd.DatetimeIndex(arrays.pop('datetime')).as_unit('ns').asi8
+        arrays['datetime'] = stamps / _NS_PER_DAY + _EPOCH_ORDINAL
+        if not {'cross_upper', 'cross_lower', 'valid'} <= arrays.keys() and \
+                {'close', 'ma_upper', 'ma_lower'} <= arrays.keys():
+            arrays.update(precompute_lines(arrays['close'], arrays['ma_upper'], arrays['ma_lower']))
+        self._arrays = arrays
+        self._size = len(stamps)
+        self._idx = -1
+
+    def _date_mask(self) -> np.ndarray:
+        dt = self._arrays['datetime']
+        return (dt >= self.fromdate) & (dt <= self.todate)
+
+    def preload(self):
+        """整列写入数据线缓冲区；存在过滤器时退回逐根加载"""
+        if self._ffilters:
+            return super(ArrayDataFeeder, self).preload()
+
+        mask = self._date_mask()
+        nan_fill = np.full(int(mask.sum()), np.nan)
+        for name in self.lines.getlinealiases():
+            values = self._arrays.get(name)
+            values = nan_fill if values is None else np.ascontiguousarray(values[mask], dtype=np.float64)
+            buf = array.array('d')
+            buf.frombytes(values.tobytes())
+            getattr(self.lines, name).array = buf
+
+        self._last()
+        self.home()
+
+    def _load(self):
+        """非预加载模式（如exactbars）下按下标逐根读取"""
+        self._idx += 1
+        if self._idx >= self._size:
+            return False
+        for name in self.lines.getlinealiases():
+            values = self._arrays.get(name)
+            getattr(self.lines, name)[0] = values[self._idx] if values is not None else float('nan')
+        return True
@@ -16,6 +16,7 @@ class AdaptiveMAEnvelopeStrategy(bt.Strategy):
         ('max_price_change', 0.05),  # 最大允许波动率
         ('min_position', 100),      # 最小交易单位
         ('slippage', 0.001),        # 滑点控制
+        ('precomputed', None),      # 使用数据源预计算的交叉/校验线，None为自动检测
     )
 
     def __init__(self):
@@ -24,17 +25,28 @@ class AdaptiveMAEnvelopeStrategy(bt.Strategy):
         self.price = self.data.close
         self.ma_upper = self.data.ma_upper
         self.ma_lower = self.data.ma_lower
-        
-        # 交易信号
-        self.buy_signal = bt.indicators.CrossOver(self.price, self.ma_upper)
-        self.sell_signal = bt.indicators.CrossOver(self.price, self.ma_lower)
-        
-        # 数据验证条件（修正关键错误）
-        self.data_valid = bt.And(
-            self.price > 0,      # 直接使用布尔表达式
-            self.ma_upper > 0,
-            self.ma_lower > 0
-        )
+
+        precomputed = self.p.precomputed
+        if precomputed is None:
+            precomputed = 'cross_upper' in self.data.lines.getlinealiases()
+
+        if precomputed:
+            # ArrayDataFeeder已携带向量化计算的信号线，next()中只做数组读取
+            self.buy_signal = self.data.cross_upper
+            self.sell_signal = self.data.cross_lower
+            self.data_valid = self.data.valid
+            self.addminperiod(2)  # 与CrossOver指标的最小周期一致，保证首笔交易时点不变
+        else:
+            # 交易信号
+            self.buy_signal = bt.indicators.CrossOver(self.price, self.ma_upper)
+            self.sell_signal = bt.indicators.CrossOver(self.price, self.ma_lower)
+            
+            # 数据验证条件（修正关键错误）
+            self.data_valid = bt.And(
+                self.price > 0,      # 直接使用布尔表达式
+                self.ma_upper > 0,
+                self.ma_lower > 0
+            )
         
         # 交易记录
         self.trade_count = 0